@@ -57,7 +57,7 @@ from edb.common import verutils
 # The merge conflict there is a nice reminder that you probably need
 # to write a patch in edb/pgsql/patches.py, and then you should preserve
 # the old value.
-EDGEDB_CATALOG_VERSION = 2025_11_03_00_00
+EDGEDB_CATALOG_VERSION = 2026_10_19_00_00
 EDGEDB_MAJOR_VERSION = 8
 
 
@@ -217,7 +217,7 @@ def get_extension_dir_path() -> pathlib.Path:
 
 
 def hash_dirs(
-    dirs: Sequence[tuple[str, str]],
+    dirs: Sequence[tuple[str | pathlib.Path, str]],
     *,
     extra_files: Optional[Sequence[str | pathlib.Path]]=None,
     extra_data: Optional[bytes] = None,
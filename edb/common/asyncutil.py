@@ -149,6 +149,59 @@ async def debounce[T](
         target_time = None
 
 
+class SingleFlight[K, V]:
+    """Coalesces concurrent calls that do the same work.
+
+    The first call for a key runs its function right away.  Concurrent
+    calls with the same key wait for it and get its result, so a burst of
+    identical requests results in a single computation.  If the result is
+    not shareable, or the call fails or is cancelled, the waiting calls
+    all run their own functions, in parallel: errors can depend on the
+    caller (e.g. on the state of its connection), so they are not shared.
+    """
+
+    # Resolves to whether the result is shared, and the result.
+    _flights: dict[K, asyncio.Future[tuple[bool, V | None]]]
+
+    def __init__(self) -> None:
+        self._flights = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(
+        self,
+        key: K,
+        func: Callable[[], Awaitable[V]],
+        *,
+        shareable: Callable[[V], bool] = lambda _: True,
+    ) -> tuple[V, bool]:
+        """Return the result of *func()* and whether it was shared.
+
+        If a call for *key* is in flight, wait for it and return its
+        result instead, if *shareable* says it can be.
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            shared, result = await asyncio.shield(flight)
+            if shared:
+                return cast(V, result), True
+            return await func(), False
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await func()
+            shared = shareable(result)
+        except BaseException:
+            flight.set_result((False, None))
+            raise
+        finally:
+            del self._flights[key]
+        flight.set_result((shared, result))
+        return result, False
+
+
 _Owner = TypeVar("_Owner")
 HandlerFunction = Callable[[], Awaitable[None]]
 HandlerMethod = Callable[[Any], Awaitable[None]]
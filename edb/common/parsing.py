@@ -85,6 +85,51 @@ class Token(parsing.Token):
         return '<Token %s "%s">' % (self.__class__._token, self.val)
 
 
+class CSTToken:
+    """A terminal of the CST, as passed to the production methods.
+
+    Most terminals never have their span looked at, so it is only built
+    on first access.
+    """
+
+    __slots__ = (
+        'val', 'clean_value', '_filename', '_buffer', '_start', '_end',
+        '_span',
+    )
+
+    def __init__(
+        self,
+        val: str,
+        clean_value: Any,
+        *,
+        filename: Optional[str],
+        buffer: str,
+        start: int,
+        end: int,
+    ) -> None:
+        self.val = val
+        self.clean_value = clean_value
+        self._filename = filename
+        self._buffer = buffer
+        self._start = start
+        self._end = end
+        self._span: Optional[Span] = None
+
+    @property
+    def span(self) -> Span:
+        if self._span is None:
+            self._span = Span(
+                filename=self._filename,
+                buffer=self._buffer,
+                start=self._start,
+                end=self._end,
+            )
+        return self._span
+
+    def __repr__(self):
+        return '<CSTToken "%s">' % self.val
+
+
 def inline(argument_index: int):
     """
     When added to grammar productions, it makes the method equivalent to:
@@ -139,9 +184,14 @@ class Nonterm(parsing.Nonterm):
                         doc += ' [{}]'.format(prec)
 
                     inline_index = getattr(attr, 'inline_index', None)
-                    attr = lambda self, *args, meth=attr: meth(self, *args)
+                    meth = attr
+                    attr = lambda self, *args, meth=meth: meth(self, *args)
                     attr.__doc__ = doc
                     attr.inline_index = inline_index
+                    # The wrapper only exists to carry the docstring for
+                    # the grammar generator, load_spec_productions() calls
+                    # the wrapped method directly.
+                    attr.__wrapped__ = meth
                     setattr(cls, name, attr)
 
 
@@ -358,6 +408,7 @@ def load_spec_productions(
             continue
 
         method = cls.__dict__[method_name]
+        method = getattr(method, '__wrapped__', method)
         productions.append((cls, method))
     return productions
 
@@ -679,6 +679,12 @@ class LabeledHistogram(BaseHistogram):
                     f'{self._name}_created{{{fmt_label}}} {float(value)}'
                 )
 
+    def clear(self, label_filter: typing.Callable[..., bool]) -> None:
+        for label in list(self._metric_values):
+            if label_filter(*label):
+                self._metric_values.pop(label)
+                self._metric_created.pop(label, None)
+
 
 @functools.lru_cache(maxsize=1024)
 def _format_desc(desc: str) -> str:
@@ -0,0 +1,166 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""A sampling profiler that is cheap enough to run in production.
+
+Unlike the `edb.tools.profiling` decorator, it doesn't trace any calls:
+a background thread periodically takes the Python stacks of all other
+threads of the process and counts them.  The result is a mapping of
+stacks (outermost frame first) to the number of times they were seen,
+which can be merged across processes and rendered as collapsed stacks
+or as a flame graph.
+"""
+
+from __future__ import annotations
+from typing import (
+    Iterable,
+    Mapping,
+    Optional,
+    Counter,
+)
+
+import collections
+import os
+import sys
+import threading
+import time
+import types
+
+
+Stack = tuple[str, ...]
+Samples = Counter[Stack]
+
+# Leaf frames of threads that are waiting for work; samples ending in
+# them are counted as idle instead of being recorded.
+IDLE_FUNCTIONS = frozenset({
+    # The event loop under uvloop, and under asyncio
+    'Runner.run',
+    'EpollSelector.select',
+    'KqueueSelector.select',
+    'PollSelector.select',
+    'SelectSelector.select',
+    # Idle threads of thread pools
+    'Condition.wait',
+    # A compiler worker waiting for a request
+    'WorkerConnection.iter_request',
+})
+
+EDB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(EDB_DIR)
+
+
+class SamplingProfiler:
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.01,
+        idle: Iterable[str] = IDLE_FUNCTIONS,
+    ) -> None:
+        self._interval = interval
+        self._idle = frozenset(idle)
+        self._labels: dict[types.CodeType, str] = {}
+        self._samples: Samples = collections.Counter()
+        self._idle_samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_evt = threading.Event()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float) -> None:
+        """Start sampling for at most *duration* seconds."""
+        if self.is_running():
+            raise RuntimeError('the profiler is already running')
+        self._samples = collections.Counter()
+        self._idle_samples = 0
+        self._stop_evt.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(duration,),
+            name='edb-sampling-profiler',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> Samples:
+        """Stop sampling and return the collected samples."""
+        self._stop_evt.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        samples = self._samples
+        self._samples = collections.Counter()
+        return samples
+
+    @property
+    def idle_samples(self) -> int:
+        return self._idle_samples
+
+    def _run(self, duration: float) -> None:
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration
+        while not self._stop_evt.wait(self._interval):
+            self._sample(own_id)
+            if time.monotonic() >= deadline:
+                break
+
+    def _sample(self, own_id: int) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            if frame.f_code.co_qualname in self._idle:
+                self._idle_samples += 1
+                continue
+            stack = []
+            f: Optional[types.FrameType] = frame
+            while f is not None:
+                stack.append(self._get_label(f.f_code))
+                f = f.f_back
+            stack.reverse()
+            self._samples[tuple(stack)] += 1
+
+    def _get_label(self, code: types.CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(EDB_DIR + os.sep):
+                filename = os.path.relpath(filename, ROOT_DIR)
+            else:
+                filename = os.path.basename(filename)
+            label = self._labels[code] = (
+                f'{code.co_qualname} ({filename}:{code.co_firstlineno})'
+            )
+        return label
+
+
+def merge_samples(samples: Mapping[str, Samples]) -> Samples:
+    """Merge samples of several processes under a root frame for each."""
+    merged: Samples = collections.Counter()
+    for root, process_samples in samples.items():
+        for stack, count in process_samples.items():
+            merged[(root,) + stack] += count
+    return merged
+
+
+def format_collapsed(samples: Samples) -> str:
+    """Render samples in the collapsed stack format of flamegraph.pl."""
+    return ''.join(
+        f'{";".join(stack)} {count}\n'
+        for stack, count in sorted(samples.items())
+    )
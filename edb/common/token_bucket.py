@@ -31,16 +31,30 @@ class TokenBucket:
         self._tokens = capacity
         self._last_fill_time = time.monotonic()
 
-    def consume(self, tokens: int) -> float:
-        if tokens <= 0:
-            return True
+    def _fill(self) -> None:
         now = time.monotonic()
         tokens_to_add = (now - self._last_fill_time) * self._token_per_sec
         self._tokens = min(self._capacity, self._tokens + tokens_to_add)
         self._last_fill_time = now
+
+    def get_delay(self, tokens: int) -> float:
+        # How long to wait before the tokens can be consumed, without
+        # consuming them.
+        self._fill()
         left = self._tokens - tokens
         if left >= 0:
-            self._tokens -= tokens
             return 0
         else:
             return -left / (tokens * self._token_per_sec)
+
+    def consume(self, tokens: int) -> float:
+        if tokens <= 0:
+            return True
+        delay = self.get_delay(tokens)
+        if not delay:
+            self._tokens -= tokens
+        return delay
+
+    def is_full(self) -> bool:
+        self._fill()
+        return self._tokens >= self._capacity
@@ -141,6 +141,89 @@ class PointerRefCache(dict[irtyputils.PtrRefCacheKey, irast.BasePointerRef]):
         return self._rcache.get(ref)
 
 
+class TypeRefCache(dict[irtyputils.TypeRefCacheKey, irast.TypeRef]):
+    """The TypeRef cache of a compilation.
+
+    TypeRefs of the types of the original schema don't depend on the
+    compilation, so if a *shared* cache is given, they are also stored
+    in and looked up from it, and compilations against the same schema
+    reuse them.  TypeRefs of anything derived during the compilation,
+    such as views, stay local.
+    """
+
+    def __init__(
+        self,
+        schema: s_schema.Schema,
+        *,
+        shared: Optional[irtyputils.TypeRefCache] = None,
+    ) -> None:
+        super().__init__()
+        self._schema = schema
+        self._shared = shared
+
+    def get(  # type: ignore[override]
+        self,
+        key: irtyputils.TypeRefCacheKey,
+        default: Optional[irast.TypeRef] = None,
+    ) -> Optional[irast.TypeRef]:
+        result = super().get(key)
+        if result is None and self._shared is not None:
+            result = self._shared.get(key)
+        return default if result is None else result
+
+    def __setitem__(
+        self,
+        key: irtyputils.TypeRefCacheKey,
+        val: irast.TypeRef,
+    ) -> None:
+        super().__setitem__(key, val)
+        if self._shared is not None and self._schema.has_object(key[0]):
+            self._shared[key] = val
+
+
+# Shared TypeRef caches, keyed by the schema they are valid for.  The
+# schema is immutable, so its identity identifies its generation.  A
+# ChainedSchema is short-lived and not weak-referenceable, so its
+# caches are keyed by its top schema, and remember the base and global
+# schemas they were made with.
+_shared_type_ref_caches: weakref.WeakKeyDictionary[
+    s_schema.Schema,
+    tuple[
+        tuple[weakref.ref[s_schema.Schema], ...],
+        irtyputils.TypeRefCache,
+    ],
+] = weakref.WeakKeyDictionary()
+
+
+def get_shared_type_ref_cache(
+    schema: s_schema.Schema,
+) -> irtyputils.TypeRefCache:
+    """Return the TypeRef cache shared by compilations against *schema*."""
+    others: tuple[s_schema.Schema, ...]
+    if isinstance(schema, s_schema.ChainedSchema):
+        key = schema.get_top_schema()
+        others = (schema.get_base_schema(), schema.get_global_schema())
+    else:
+        key = schema
+        others = ()
+
+    entry = _shared_type_ref_caches.get(key)
+    if entry is not None:
+        refs, cache = entry
+        if (
+            len(refs) == len(others)
+            and all(ref() is other for ref, other in zip(refs, others))
+        ):
+            return cache
+
+    cache = {}
+    _shared_type_ref_caches[key] = (
+        tuple(weakref.ref(other) for other in others),
+        cache,
+    )
+    return cache
+
+
 # Volatility inference computes two volatility results:
 # A basic one, and one for consumption by materialization
 InferredVolatility = (
@@ -264,7 +347,7 @@ class Environment:
 
     # Caches for costly operations in edb.ir.typeutils
     ptr_ref_cache: PointerRefCache
-    type_ref_cache: dict[irtyputils.TypeRefCacheKey, irast.TypeRef]
+    type_ref_cache: TypeRefCache
 
     dml_exprs: list[qlast.Base]
     """A list of DML expressions (statements and DML-containing
@@ -373,7 +456,13 @@ class Environment:
         self.schema_refs = set()
         self.schema_ref_exprs = {} if options.track_schema_ref_exprs else None
         self.ptr_ref_cache = PointerRefCache()
-        self.type_ref_cache = {}
+        self.type_ref_cache = TypeRefCache(
+            schema,
+            shared=(
+                get_shared_type_ref_cache(schema)
+                if options.share_type_refs else None
+            ),
+        )
         self.dml_exprs = []
         self.dml_stmts = []
         self.pointer_derivation_map = collections.defaultdict(list)
@@ -102,6 +102,12 @@ class GlobalCompilerOptions:
     # This this restoring a dump?
     dump_restore_mode: bool = False
 
+    #: Whether to share the TypeRefs of the types of the schema with
+    #: other compilations against the same schema.  Only safe when the
+    #: compilation does not modify the types of the schema, i.e. for
+    #: queries, but not for DDL.
+    share_type_refs: bool = False
+
 
 @dataclass(kw_only=True)
 class CompilerOptions(GlobalCompilerOptions):
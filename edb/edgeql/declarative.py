@@ -32,19 +32,24 @@ from __future__ import annotations
 from typing import (
     Optional,
     AbstractSet,
+    Hashable,
     Iterable,
+    Iterator,
     Mapping,
     MutableSet,
+    NamedTuple,
     TypedDict,
     cast,
 )
 
 import copy
 import functools
+import uuid
 from collections import defaultdict
 
 from edb import errors
 
+from edb.common import ast
 from edb.common import parsing
 from edb.common import topological
 from edb.common import english
@@ -58,6 +63,7 @@ from edb.edgeql import utils as qlutils
 
 from edb.schema import annos as s_anno
 from edb.schema import constraints as s_constr
+from edb.schema import extensions as s_ext
 from edb.schema import indexes as s_indexes
 from edb.schema import links as s_links
 from edb.schema import name as s_name
@@ -306,6 +312,8 @@ DDLGraph = dict[
 
 class DepTraceContext(TraceContextBase):
 
+    trace_run: Optional[_DependencyTraceRun]
+
     def __init__(
         self,
         schema: s_schema.Schema,
@@ -326,6 +334,33 @@ class DepTraceContext(TraceContextBase):
         self.ancestors = ancestors
         self.defdeps = defdeps
         self.constraints = constraints
+        self.trace_run = None
+        self._pointer_members: Optional[
+            dict[str, list[s_name.QualName]]] = None
+
+    def get_pointer_members(
+        self,
+        pointer: s_name.QualName,
+    ) -> Iterable[s_name.QualName]:
+        """Return the names of all objects defined on *pointer*.
+
+        E.g. link properties and constraints of a link.
+        """
+        if self._pointer_members is None:
+            # Index all the objects by the names of their containers,
+            # instead of searching through all of them for every pointer.
+            members = defaultdict(list)
+            for name, obj in self.objects.items():
+                if isinstance(obj, qltracer.Field):
+                    continue
+                strname = str(name)
+                pos = strname.find('@')
+                while pos != -1:
+                    members[strname[:pos]].append(name)
+                    pos = strname.find('@', pos + 1)
+            self._pointer_members = members
+
+        return self._pointer_members.get(str(pointer), ())
 
 
 class Dependency:
@@ -361,9 +396,287 @@ class FunctionDependency(ExprDependency):
         self.params = params
 
 
+TracedRefs = tuple[frozenset[s_name.QualName], frozenset[s_name.QualName]]
+
+
+class _DeclarationTrace(NamedTuple):
+
+    # Results of the expression traces made while tracing the
+    # dependencies of a declaration, in order.
+    refs: tuple[TracedRefs, ...]
+    # Layout digests of the objects that the traces refer to.
+    digests: Mapping[s_name.QualName, Hashable]
+    # The objects named like the identifiers used in the expressions.
+    mentions: Mapping[str, frozenset[s_name.QualName]]
+
+
+class SDLTraceCache:
+    """Expression traces of SDL declarations, reused by sdl_to_ddl().
+
+    Tracing the expressions in the declarations is the expensive part of
+    sdl_to_ddl(), while tools that apply the whole SDL on every change
+    (e.g. watch mode or the language server) mostly get the same
+    declarations every time.  The traces are cached per top-level
+    declaration, keyed by its source text, and are reused as long as
+    the objects they refer to, and the objects that could be referred
+    to by the names used in the expressions, are declared the same way.
+
+    The declarations are still walked every time to build the dependency
+    graph, so that the resulting DDL has the up-to-date source spans.
+    Only the traces of the last sdl_to_ddl() call are kept.
+    """
+
+    _schema_key: Optional[
+        tuple[s_schema.Schema, frozenset[uuid.UUID], AbstractSet[str]]]
+    _traces: dict[tuple[str, str], _DeclarationTrace]
+    _function_bodies: dict[str, qlast.Expr]
+
+    def __init__(self) -> None:
+        self._schema_key = None
+        self._traces = {}
+        self._function_bodies = {}
+
+    def _start_run(self, ctx: LayoutTraceContext) -> _DependencyTraceRun:
+        schema = ctx.schema
+        if isinstance(schema, s_schema.ChainedSchema):
+            base_schema = schema.get_base_schema()
+        else:
+            base_schema = schema
+        ext_packages = frozenset(
+            ext.get_package(schema).id
+            for ext in schema.get_objects(type=s_ext.Extension)
+        )
+
+        # Names outside of the SDL are resolved in the schema.
+        key = self._schema_key
+        if (
+            key is None
+            or key[0] is not base_schema
+            or key[1] != ext_packages
+            or key[2] != ctx.local_modules
+        ):
+            self._schema_key = (base_schema, ext_packages, ctx.local_modules)
+            self._traces = {}
+            self._function_bodies = {}
+
+        return _DependencyTraceRun(self, ctx)
+
+
+class _DependencyTraceRun:
+
+    def __init__(self, cache: SDLTraceCache, ctx: LayoutTraceContext) -> None:
+        self._cache = cache
+        self._ctx = ctx
+        self._sources: dict[s_name.QualName, list[Hashable]] = (
+            defaultdict(list))
+        self._traces: dict[tuple[str, str], _DeclarationTrace] = {}
+        self._function_bodies: dict[str, qlast.Expr] = {}
+        self._digests: dict[s_name.QualName, Hashable] = {}
+        self._checked_digests: dict[
+            s_name.QualName, tuple[Hashable, bool]] = {}
+        self._mentions: Optional[
+            dict[str, frozenset[s_name.QualName]]] = None
+        self._checked_mentions: dict[
+            str, tuple[frozenset[s_name.QualName], bool]] = {}
+        self._replay: Optional[Iterator[TracedRefs]] = None
+        self._out_of_sync = False
+        self._log: Optional[list[tuple[
+            TracedRefs, AbstractSet[s_name.QualName], AbstractSet[str]]]] = (
+                None)
+
+    def add_declaration(
+        self,
+        fq_name: s_name.QualName,
+        decl: qlast.DDLOperation,
+    ) -> None:
+        source = _get_source_text(decl)
+        # Declarations without source text are never considered unchanged.
+        self._sources[_get_owner_name(fq_name)].append(
+            source if source is not None else object())
+
+    def trace_declaration(
+        self,
+        decl: qlast.DDLCommand,
+        *,
+        ctx: DepTraceContext,
+    ) -> None:
+        source = _get_source_text(decl)
+        key = (ctx.module, source) if source is not None else None
+        trace = self._cache._traces.get(key) if key is not None else None
+
+        names: Iterable[s_name.QualName]
+        idents: Iterable[str]
+        if trace is not None and self._is_valid(trace):
+            replay = self._replay = iter(trace.refs)
+            self._out_of_sync = False
+            try:
+                trace_dependencies(decl, ctx=ctx)
+            finally:
+                self._replay = None
+            if self._out_of_sync or next(replay, None) is not None:
+                # The declaration was not traced the same way as when
+                # the trace was cached, so the trace is dropped and the
+                # declaration is traced from scratch next time.
+                return
+            refs = trace.refs
+            names = trace.digests
+            idents = trace.mentions
+        else:
+            log: list[tuple[
+                TracedRefs, AbstractSet[s_name.QualName], AbstractSet[str]]]
+            log = self._log = []
+            try:
+                trace_dependencies(decl, ctx=ctx)
+            finally:
+                self._log = None
+            refs = tuple(entry[0] for entry in log)
+            names = set().union(*(entry[1] for entry in log))
+            idents = set().union(*(entry[2] for entry in log))
+
+        if key is not None:
+            self._traces[key] = _DeclarationTrace(
+                refs=refs,
+                digests={name: self._get_digest(name) for name in names},
+                mentions={
+                    ident: self._get_mentions(ident) for ident in idents},
+            )
+
+    def replay_refs(self) -> Optional[TracedRefs]:
+        if self._replay is None:
+            return None
+        refs = next(self._replay, None)
+        if refs is None:
+            # Trace the remaining expressions, see trace_declaration().
+            self._replay = None
+            self._out_of_sync = True
+        return refs
+
+    def record_refs(
+        self,
+        refs: TracedRefs,
+        expr: qlast.Base,
+        *,
+        path_prefix: Optional[s_name.QualName],
+        anchors: Optional[Mapping[str, s_name.QualName]],
+        params: Mapping[str, qlast.TypeExpr],
+    ) -> None:
+        if self._log is None:
+            return
+        names = set(refs[0] | refs[1])
+        if path_prefix is not None:
+            names.add(path_prefix)
+        if anchors:
+            names.update(anchors.values())
+        self._log.append(
+            (refs, names, _get_identifiers([expr, *params.values()])))
+
+    def parse_function_body(self, code: str) -> qlast.Expr:
+        # The cached ASTs are never handed out, only copies of them, so
+        # that they stay the same whatever the callers do with them.
+        fcode = self._function_bodies.get(code)
+        if fcode is None:
+            fcode = self._cache._function_bodies.get(code)
+            if fcode is None:
+                parsed = qlparser.parse_query(code)
+                assert isinstance(parsed, qlast.Expr)
+                fcode = parsed
+            self._function_bodies[code] = fcode
+        return copy.deepcopy(fcode)
+
+    def finish(self) -> None:
+        self._cache._traces = self._traces
+        self._cache._function_bodies = self._function_bodies
+
+    def _is_valid(self, trace: _DeclarationTrace) -> bool:
+        return all(
+            self._check_digest(name, digest)
+            for name, digest in trace.digests.items()
+        ) and all(
+            self._check_mentions(ident, names)
+            for ident, names in trace.mentions.items()
+        )
+
+    def _get_digest(self, name: s_name.QualName) -> Hashable:
+        # The layout of an object is determined by its own declaration
+        # and by the declarations of its ancestors.
+        digest = self._digests.get(name)
+        if digest is None:
+            ancestors = self._ctx.ancestors.get(name, ())
+            digest = self._digests[name] = (
+                tuple(self._sources.get(_get_owner_name(name), ())),
+                tuple(
+                    tuple(self._sources.get(_get_owner_name(anc), ()))
+                    for anc in sorted(ancestors)
+                ),
+            )
+        return digest
+
+    def _check_digest(self, name: s_name.QualName, digest: Hashable) -> bool:
+        # All the traces kept from the previous run share their digest
+        # objects, so every digest only needs to be compared once.
+        checked = self._checked_digests.get(name)
+        if checked is None or checked[0] is not digest:
+            checked = (digest, digest == self._get_digest(name))
+            self._checked_digests[name] = checked
+        return checked[1]
+
+    def _get_mentions(self, ident: str) -> frozenset[s_name.QualName]:
+        if self._mentions is None:
+            mentions: dict[str, set[s_name.QualName]] = defaultdict(set)
+            for name in self._ctx.objects:
+                for part in name.name.split('@@', 1)[0].split('@'):
+                    mentions[part.rsplit('::', 1)[-1]].add(name)
+            self._mentions = {
+                part: frozenset(names) for part, names in mentions.items()
+            }
+        return self._mentions.get(ident, frozenset())
+
+    def _check_mentions(
+        self,
+        ident: str,
+        names: frozenset[s_name.QualName],
+    ) -> bool:
+        checked = self._checked_mentions.get(ident)
+        if checked is None or checked[0] is not names:
+            checked = (names, names == self._get_mentions(ident))
+            self._checked_mentions[ident] = checked
+        return checked[1]
+
+
+def _get_source_text(decl: qlast.DDLOperation) -> Optional[str]:
+    span = decl.span
+    if span is None or not span.buffer:
+        return None
+    return span.buffer[span.start:span.end]
+
+
+def _get_owner_name(name: s_name.QualName) -> s_name.QualName:
+    # The name of the top-level object that contains the named one.
+    return s_name.QualName(name.module, name.name.split('@', 1)[0])
+
+
+def _get_identifiers(nodes: list[qlast.Base]) -> set[str]:
+    # All the names that an expression might resolve.
+    idents = set()
+    for node in ast.find_children(
+        nodes,
+        qlast.Base,
+        lambda n: isinstance(
+            n, (qlast.ObjectRef, qlast.Ptr, qlast.FunctionCall)),
+    ):
+        if isinstance(node, qlast.FunctionCall):
+            idents.add(
+                node.func if isinstance(node.func, str) else node.func[1])
+        elif isinstance(node, (qlast.ObjectRef, qlast.Ptr)):
+            idents.add(node.name)
+    return idents
+
+
 def sdl_to_ddl(
     schema: s_schema.Schema,
     documents: Mapping[str, list[qlast.DDLCommand]],
+    *,
+    trace_cache: Optional[SDLTraceCache] = None,
 ) -> tuple[qlast.DDLCommand, ...]:
 
     ddlgraph: DDLGraph = {}
@@ -371,6 +684,10 @@ def sdl_to_ddl(
 
     ctx = LayoutTraceContext(schema, frozenset(mod for mod in documents))
 
+    trace_run: Optional[_DependencyTraceRun] = None
+    if trace_cache is not None:
+        trace_run = trace_cache._start_run(ctx)
+
     ctx.objects[s_name.QualName('std', 'anytype')] = (
         schema.get_global(s_pseudo.PseudoType, 'anytype'))
     ctx.objects[s_name.QualName('std', 'anytuple')] = (
@@ -412,6 +729,9 @@ def sdl_to_ddl(
                     raise AssertionError(
                         f'unexpected SDL declaration: {decl_ast}')
 
+                if trace_run is not None:
+                    trace_run.add_declaration(fq_name, decl_ast)
+
     for module_name, declarations in documents.items():
         ctx.set_module(module_name)
         for decl_ast in declarations:
@@ -432,6 +752,7 @@ def sdl_to_ddl(
         schema, ddlgraph, ctx.objects, ctx.pointers, ctx.parents, ctx.ancestors,
         ctx.defdeps, ctx.constraints, ctx.local_modules,
     )
+    tracectx.trace_run = trace_run
 
     created_modules = set()
     for module_name, declarations in documents.items():
@@ -445,7 +766,13 @@ def sdl_to_ddl(
                 created_modules.add(n)
                 mods.append(qlast.CreateModule(name=qlast.ObjectRef(name=n)))
         for decl_ast in declarations:
-            trace_dependencies(decl_ast, ctx=tracectx)
+            if trace_run is not None:
+                trace_run.trace_declaration(decl_ast, ctx=tracectx)
+            else:
+                trace_dependencies(decl_ast, ctx=tracectx)
+
+    if trace_run is not None:
+        trace_run.finish()
 
     for ddlentry in ddlgraph.values():
         # Filter out deps that are in the schema but not in ctx.objects.
@@ -834,15 +1161,7 @@ def trace_SetField(
         assert isinstance(node.value, qlast.Expr)
         exprs.append(ExprDependency(expr=node.value))
     else:
-        for dep in qltracer.trace_refs(
-            node.value,
-            schema=ctx.schema,
-            module=ctx.module,
-            objects=ctx.objects,
-            pointers=ctx.pointers,
-            local_modules=ctx.local_modules,
-            params={},
-        )[0]:
+        for dep in _trace_refs(node.value, params={}, ctx=ctx)[0]:
             # ignore std module dependencies
             if dep.get_module_name() not in s_schema.STD_MODULES:
                 deps.add(dep)
@@ -1097,8 +1416,7 @@ def trace_Function(
         and node.code.code
     ):
         # Need to parse the actual code string and use that as the dependency.
-        fcode = qlparser.parse_query(node.code.code)
-        assert isinstance(fcode, qlast.Expr)
+        fcode = _parse_function_body(node.code.code, ctx=ctx)
         deps.append(FunctionDependency(expr=fcode, params=params))
 
     # XXX: hard_dep_expr is used because it ultimately calls the
@@ -1117,6 +1435,52 @@ def trace_default(
     _register_item(node, ctx=ctx)
 
 
+def _trace_refs(
+    expr: qlast.Base,
+    *,
+    path_prefix: Optional[s_name.QualName] = None,
+    anchors: Optional[Mapping[str, s_name.QualName]] = None,
+    params: Mapping[str, qlast.TypeExpr],
+    ctx: DepTraceContext,
+) -> TracedRefs:
+    if ctx.trace_run is not None:
+        refs = ctx.trace_run.replay_refs()
+        if refs is not None:
+            return refs
+
+    refs = qltracer.trace_refs(
+        expr,
+        schema=ctx.schema,
+        module=ctx.module,
+        path_prefix=path_prefix,
+        anchors=anchors,
+        objects=ctx.objects,
+        pointers=ctx.pointers,
+        local_modules=ctx.local_modules,
+        params=params,
+    )
+
+    if ctx.trace_run is not None:
+        ctx.trace_run.record_refs(
+            refs,
+            expr,
+            path_prefix=path_prefix,
+            anchors=anchors,
+            params=params,
+        )
+
+    return refs
+
+
+def _parse_function_body(code: str, *, ctx: DepTraceContext) -> qlast.Expr:
+    if ctx.trace_run is not None:
+        return ctx.trace_run.parse_function_body(code)
+
+    fcode = qlparser.parse_query(code)
+    assert isinstance(fcode, qlast.Expr)
+    return fcode
+
+
 def _clear_nonessential_subcommands(node: qlast.DDLOperation) -> None:
     node.commands = [
         cmd for cmd in node.commands
@@ -1278,16 +1642,12 @@ def _register_item(
                 else:
                     params = {}
 
-                strong_tdeps, weak_tdeps = qltracer.trace_refs(
+                strong_tdeps, weak_tdeps = _trace_refs(
                     qlexpr,
-                    schema=ctx.schema,
-                    module=ctx.module,
                     path_prefix=source,
                     anchors=anchors,
-                    objects=ctx.objects,
-                    pointers=ctx.pointers,
-                    local_modules=ctx.local_modules,
                     params=params,
+                    ctx=ctx,
                 )
 
                 for tdeps, strong in (
@@ -1363,7 +1723,7 @@ def _get_pointer_deps(
     *,
     ctx: DepTraceContext,
 ) -> MutableSet[s_name.QualName]:
-    result: MutableSet[s_name.QualName] = set()
+    result: set[s_name.QualName] = set()
     owner_name, ptr_name = pointer.name.split('@', 1)
     # For every ancestor of the type, where
     # the pointer is defined, see if there are
@@ -1393,13 +1753,7 @@ def _get_pointer_deps(
     # This will *also* grab any constraints on the pointer, which
     # is is important for properly doing cardinality inference
     # on expressions involving it.
-    # PERF: We should avoid actually searching all the objects.
-    for propname, prop in ctx.objects.items():
-        if (
-            str(propname).startswith(str(pointer) + '@')
-            and not isinstance(prop, qltracer.Field)
-        ):
-            result.add(propname)
+    result.update(ctx.get_pointer_members(pointer))
 
     return result
 
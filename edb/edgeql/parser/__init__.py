@@ -194,55 +194,65 @@ def _cst_to_ast(
     stack: list[rust_parser.CSTNode | rust_parser.Production] = [cst]
     result: list[Any] = []
 
-    while len(stack) > 0:
+    # Hoisted out of the loop, this runs once per CST node.
+    buffer = source.text()
+    Span = parsing.Span
+    CSTToken = parsing.CSTToken
+    CSTNode = rust_parser.CSTNode
+    QLBase = qlast.Base
+
+    while stack:
         node = stack.pop()
 
-        if isinstance(node, rust_parser.CSTNode):
+        if isinstance(node, CSTNode):
             # this would be the body of the original recursion function
 
             if terminal := node.terminal:
-                # Terminal is simple: just convert to parsing.Token
-                span = parsing.Span(
+                # Terminal is simple: just convert to a token, its span
+                # is only built if a production asks for it.
+                result.append(CSTToken(
+                    terminal.text,
+                    terminal.value,
                     filename=filename,
-                    buffer=source.text(),
+                    buffer=buffer,
                     start=terminal.start,
                     end=terminal.end,
-                )
-                result.append(
-                    parsing.Token(terminal.text, terminal.value, span)
-                )
+                ))
 
             elif production := node.production:
                 # Production needs to first process all args, then
                 # call the appropriate method.
                 # (this is all in reverse, because stacks)
                 stack.append(production)
-                args = list(production.args)
-                args.reverse()
-                stack.extend(args)
+                stack.extend(reversed(production.args))
             else:
                 raise NotImplementedError(node)
 
-        elif isinstance(node, rust_parser.Production):
+        else:
             # production args are done, get them out of result stack
             len_args = len(node.args)
-            split_at = len(result) - len_args
-            args = result[split_at:]
-            result = result[0:split_at]
+            if len_args:
+                split_at = len(result) - len_args
+                args = result[split_at:]
+                del result[split_at:]
+            else:
+                args = []
 
-            # find correct method to call
-            production_id = node.id
-            non_term_type, method = productions[production_id]
+            # productions is a table indexed by production id, built
+            # once when the spec is loaded
+            non_term_type, method = productions[node.id]
             sym = non_term_type()
 
             # init the span onto the Nonterm object, so it can be accessed by
             # production methods to construct nodes
-            if node.start is not None and node.end is not None:
-                sym.span = parsing.Span(
+            start = node.start
+            end = node.end
+            if start is not None and end is not None:
+                sym.span = Span(
                     filename=filename,
-                    buffer=source.text(),
-                    start=node.start,
-                    end=node.end,
+                    buffer=buffer,
+                    start=start,
+                    end=end,
                 )
             else:
                 sym.span = None
@@ -251,7 +261,7 @@ def _cst_to_ast(
 
             # a helper to set the span of each constructed node, so we don't
             # have to manually set the span things assigned to nonterm.val
-            if sym.span and isinstance(sym.val, qlast.Base):
+            if sym.span and isinstance(sym.val, QLBase):
                 sym.val.span = sym.span
 
             # push into result stack
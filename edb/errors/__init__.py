@@ -95,6 +95,7 @@ __all__ = base.__all__ + (  # type: ignore
     'ServerOfflineError',
     'UnknownTenantError',
     'ServerBlockedError',
+    'RateLimitExceededError',
     'BackendError',
     'UnsupportedBackendFeatureError',
     'LogMessage',
@@ -448,6 +449,10 @@ class ServerBlockedError(AvailabilityError):
     _code = 0x_08_00_00_04
 
 
+class RateLimitExceededError(AvailabilityError):
+    _code = 0x_08_00_00_05
+
+
 class BackendError(EdgeDBError):
     _code = 0x_09_00_00_00
 
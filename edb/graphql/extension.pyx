@@ -80,6 +80,25 @@ CacheEntry = Union[
 ]
 
 
+def _redirected_key(cache_key, key_vars):
+    # Same as cache_key, but with the values of the variables the
+    # compiled query depends on in place of the empty tuple.
+    return cache_key[:2] + (key_vars,) + cache_key[3:]
+
+
+def _lookup_cache(query_cache, cache_key, vars) -> CacheEntry:
+    entry = query_cache.get(cache_key, None)
+
+    if isinstance(entry, CacheRedirect):
+        if debug.flags.graphql_compile:
+            print("REDIRECT", entry.key_vars)
+
+        key_vars2 = tuple(vars[k] for k in entry.key_vars)
+        entry = query_cache.get(_redirected_key(cache_key, key_vars2), None)
+
+    return entry
+
+
 async def handle_request(
     object request,
     object response,
@@ -244,7 +263,9 @@ async def handle_request(
 
         response.body = json.dumps({'errors': [err_dct]}).encode()
     else:
-        response.body = b'{"data":' + result + b'}'
+        # Hand the result over as separate chunks to avoid copying
+        # potentially large JSON payloads.
+        response.body_chunks = (b'{"data":', result, b'}')
 
 
 async def compile(
@@ -352,21 +373,18 @@ async def _execute(
 
     entry: CacheEntry = None
     if query_cache_enabled:
-        entry = query_cache.get(cache_key, None)
-
-    if isinstance(entry, CacheRedirect):
-        if debug.flags.graphql_compile:
-            print("REDIRECT", entry.key_vars)
+        entry = _lookup_cache(query_cache, cache_key, vars)
 
-        key_vars2 = tuple(vars[k] for k in entry.key_vars)
-        cache_key2 = (
-            prepared_query, key_vars2, operation_name, dbver, config_key
-        )
-        entry = query_cache.get(cache_key2, None)
+    async def compile_entry():
+        if query_cache_enabled:
+            # A concurrent compilation of a query that depends on the
+            # values of variables might have cached ours.
+            cached = _lookup_cache(query_cache, cache_key, vars)
+            if cached is not None:
+                return cached, False
 
-    if entry is None:
         if rewritten is not None:
-            qug, gql_op = await compile(
+            compiled = await compile(
                 dbv,
                 tenant,
                 query,
@@ -376,7 +394,7 @@ async def _execute(
                 vars,
             )
         else:
-            qug, gql_op = await compile(
+            compiled = await compile(
                 dbv,
                 tenant,
                 query,
@@ -386,23 +404,41 @@ async def _execute(
                 vars,
             )
 
+        qug, gql_op = compiled
         if gql_op.cache_deps_vars and gql_op.cache_deps_vars:
             key_var_set = set(gql_op.cache_deps_vars)
             key_var_names = sorted(key_var_set)
             redir = CacheRedirect(key_vars=key_var_names)
             query_cache[cache_key] = redir
             key_vars2 = tuple(vars[k] for k in key_var_names)
-            cache_key2 = (
-                'graphql', prepared_query, key_vars2, operation_name, dbver
-            )
+            cache_key2 = _redirected_key(cache_key, key_vars2)
             query_cache[cache_key2] = qug, gql_op
         else:
             query_cache[cache_key] = qug, gql_op
+        return compiled, True
+
+    compiled_now = False
+    if entry is None:
+        # Only one of the concurrent requests for the same query compiles
+        # it, the others share the result, unless it depends on the values
+        # of the variables.
+        (entry, compiled_now), shared = await db.compile_flights.run(
+            cache_key,
+            compile_entry,
+            shareable=lambda res: not res[0][1].cache_deps_vars,
+        )
+        if shared:
+            compiled_now = False
+            metrics.query_compilations_coalesced.inc(
+                1.0, tenant.get_instance_name(), 'graphql'
+            )
+
+    qug, gql_op = entry
+    if compiled_now:
         metrics.graphql_query_compilations.inc(
             1.0, tenant.get_instance_name(), 'compiler'
         )
     else:
-        qug, gql_op = entry
         # This is at least the second time this query is used
         # and it's safe to cache.
         use_prep_stmt = True
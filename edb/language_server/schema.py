@@ -227,7 +227,9 @@ def _compile_schema(
     ls.show_message_log("compiling schema ..")
     try:
         schema, _warnings = s_ddl.apply_sdl(
-            ls.state.schema_sdl, base_schema=std_schema
+            ls.state.schema_sdl,
+            base_schema=std_schema,
+            trace_cache=ls.state.sdl_trace_cache,
         )
         ls.state.schema = schema
         ls.show_message_log(".. done")
@@ -28,6 +28,7 @@ from edb.common import traceback as edb_traceback
 
 from edb.edgeql import ast as qlast
 from edb.edgeql import compiler as qlcompiler
+from edb.edgeql import declarative as s_decl
 
 from edb.ir import ast as irast
 
@@ -56,6 +57,10 @@ class State:
 
     std_schema: s_schema.Schema | None = None
 
+    sdl_trace_cache: s_decl.SDLTraceCache = dataclasses.field(
+        default_factory=s_decl.SDLTraceCache
+    )
+
 
 @dataclasses.dataclass(kw_only=True)
 class Config:
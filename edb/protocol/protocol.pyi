@@ -44,5 +44,17 @@ class Connection:
     async def send(self, *msgs: messages.ClientMessage) -> None:
         ...
 
+    def pause_reading(self) -> None:
+        ...
+
+    def resume_reading(self) -> None:
+        ...
+
     async def aclose(self) -> None:
         ...
+
+async def new_connection(
+    dsn: str | None = None,
+    **kwargs: Any,
+) -> Connection:
+    ...
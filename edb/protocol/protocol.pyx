@@ -135,6 +135,12 @@ cdef class Connection:
             buf.write_bytes(out)
             self._protocol.write(buf)
 
+    def pause_reading(self):
+        self._transport.pause_reading()
+
+    def resume_reading(self):
+        self._transport.resume_reading()
+
     async def aclose(self):
         # TODO: Fix when edgedb-python implements proper cancellation
         asyncio.get_running_loop().call_soon(lambda: self._protocol.abort())
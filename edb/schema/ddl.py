@@ -81,6 +81,7 @@ def delta_schemas(
     descriptive_mode: bool=False,
     generate_prompts: bool=False,
     guidance: Optional[so.DeltaGuidance]=None,
+    max_rename_candidates: Optional[int]=None,
 ) -> sd.DeltaRoot:
     """Return difference between *schema_a* and *schema_b*.
 
@@ -143,6 +144,11 @@ def delta_schemas(
         guidance:
             Optional explicit guidance to schema diff.
 
+        max_rename_candidates:
+            Optional limit on the number of pairs of objects compared
+            to detect renames.  Above it, objects are not considered
+            for renaming and are dropped and recreated instead.
+
     Returns:
         A :class:`schema.delta.DeltaRoot` instances representing
         the delta between *schema_a* and *schema_b*.
@@ -157,6 +163,8 @@ def delta_schemas(
         descriptive_mode=descriptive_mode,
         guidance=guidance,
     )
+    if max_rename_candidates is not None:
+        context.max_rename_candidates = max_rename_candidates
 
     if schema_a is None:
         if include_std_diff:
@@ -467,6 +475,7 @@ def apply_sdl(
     base_schema: s_schema.Schema,
     stdmode: bool = False,
     testmode: bool = False,
+    trace_cache: Optional[s_decl.SDLTraceCache] = None,
 ) -> tuple[s_schema.Schema, list[errors.EdgeDBError]]:
     # group declarations by module
     documents: dict[str, list[qlast.DDLCommand]] = defaultdict(list)
@@ -582,7 +591,8 @@ def apply_sdl(
         process_ext(ddl_stmt)
 
     # Now, sort the main body of SDL and apply it.
-    ddl_stmts = s_decl.sdl_to_ddl(target_schema, documents)
+    ddl_stmts = s_decl.sdl_to_ddl(
+        target_schema, documents, trace_cache=trace_cache)
 
     if debug.flags.sdl_loading:
         debug.header('SDL loading script')
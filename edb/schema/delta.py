@@ -29,6 +29,7 @@ from typing import (
     Iterable,
     Iterator,
     Mapping,
+    NamedTuple,
     NoReturn,
     Optional,
     overload,
@@ -42,7 +43,9 @@ import collections.abc
 import contextlib
 import functools
 import itertools
+import logging
 import uuid
+import weakref
 
 from edb import errors
 
@@ -67,6 +70,21 @@ from . import schema as s_schema
 from . import utils
 
 
+log = logging.getLogger(__name__)
+
+# Pairs of objects with different names are considered a rename only if
+# they are more similar than this.
+_RENAME_THRESHOLD = 0.6
+
+# Up to this many pairs, every new object is compared to every old one
+# when detecting renames.
+_RENAME_BLOCKING_THRESHOLD = 1000
+
+
+class _BlockByType:
+    """Marks the values that are blocked by their type only."""
+
+
 def delta_objects(
     old_in: Iterable[so.Object_T],
     new_in: Iterable[so.Object_T],
@@ -80,12 +98,6 @@ def delta_objects(
 
     delta = DeltaRoot()
 
-    # TODO: Previously, we attempted to do an optimization based on
-    # computing a hash_criteria of each object, in order to discard
-    # unchanged objects. Because hash_criteria returns values that
-    # include schema objects, the optimization didn't work; it wasn't
-    # cheap, so I removed it. But the general idea is sound and should
-    # be revisited.
     old = {o.get_name(old_schema): o for o in old_in}
     new = {o.get_name(new_schema): o for o in new_in}
 
@@ -103,13 +115,6 @@ def delta_objects(
     pairs = [
         (new[k], o) for k, o in old.items() if k in new
     ]
-    # Then collect the cross product of all the other objects.
-    pairs.extend(
-        itertools.product(
-            [o for k, o in new.items() if k not in old],
-            [o for k, o in old.items() if k not in new],
-        )
-    )
 
     full_matrix: list[tuple[so.Object_T, so.Object_T, float]] = []
 
@@ -152,10 +157,61 @@ def delta_objects(
         def can_delete(obj: so.Object_T, name: sn.Name) -> bool:
             return True
 
+    # Then collect the candidate rename pairs among all the other objects.
+    # Objects that must be altered (because of the renames that are
+    # already decided on, or because the guidance bans creating or
+    # deleting them) are compared to everything on the other side.
+    new_only = [o for k, o in new.items() if k not in old]
+    old_only = [o for k, o in old.items() if k not in new]
+    pairs.extend(
+        _get_rename_candidates(
+            new_only,
+            old_only,
+            forced_x={
+                x for x in new_only
+                if (
+                    x.get_name(new_schema) in renames_x
+                    or not can_create(x, x.get_name(new_schema))
+                )
+            },
+            forced_y={
+                y for y in old_only
+                if (
+                    y.get_name(old_schema) in renames_y
+                    or not can_delete(y, y.get_name(old_schema))
+                )
+            },
+            sclass=sclass,
+            context=context,
+            old_schema=old_schema,
+            new_schema=new_schema,
+        )
+    )
+
+    # Objects with the same name and the same structural fingerprint
+    # are known to be unchanged without running compare(), unless they
+    # refer to an object that is being renamed or deleted, since
+    # compare() takes those into account.
+    old_fps = _get_fingerprint_cache(old_schema)
+    new_fps = _get_fingerprint_cache(new_schema)
+    unstable_refs = context.renames.keys() | context.deletions.keys()
+
     for x, y in pairs:
         x_name = x.get_name(new_schema)
         y_name = y.get_name(old_schema)
 
+        if x_name == y_name:
+            y_fp = get_fingerprint(y, old_schema, old_fps)
+            x_fp = get_fingerprint(x, new_schema, new_fps)
+            if (
+                y_fp is not None
+                and x_fp is not None
+                and y_fp.structure == x_fp.structure
+                and not (y_fp.refs & unstable_refs)
+            ):
+                full_matrix.append((x, y, 1.0))
+                continue
+
         similarity = y.compare(
             x,
             our_schema=old_schema,
@@ -235,7 +291,10 @@ def delta_objects(
 
             already_has = x_name == y_name and x_name not in renames_x
             if (
-                (0.6 < confidence < 1.0 and can_alter(y, y_name, x_name))
+                (
+                    _RENAME_THRESHOLD < confidence < 1.0
+                    and can_alter(y, y_name, x_name)
+                )
                 or (
                     (not can_create(x, x_name) or not can_delete(y, y_name))
                     and can_alter(y, y_name, x_name)
@@ -312,6 +371,107 @@ def delta_objects(
     return delta
 
 
+def _get_rename_candidates(
+    new_only: Sequence[so.Object_T],
+    old_only: Sequence[so.Object_T],
+    *,
+    forced_x: AbstractSet[so.Object_T],
+    forced_y: AbstractSet[so.Object_T],
+    sclass: type[so.Object_T],
+    context: so.ComparisonContext,
+    old_schema: s_schema.Schema,
+    new_schema: s_schema.Schema,
+) -> Iterable[tuple[so.Object_T, so.Object_T]]:
+    if len(new_only) * len(old_only) <= _RENAME_BLOCKING_THRESHOLD:
+        return itertools.product(new_only, old_only)
+
+    # Comparing every new object to every old one is quadratic, which
+    # is too slow for large refactorings, like renaming a module, so
+    # only the pairs of objects in the same block are compared: objects
+    # in different blocks differ in a field that makes them too
+    # dissimilar to be considered a rename.  This only affects the
+    # confidence of the proposed creations and deletions.
+    new_blocks: dict[tuple[Hashable, ...], list[so.Object_T]] = (
+        collections.defaultdict(list))
+    for x in new_only:
+        new_blocks[_get_rename_block(x, new_schema)].append(x)
+    old_blocks: dict[tuple[Hashable, ...], list[so.Object_T]] = (
+        collections.defaultdict(list))
+    for y in old_only:
+        old_blocks[_get_rename_block(y, old_schema)].append(y)
+
+    pairs: dict[tuple[so.Object_T, so.Object_T], None] = {}
+    ncandidates = sum(
+        len(xs) * len(old_blocks.get(key, ()))
+        for key, xs in new_blocks.items()
+    )
+    if ncandidates > context.max_rename_candidates:
+        log.warning(
+            'too many candidates for renames of %s objects '
+            '(%d pairs, the limit is %d); only the renames that are '
+            'already decided on will be detected',
+            sclass.__name__, ncandidates, context.max_rename_candidates,
+        )
+    else:
+        for key, xs in new_blocks.items():
+            pairs.update(
+                dict.fromkeys(itertools.product(xs, old_blocks.get(key, ())))
+            )
+
+    pairs.update(dict.fromkeys(itertools.product(forced_x, old_only)))
+    pairs.update(dict.fromkeys(itertools.product(new_only, forced_y)))
+    return pairs.keys()
+
+
+def _get_rename_block(
+    obj: so.Object,
+    schema: s_schema.Schema,
+) -> tuple[Hashable, ...]:
+    from . import functions as s_func
+
+    cls = type(obj)
+    key: list[Hashable] = [cls]
+    for field in _get_rename_block_fields(cls):
+        value = obj.get_field_value(schema, field.name)
+        if isinstance(value, s_func.FuncParameterList):
+            # Parameter lists of different length are never similar.
+            key.append(len(value.objects(schema)))
+        elif callable(getattr(type(value), 'compare_values', None)):
+            # Like in Object.compare_field_value(), values of the same
+            # type are compared with the comparator of their type, so
+            # only a difference in type makes them dissimilar.
+            key.append((_BlockByType, type(value)))
+        else:
+            try:
+                hash(value)
+            except TypeError:
+                key.append((_BlockByType, type(value)))
+            else:
+                key.append(value)
+    return tuple(key)
+
+
+@functools.cache
+def _get_rename_block_fields(
+    cls: type[so.Object],
+) -> tuple[so.Field[Any], ...]:
+    # Fields that are compared by equality (or by arity, for parameter
+    # lists) and whose compcoef alone makes the similarity too low for
+    # a rename when the values differ.
+    from . import functions as s_func
+
+    fields = []
+    for field in cls.get_fields(sorted=True).values():
+        if field.compcoef is None or field.compcoef > _RENAME_THRESHOLD:
+            continue
+        if (
+            isinstance(field.type, type)
+            and issubclass(field.type, s_func.FuncParameterList)
+        ) or not callable(getattr(field.type, 'compare_values', None)):
+            fields.append(field)
+    return tuple(fields)
+
+
 def sort_by_inheritance(
     schema: s_schema.Schema,
     objs: Iterable[so.InheritingObjectT],
@@ -327,6 +487,213 @@ def sort_by_inheritance(
     return topological.sort(graph, allow_unresolved=True)
 
 
+class Fingerprint(NamedTuple):
+    """A schema-independent digest of the comparable state of an object.
+
+    *structure* is built from the values of all the fields that take part
+    in Object.compare(), with references to other objects replaced by
+    their names, and the nested objects (e.g. pointers of a type) replaced
+    by their own fingerprints. Two objects with equal structures compare
+    with a similarity of 1.0, unless one of the *refs* is being renamed or
+    deleted.
+    """
+
+    structure: tuple[Any, ...]
+    refs: frozenset[tuple[type[so.Object], sn.Name]]
+
+
+FingerprintCache = dict[uuid.UUID, Optional[Fingerprint]]
+
+
+class _NoFingerprint(Exception):
+    pass
+
+
+# Fingerprint caches, keyed by the schema they are valid for.  Schemas
+# are immutable, so a cache can live for as long as its schema does, and
+# no longer.  A ChainedSchema is recreated for every compilation, so its
+# caches are keyed by its top schema, and remember the base and global
+# schemas they were made with.
+_fingerprint_caches: weakref.WeakKeyDictionary[
+    s_schema.Schema,
+    tuple[tuple[weakref.ref[s_schema.Schema], ...], FingerprintCache],
+] = weakref.WeakKeyDictionary()
+
+
+def _get_fingerprint_cache(schema: s_schema.Schema) -> FingerprintCache:
+    others: tuple[s_schema.Schema, ...]
+    if isinstance(schema, s_schema.ChainedSchema):
+        key = schema.get_top_schema()
+        others = (schema.get_base_schema(), schema.get_global_schema())
+    else:
+        key = schema
+        others = ()
+
+    entry = _fingerprint_caches.get(key)
+    if entry is not None:
+        refs, cache = entry
+        if (
+            len(refs) == len(others)
+            and all(ref() is other for ref, other in zip(refs, others))
+        ):
+            return cache
+
+    cache = {}
+    _fingerprint_caches[key] = (
+        tuple(weakref.ref(other) for other in others),
+        cache,
+    )
+    return cache
+
+
+def get_fingerprint(
+    obj: so.Object,
+    schema: s_schema.Schema,
+    cache: Optional[FingerprintCache] = None,
+) -> Optional[Fingerprint]:
+    """Return the structural fingerprint of *obj*, see Fingerprint.
+
+    None is returned for objects containing values that cannot be
+    fingerprinted, such objects must be compared with Object.compare().
+    """
+    if cache is None:
+        cache = _get_fingerprint_cache(schema)
+    try:
+        return cache[obj.id]
+    except KeyError:
+        pass
+
+    refs: set[tuple[type[so.Object], sn.Name]] = set()
+    try:
+        structure = _object_fingerprint(obj, schema, refs, cache)
+    except _NoFingerprint:
+        fp = None
+    else:
+        fp = Fingerprint(structure, frozenset(refs))
+    cache[obj.id] = fp
+    return fp
+
+
+def _object_fingerprint(
+    obj: so.Object,
+    schema: s_schema.Schema,
+    refs: set[tuple[type[so.Object], sn.Name]],
+    cache: FingerprintCache,
+) -> tuple[Any, ...]:
+    # Mirrors Object.compare() and compare_obj_field_value(): the value
+    # of every comparable field, and whether it is computed or inherited.
+    cls = type(obj)
+    refs.add((cls, obj.get_name(schema)))
+    computed = obj.get_computed_fields(schema)
+    inherited: AbstractSet[str]
+    if isinstance(obj, so.InheritingObject):
+        inherited = obj.get_inherited_fields(schema)
+    else:
+        inherited = frozenset()
+
+    structure: list[Any] = [cls]
+    for field in cls.get_fields(sorted=True).values():
+        if field.compcoef is None:
+            continue
+        value = obj.get_field_value(schema, field.name)
+        structure.append((
+            _value_fingerprint(value, schema, refs, cache),
+            field.name in computed,
+            field.name in inherited,
+        ))
+
+    return tuple(structure)
+
+
+def _value_fingerprint(
+    value: Any,
+    schema: s_schema.Schema,
+    refs: set[tuple[type[so.Object], sn.Name]],
+    cache: FingerprintCache,
+) -> Any:
+    if value is None:
+        return None
+
+    elif isinstance(value, so.Object):
+        # Object.compare_values() compares objects by name.
+        key = (type(value), value.get_name(schema))
+        refs.add(key)
+        return key
+
+    elif isinstance(value, so.ObjectIndexBase):
+        # Nested objects are compared with compare() by key.
+        return (
+            type(value),
+            tuple(
+                (k, _nested_fingerprint(v, schema, refs, cache))
+                for k, v in value.items(schema)
+            ),
+        )
+
+    elif isinstance(value, so.ObjectCollection):
+        from . import functions as s_func
+
+        if isinstance(value, s_func.FuncParameterList):
+            # Parameters are compared with compare() one by one.
+            return (
+                type(value),
+                tuple(
+                    _nested_fingerprint(v, schema, refs, cache)
+                    for v in value.objects(schema)
+                ),
+            )
+
+        # Other collections are compared by the names of the objects,
+        # and ObjectDict by its keys as well.
+        items = []
+        for v in value.objects(schema):
+            key = (type(v), v.get_name(schema))
+            refs.add(key)
+            items.append(key)
+        if isinstance(value, so.ObjectDict):
+            return (type(value), value.keys(schema), tuple(items))
+        else:
+            return (type(value), tuple(items))
+
+    elif isinstance(value, s_expr.Expression):
+        refs.update(value._refs_keys(schema))
+        return (type(value), value.text)
+
+    elif isinstance(value, s_expr.ExpressionList):
+        for expr in value:
+            refs.update(expr._refs_keys(schema))
+        return (type(value), tuple(expr.text for expr in value))
+
+    elif isinstance(value, s_expr.ExpressionDict):
+        for expr in value.values():
+            refs.update(expr._refs_keys(schema))
+        return (
+            type(value),
+            tuple(sorted((k, expr.text) for k, expr in value.items())),
+        )
+
+    elif callable(getattr(type(value), 'compare_values', None)):
+        # A custom comparison that we know nothing about.
+        raise _NoFingerprint
+
+    else:
+        # Everything else is compared with ==
+        return (type(value), value)
+
+
+def _nested_fingerprint(
+    obj: so.Object,
+    schema: s_schema.Schema,
+    refs: set[tuple[type[so.Object], sn.Name]],
+    cache: FingerprintCache,
+) -> tuple[Any, ...]:
+    fp = get_fingerprint(obj, schema, cache)
+    if fp is None:
+        raise _NoFingerprint
+    refs.update(fp.refs)
+    return fp.structure
+
+
 T = TypeVar("T")
 
 
@@ -29,7 +29,9 @@ from typing import (
     TYPE_CHECKING,
 )
 
+import collections
 import copy
+import time
 import uuid
 
 from edb.common import checked
@@ -110,7 +112,7 @@ class Expression(struct.MixedRTStruct, so.ObjectContainer):
         """Parse the expression text into an AST. Cached."""
 
         if self._qlast is None:
-            self._qlast = qlparser.parse_fragment(
+            self._qlast = parse_cache.parse(
                 self.text, filename=f'<{self.origin}>' if self.origin else "")
         return self._qlast
 
@@ -437,7 +439,9 @@ class ExpressionShell(so.Shell):
 
     def parse(self) -> qlast_.Expr:
         if self._qlast is None:
-            self._qlast = qlparser.parse_fragment(self.text)
+            # Keyed like the expressions without an origin, see
+            # get_parse_cache_entries().
+            self._qlast = parse_cache.parse(self.text, filename="")
         return self._qlast
 
     def __repr__(self) -> str:
@@ -579,6 +583,116 @@ EXPRESSION_TYPES = (
 )
 
 
+class ParseCache:
+    """Process-wide cache of parsed expression fragments.
+
+    Expressions only memoize their AST on the instance, and the AST is
+    not pickled, so every process that loads a schema would otherwise
+    re-parse all of its expressions.  The cache is keyed by the text of
+    the fragment (and the file name recorded in its spans), so all
+    expressions with the same text share one AST.
+
+    Like the per-instance AST, the cached trees are shared and must not
+    be mutated; code that rewrites an expression copies it first.
+    """
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self._max_entries = max_entries
+        self._entries: collections.OrderedDict[
+            tuple[str, Optional[str]], qlast_.Expr
+        ] = collections.OrderedDict()
+        # Preloaded entries (i.e. the standard library) are never evicted
+        # and never reordered, so that forked processes keep sharing
+        # their pages.
+        self._preloaded: dict[tuple[str, Optional[str]], qlast_.Expr] = {}
+        self.hits = 0
+        self.misses = 0
+        self.parse_time = 0.0
+
+    def parse(
+        self,
+        text: str,
+        filename: Optional[str] = None,
+    ) -> qlast_.Expr:
+        key = (text, filename)
+        tree = self._preloaded.get(key)
+        if tree is None:
+            tree = self._entries.get(key)
+            if tree is not None:
+                self._entries.move_to_end(key)
+        if tree is not None:
+            self.hits += 1
+            return tree
+
+        started_at = time.monotonic()
+        tree = qlparser.parse_fragment(text, filename=filename)
+        self.parse_time += time.monotonic() - started_at
+        self.misses += 1
+
+        self._entries[key] = tree
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return tree
+
+    def preload(
+        self,
+        entries: Mapping[tuple[str, Optional[str]], qlast_.Expr],
+    ) -> None:
+        self._preloaded.update(entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._preloaded.clear()
+        self.hits = self.misses = 0
+        self.parse_time = 0.0
+
+    def get_stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        avg_parse_time = self.parse_time / self.misses if self.misses else 0
+        return dict(
+            entries=len(self._entries),
+            preloaded=len(self._preloaded),
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / lookups if lookups else 0.0,
+            parse_time=self.parse_time,
+            # Estimated from the average time of the parses we did do.
+            time_saved=self.hits * avg_parse_time,
+        )
+
+
+parse_cache = ParseCache()
+
+
+def get_parse_cache_entries(
+    schema: s_schema.Schema,
+) -> dict[tuple[str, Optional[str]], qlast_.Expr]:
+    """Parse all expressions of *schema* as they are keyed in ParseCache.
+
+    Expressions loaded from a pickled schema have no origin, so their
+    fragments are parsed with an empty file name.
+    """
+    entries: dict[tuple[str, Optional[str]], qlast_.Expr] = {}
+    for obj in schema.get_objects(type=so.Object, exclude_internal=False):
+        for fn, field in type(obj).get_schema_fields().items():
+            if not issubclass(field.type, EXPRESSION_TYPES):
+                continue
+            value = obj.get_explicit_field_value(schema, fn, None)
+            if value is None:
+                continue
+            if isinstance(value, Expression):
+                exprs: Iterable[Expression] = (value,)
+            elif isinstance(value, ExpressionDict):
+                exprs = value.values()
+            else:
+                exprs = value
+            for expr in exprs:
+                key = (expr.text, "")
+                if key not in entries:
+                    entries[key] = parse_cache.parse(*key)
+    return entries
+
+
 def imprint_expr_context(
     qltree: qlast_.Base,
     modaliases: Mapping[Optional[str], str],
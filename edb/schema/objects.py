@@ -218,6 +218,7 @@ class ComparisonContext:
     deletions: dict[tuple[type[Object], sn.Name], sd.DeleteObject[Object]]
     guidance: Optional[DeltaGuidance]
     parent_ops: list[sd.ObjectCommand[Any]]
+    max_rename_candidates: int
 
     def __init__(
         self,
@@ -225,10 +226,14 @@ class ComparisonContext:
         generate_prompts: bool = False,
         descriptive_mode: bool = False,
         guidance: Optional[DeltaGuidance] = None,
+        max_rename_candidates: int = 100_000,
     ) -> None:
         self.generate_prompts = generate_prompts
         self.descriptive_mode = descriptive_mode
         self.guidance = guidance
+        # The maximum number of (new, old) object pairs that are compared
+        # to detect renames, see delta_objects().
+        self.max_rename_candidates = max_rename_candidates
         self.renames = {}
         self.deletions = {}
         self.placeholder_ctr: dict[str, int] = collections.Counter()
@@ -1674,6 +1674,9 @@ class ChainedSchema(Schema):
             self._global_schema._get_global_name_ids(),
         )
 
+    def get_base_schema(self) -> Schema:
+        return self._base_schema
+
     def get_top_schema(self) -> Schema:
         return self._top_schema
 
@@ -18,9 +18,11 @@
 
 
 from __future__ import annotations
+from typing import Optional
 
 import pathlib
 
+from edb import buildmeta
 from edb import lib as stdlib
 from edb import errors
 from edb.common import uuidgen
@@ -33,6 +35,7 @@ from edb.edgeql import compiler as qlcompiler
 from edb.edgeql import parser as qlparser
 
 from . import ddl as s_ddl
+from . import expr as s_expr
 from . import name as sn
 from . import schema as s_schema
 
@@ -49,6 +52,8 @@ CACHE_SRC_DIRS = (
     (LIB_ROOT, '.edgeql'),
 )
 
+STD_PARSE_CACHE_FILE_NAME = 'std-parse-cache.pickle'
+
 
 def get_std_module_text(modname: sn.Name) -> str:
 
@@ -117,3 +122,32 @@ def make_global_schema_version(
     schema_version.set_attribute_value('internal', True)
     schema = sd.apply(schema_version, schema=schema, context=context)
     return schema, schema_version
+
+
+def write_std_parse_cache(
+    schema: s_schema.Schema,
+    *,
+    target_dir: Optional[pathlib.Path] = None,
+) -> None:
+    """Save the parsed expressions of the standard library.
+
+    Compiler workers preload them with load_std_parse_cache(), so that
+    they don't have to parse the std expressions again.
+    """
+    buildmeta.write_data_cache(
+        s_expr.get_parse_cache_entries(schema),
+        buildmeta.hash_dirs(CACHE_SRC_DIRS),
+        STD_PARSE_CACHE_FILE_NAME,
+        target_dir=target_dir,
+    )
+
+
+def load_std_parse_cache() -> bool:
+    entries = buildmeta.read_data_cache(
+        buildmeta.hash_dirs(CACHE_SRC_DIRS),
+        STD_PARSE_CACHE_FILE_NAME,
+    )
+    if entries is None:
+        return False
+    s_expr.parse_cache.preload(entries)
+    return True
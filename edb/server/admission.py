@@ -0,0 +1,283 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Admission control for inbound requests.
+
+Requests are admitted per role and per branch: each of them may have a
+token-bucket rate limit and a cap on the number of requests in flight.
+Rejected requests fail with a retryable RateLimitExceededError before
+any compilation or backend connection acquisition happens.
+
+The quotas of idle roles and branches are forgotten, so that the tables
+don't grow with every name ever seen.
+"""
+
+from __future__ import annotations
+from typing import (
+    Any,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+)
+
+import contextlib
+import dataclasses
+import math
+
+from edb import errors
+from edb.common import token_bucket
+
+from . import metrics
+
+
+class AdmissionLimits(NamedTuple):
+    # Sustained number of requests per second, 0 means unlimited.
+    rate: float = 0
+    # Maximum number of requests in flight, 0 means unlimited.
+    max_in_flight: int = 0
+
+    def is_unlimited(self) -> bool:
+        return self.rate <= 0 and self.max_in_flight <= 0
+
+
+UNLIMITED = AdmissionLimits()
+
+
+class Rejection(NamedTuple):
+    scope: str
+    name: str
+    # 'rate' or 'concurrency'
+    reason: str
+    # Seconds until the rate limit admits a request again, if known.
+    delay: Optional[float] = None
+
+    def get_retry_after(self) -> int:
+        # The value of a Retry-After HTTP header, in whole seconds.
+        if self.delay is None:
+            return 1
+        return max(math.ceil(self.delay), 1)
+
+    def to_error(self) -> errors.RateLimitExceededError:
+        target = f'{self.scope} {self.name!r}'
+        if self.reason == 'rate':
+            msg = f'request rate limit exceeded for {target}'
+        else:
+            msg = f'too many concurrent requests for {target}'
+        if self.delay is not None:
+            hint = f'Retry in {self.delay:.3f} seconds.'
+        else:
+            hint = 'Retry after in-flight requests complete.'
+        return errors.RateLimitExceededError(msg, hint=hint)
+
+
+@dataclasses.dataclass
+class _Quota:
+    bucket: Optional[token_bucket.TokenBucket]
+    in_flight: int = 0
+
+    def is_idle(self) -> bool:
+        # An idle quota is no different from a new one.
+        return not self.in_flight and (
+            self.bucket is None or self.bucket.is_full()
+        )
+
+
+# The quota tables are swept of idle quotas whenever they double in size
+# since the last sweep, but not below this size.
+_MIN_SWEEP_SIZE = 1024
+
+
+class _QuotaTable:
+
+    def __init__(self, scope: str, limits: AdmissionLimits) -> None:
+        self._scope = scope
+        self._limits = limits
+        self._quotas: dict[str, _Quota] = {}
+        self._sweep_size = _MIN_SWEEP_SIZE
+
+    def get(self, name: str) -> _Quota:
+        quota = self._quotas.get(name)
+        if quota is None:
+            if len(self._quotas) >= self._sweep_size:
+                self._sweep()
+            if self._limits.rate > 0:
+                # Allow bursts of up to one second worth of requests.
+                bucket = token_bucket.TokenBucket(
+                    max(self._limits.rate, 1), self._limits.rate
+                )
+            else:
+                bucket = None
+            quota = self._quotas[name] = _Quota(bucket)
+        return quota
+
+    def release(self, name: str) -> None:
+        quota = self._quotas[name]
+        quota.in_flight -= 1
+        if quota.is_idle():
+            del self._quotas[name]
+
+    def _sweep(self) -> None:
+        self._quotas = {
+            name: quota
+            for name, quota in self._quotas.items()
+            if not quota.is_idle()
+        }
+        self._sweep_size = max(2 * len(self._quotas), _MIN_SWEEP_SIZE)
+
+    def check_in_flight(self, quota: _Quota) -> bool:
+        return (
+            self._limits.max_in_flight <= 0
+            or quota.in_flight < self._limits.max_in_flight
+        )
+
+    def get_delay(self, quota: _Quota) -> float:
+        if quota.bucket is None:
+            return 0
+        return quota.bucket.get_delay(1)
+
+    def get_debug_info(self) -> dict[str, Any]:
+        return dict(
+            limits=self._limits._asdict(),
+            in_flight={
+                name: quota.in_flight
+                for name, quota in self._quotas.items()
+                if quota.in_flight
+            },
+        )
+
+
+class AdmissionController:
+
+    def __init__(
+        self,
+        tenant_name: str,
+        *,
+        role_limits: AdmissionLimits = UNLIMITED,
+        branch_limits: AdmissionLimits = UNLIMITED,
+    ) -> None:
+        self._tenant_name = tenant_name
+        self._enabled = not (
+            role_limits.is_unlimited() and branch_limits.is_unlimited()
+        )
+        self._roles = _QuotaTable('role', role_limits)
+        self._branches = _QuotaTable('branch', branch_limits)
+
+    def is_enabled(self) -> bool:
+        return self._enabled
+
+    def try_acquire(
+        self,
+        role: str,
+        branch: str,
+        *,
+        count_rate: bool = True,
+    ) -> Optional[Rejection]:
+        """Admit a request, or return why it is rejected.
+
+        Every successful call must be paired with a release() call.  If
+        *count_rate* is false, the request is only subject to the in-flight
+        limits.
+        """
+        if not self._enabled:
+            return None
+
+        role_quota = self._roles.get(role)
+        branch_quota = self._branches.get(branch)
+
+        rejection = None
+        if not self._roles.check_in_flight(role_quota):
+            rejection = Rejection('role', role, 'concurrency')
+        elif not self._branches.check_in_flight(branch_quota):
+            rejection = Rejection('branch', branch, 'concurrency')
+        elif count_rate:
+            # Check both buckets before consuming from either, so that a
+            # request rejected for its branch doesn't use up the rate of
+            # its role, or vice versa.
+            if delay := self._roles.get_delay(role_quota):
+                rejection = Rejection('role', role, 'rate', delay)
+            elif delay := self._branches.get_delay(branch_quota):
+                rejection = Rejection('branch', branch, 'rate', delay)
+
+        if rejection is not None:
+            metrics.admission_rejections.inc(
+                1.0, self._tenant_name, rejection.scope, rejection.reason
+            )
+            return rejection
+
+        if count_rate:
+            if role_quota.bucket is not None:
+                role_quota.bucket.consume(1)
+            if branch_quota.bucket is not None:
+                branch_quota.bucket.consume(1)
+        role_quota.in_flight += 1
+        branch_quota.in_flight += 1
+        return None
+
+    def acquire(
+        self,
+        role: str,
+        branch: str,
+        *,
+        count_rate: bool = True,
+    ) -> None:
+        """Admit a request or raise RateLimitExceededError.
+
+        See try_acquire().
+        """
+        rejection = self.try_acquire(role, branch, count_rate=count_rate)
+        if rejection is not None:
+            raise rejection.to_error()
+
+    def release(self, role: str, branch: str) -> None:
+        if not self._enabled:
+            return
+
+        self._roles.release(role)
+        self._branches.release(branch)
+
+    @contextlib.contextmanager
+    def admit(
+        self,
+        role: str,
+        branch: str,
+        *,
+        count_rate: bool = True,
+    ) -> Iterator[None]:
+        self.acquire(role, branch, count_rate=count_rate)
+        try:
+            yield
+        finally:
+            self.release(role, branch)
+
+    def get_debug_info(self) -> dict[str, Any]:
+        return dict(
+            roles=self._roles.get_debug_info(),
+            branches=self._branches.get_debug_info(),
+        )
+
+
+def limits_from_config(
+    conf: Mapping[str, Any],
+    scope: str,
+) -> AdmissionLimits:
+    """Read admission limits from a multi-tenant config entry."""
+    return AdmissionLimits(
+        rate=conf.get(f'{scope}-rate-limit', 0),
+        max_in_flight=conf.get(f'{scope}-max-in-flight', 0),
+    )
@@ -46,6 +46,7 @@ from edb.common import typeutils
 from edb.schema import defines as schema_defines
 from edb.pgsql import params as pgsql_params
 
+from . import compression
 from . import defines
 
 
@@ -260,6 +261,16 @@ class ServerConfig(NamedTuple):
     compiler_pool_tenant_cache_size: int
     compiler_worker_max_rss: Optional[int]
 
+    role_rate_limit: float
+    role_max_in_flight: int
+    branch_rate_limit: float
+    branch_max_in_flight: int
+
+    auto_explain_threshold: float
+    auto_explain_sample_rate: float
+    query_stats_size: int
+    binary_compression: list[str]
+
     echo_runtime_info: bool
     emit_server_status: str
     temp_dir: bool
@@ -404,6 +415,28 @@ def _validate_max_backend_connections(ctx, param, value):
     return value
 
 
+def _validate_non_negative(ctx, param, value):
+    if value is not None and value < 0:
+        raise click.BadParameter(f'{param.name} cannot be negative')
+    return value
+
+
+def _validate_compression(ctx, param, value):
+    if value is None:
+        return compression.get_available()
+    algorithms = [name.strip() for name in value.split(',') if name.strip()]
+    for name in algorithms:
+        algo = compression.ALGORITHMS.get(name)
+        if algo is None:
+            raise click.BadParameter(
+                f'unknown compression algorithm {name!r}')
+        if not algo.available:
+            raise click.BadParameter(
+                f'compression algorithm {name!r} requires a package '
+                f'that is not installed')
+    return algorithms
+
+
 def compute_default_max_backend_connections() -> int:
     total_mem = psutil.virtual_memory().total
     total_mem_mb = total_mem // MIB
@@ -1166,6 +1199,74 @@ server_options = typeutils.chain_decorators([
              'Each worker is free from this limit in its first 20-30 hours '
              'after spawn to avoid infinite restarts or a thundering herd.',
     ),
+    click.option(
+        '--role-rate-limit', type=float, metavar='NUM', default=0,
+        envvar="GEL_SERVER_ROLE_RATE_LIMIT",
+        cls=EnvvarResolver,
+        callback=_validate_non_negative,
+        help='Maximum sustained NUM of requests per second accepted for '
+             'each role over the binary and HTTP protocols; excess requests '
+             'are rejected with a retryable error. 0 (default) means no '
+             'limit.'),
+    click.option(
+        '--role-max-in-flight', type=int, metavar='NUM', default=0,
+        envvar="GEL_SERVER_ROLE_MAX_IN_FLIGHT",
+        cls=EnvvarResolver,
+        callback=_validate_non_negative,
+        help='Maximum NUM of concurrently executing requests for each role. '
+             '0 (default) means no limit.'),
+    click.option(
+        '--branch-rate-limit', type=float, metavar='NUM', default=0,
+        envvar="GEL_SERVER_BRANCH_RATE_LIMIT",
+        cls=EnvvarResolver,
+        callback=_validate_non_negative,
+        help='Maximum sustained NUM of requests per second accepted for '
+             'each branch over the binary and HTTP protocols; excess '
+             'requests are rejected with a retryable error. 0 (default) '
+             'means no limit.'),
+    click.option(
+        '--branch-max-in-flight', type=int, metavar='NUM', default=0,
+        envvar="GEL_SERVER_BRANCH_MAX_IN_FLIGHT",
+        cls=EnvvarResolver,
+        callback=_validate_non_negative,
+        help='Maximum NUM of concurrently executing requests for each '
+             'branch. 0 (default) means no limit.'),
+    click.option(
+        '--auto-explain-threshold', type=float, metavar='SECONDS', default=0,
+        envvar="GEL_SERVER_AUTO_EXPLAIN_THRESHOLD",
+        cls=EnvvarResolver,
+        callback=_validate_non_negative,
+        help='Capture the query plans of queries that run for longer than '
+             'SECONDS, and make them available via the system API. 0 '
+             '(default) disables the capture.'),
+    click.option(
+        '--auto-explain-sample-rate', type=click.FloatRange(0, 1),
+        metavar='FRACTION', default=1.0,
+        envvar="GEL_SERVER_AUTO_EXPLAIN_SAMPLE_RATE",
+        cls=EnvvarResolver,
+        help='The FRACTION of the queries slower than '
+             '--auto-explain-threshold whose plan is captured. '
+             'Defaults to 1.'),
+    click.option(
+        '--query-stats-size', type=int, metavar='NUM', default=0,
+        envvar="GEL_SERVER_QUERY_STATS_SIZE",
+        cls=EnvvarResolver,
+        callback=_validate_non_negative,
+        help='Track the end-to-end execution statistics of the NUM '
+             'statements with the largest total time, and make them '
+             'available via the system API. 0 (default) disables the '
+             'tracking.'),
+    click.option(
+        '--binary-compression', metavar='ALGORITHMS',
+        envvar="GEL_SERVER_BINARY_COMPRESSION",
+        cls=EnvvarResolver,
+        callback=_validate_compression,
+        help='A comma separated list of the compression algorithms that '
+             'binary protocol clients may request: zstd, lz4 or deflate. '
+             'Defaults to all the available ones; an empty list disables '
+             'compression. Only deflate is available unless the optional '
+             'zstandard and lz4 packages are installed (the "compression" '
+             'extra).'),
 ])
 
 
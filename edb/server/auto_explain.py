@@ -0,0 +1,189 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Capture of the query plans of slow queries.
+
+A sample of the queries that run for longer than a threshold get their
+Postgres plan captured right after they complete, by running the same
+query under ``analyze (execute := false)`` in a background task.  The
+plans are mapped back to the EdgeQL source by the explain machinery and
+kept in a bounded log per tenant, which can be read via the system API.
+
+Since the query is not executed again, the plans carry the estimates of
+the planner but no actual timings.
+"""
+
+from __future__ import annotations
+from typing import (
+    Any,
+    Callable,
+    Mapping,
+    NamedTuple,
+    Optional,
+)
+
+import collections
+import json
+import random
+import time
+
+from . import defines
+from . import metrics
+
+
+class AutoExplainSettings(NamedTuple):
+    # Minimum duration of a query in seconds, 0 means disabled.
+    threshold: float = 0
+    # Fraction of the slow queries whose plan is captured.
+    sample_rate: float = 1.0
+
+    def is_enabled(self) -> bool:
+        return self.threshold > 0 and self.sample_rate > 0
+
+
+DISABLED = AutoExplainSettings()
+
+
+class SlowQuery(NamedTuple):
+    captured_at: float
+    branch: str
+    role: str
+    query: str
+    duration: float
+    plan: Optional[dict[str, Any]]
+    error: Optional[str]
+
+
+class SlowQueryLog:
+
+    def __init__(
+        self,
+        settings: AutoExplainSettings = DISABLED,
+        *,
+        tenant_label: str = 'unknown',
+        max_size: int = defines.AUTO_EXPLAIN_LOG_SIZE,
+        max_in_flight: int = defines.AUTO_EXPLAIN_MAX_IN_FLIGHT,
+        sample: Callable[[], float] = random.random,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._settings = settings
+        self._tenant_label = tenant_label
+        self._entries: collections.deque[SlowQuery] = collections.deque(
+            maxlen=max_size
+        )
+        self._max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._sample = sample
+        self._clock = clock
+
+    @property
+    def settings(self) -> AutoExplainSettings:
+        return self._settings
+
+    def is_enabled(self) -> bool:
+        return self._settings.is_enabled()
+
+    def should_capture(self, duration: float) -> bool:
+        """Decide whether to capture the plan of a query that just ran.
+
+        If so, the capture counts as in flight until capture_done() is
+        called.
+        """
+        if not self._settings.is_enabled():
+            return False
+        if duration < self._settings.threshold:
+            return False
+        if self._in_flight >= self._max_in_flight:
+            metrics.auto_explain_captures.inc(
+                1.0, self._tenant_label, 'skipped'
+            )
+            return False
+        if self._sample() >= self._settings.sample_rate:
+            return False
+        self._in_flight += 1
+        return True
+
+    def capture_done(self) -> None:
+        self._in_flight -= 1
+
+    def add(
+        self,
+        *,
+        branch: str,
+        role: str,
+        query: str,
+        duration: float,
+        plan: Optional[bytes] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        decoded = None
+        if plan is not None:
+            decoded = json.loads(plan)
+            # The full Postgres plan and the analysis info are only useful
+            # for debugging the explain machinery, and are the bulk of it.
+            decoded.pop('debug_info', None)
+        self._entries.append(SlowQuery(
+            captured_at=self._clock(),
+            branch=branch,
+            role=role,
+            query=query,
+            duration=duration,
+            plan=decoded,
+            error=error,
+        ))
+        metrics.auto_explain_captures.inc(
+            1.0, self._tenant_label, 'error' if error else 'ok'
+        )
+
+    def get_entries(self) -> list[dict[str, Any]]:
+        """Return the captured plans, most recent first."""
+        return [entry._asdict() for entry in reversed(self._entries)]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def explain_query(query: str) -> str:
+    """Wrap *query* so that it is planned but not executed."""
+    return f'analyze (execute := false) {query}'
+
+
+def plan_from_data(data: bytes) -> bytes:
+    """Extract the JSON plan from the output of an explain_query().
+
+    *data* is the single Data message of the analyze query, whose only
+    element is the plan.
+    """
+    # mtype, message length, number of elements and element length.
+    if (
+        len(data) < 11
+        or data[:1] != b'D'
+        or int.from_bytes(data[5:7], 'big') != 1
+        or int.from_bytes(data[1:5], 'big') != len(data) - 1
+        or int.from_bytes(data[7:11], 'big') != len(data) - 11
+    ):
+        raise ValueError('unexpected output of the analyze query')
+    return data[11:]
+
+
+def settings_from_config(conf: Mapping[str, Any]) -> AutoExplainSettings:
+    """Read the auto-explain settings from a multi-tenant config entry."""
+    return AutoExplainSettings(
+        threshold=conf.get('auto-explain-threshold', 0),
+        sample_rate=conf.get('auto-explain-sample-rate', 1.0),
+    )
@@ -1843,6 +1843,11 @@ async def _init_stdlib(
                 STDLIB_CACHE_FILE_NAME,
                 target_dir=cache_dir,
             )
+
+            s_std.write_std_parse_cache(
+                stdlib.stdschema,
+                target_dir=cache_dir,
+            )
     else:
         logger.info('Initializing the standard library...')
         await _execute(conn, eff_tpldbdump.decode('utf-8'))
@@ -25,6 +25,11 @@ from .compiler import compile_edgeql_script
 from .compiler import new_compiler, new_compiler_from_pg, new_compiler_context
 from .compiler import compile, compile_schema_storage_in_delta
 from .compiler import maybe_force_database_error
+from .compiler import check_incremental_dump_since
+from .compiler import check_incremental_restore_since
+from .compiler import make_dump_snapshot
+from .compiler import get_restored_dump_snapshot_sql
+from .compiler import set_restored_dump_snapshot_sql
 from .dbstate import QueryUnit, QueryUnitGroup
 from .enums import Capability, Cardinality
 from .enums import InputFormat, OutputFormat, InputLanguage
@@ -46,7 +51,11 @@ __all__ = (
     'InputLanguage',
     'OutputFormat',
     'analyze_explain_output',
+    'check_incremental_dump_since',
+    'check_incremental_restore_since',
     'compile_edgeql_script',
+    'get_restored_dump_snapshot_sql',
+    'make_dump_snapshot',
     'maybe_force_database_error',
     'new_compiler',
     'new_compiler_from_pg',
@@ -54,4 +63,5 @@ __all__ = (
     'compile',
     'compile_schema_storage_in_delta',
     'repair_schema',
+    'set_restored_dump_snapshot_sql',
 )
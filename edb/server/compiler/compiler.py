@@ -39,6 +39,7 @@ import pickle
 import textwrap
 import time
 import uuid
+import weakref
 
 import immutables
 
@@ -53,6 +54,7 @@ from edb.server import instdata
 
 from edb import edgeql
 from edb.common import debug
+from edb.common import lru
 from edb import graphql
 from edb.common import turbo_uuid
 from edb.common import verutils
@@ -61,6 +63,7 @@ from edb.common import uuidgen
 from edb.edgeql import ast as qlast
 from edb.edgeql import codegen as qlcodegen
 from edb.edgeql import compiler as qlcompiler
+from edb.edgeql import declarative as s_decl
 from edb.edgeql import qltypes
 
 from edb.ir import staeval as ireval
@@ -117,6 +120,9 @@ if TYPE_CHECKING:
 
 EMPTY_MAP: immutables.Map[Any, Any] = immutables.Map()
 
+# The number of branches per tenant whose SDL traces are kept.
+SDL_TRACE_CACHE_BRANCHES = 8
+
 
 @dataclasses.dataclass(frozen=True)
 class CompilerDatabaseState:
@@ -418,6 +424,30 @@ class CompilerState:
             self.state_serializer_factory.make_compilation_config_serializer()
         )
 
+    @functools.cached_property
+    def _sdl_trace_caches(
+        self,
+    ) -> weakref.WeakKeyDictionary[s_schema.Schema, lru.LRUMapping]:
+        return weakref.WeakKeyDictionary()
+
+    def get_sdl_trace_cache(
+        self,
+        global_schema: s_schema.Schema,
+        branch_name: Optional[str],
+    ) -> s_decl.SDLTraceCache:
+        # Repeated migrations to similar SDL (e.g. in watch mode) reuse
+        # the dependency traces of the unchanged declarations.  The
+        # caches are kept per branch of the tenant the global schema
+        # belongs to, for the most recently migrated branches only.
+        caches = self._sdl_trace_caches.get(global_schema)
+        if caches is None:
+            caches = lru.LRUMapping(maxsize=SDL_TRACE_CACHE_BRANCHES)
+            self._sdl_trace_caches[global_schema] = caches
+        cache: Optional[s_decl.SDLTraceCache] = caches.get(branch_name)
+        if cache is None:
+            cache = caches[branch_name] = s_decl.SDLTraceCache()
+        return cache
+
 
 class Compiler:
 
@@ -1003,6 +1033,7 @@ class Compiler:
         db_config_json: bytes,
         protocol_version: defines.ProtocolVersion,
         with_secrets: bool,
+        incremental_since: Optional[str] = None,
     ) -> DumpDescriptor:
         global_schema = self.parse_json_schema(global_schema_json, None)
         user_schema = self.parse_json_schema(user_schema_json, global_schema)
@@ -1031,20 +1062,11 @@ class Compiler:
         ids, sequences = get_obj_ids(schema)
         raw_ids = [(name, cls, id.bytes) for name, cls, id in ids]
 
-        objtypes = schema.get_objects(
-            type=s_objtypes.ObjectType,
-            exclude_stdlib=True,
-        )
-        descriptors = []
-
-        cfg_object = schema.get('cfg::ConfigObject', type=s_objtypes.ObjectType)
-        for objtype in objtypes:
-            if objtype.is_union_type(schema) or objtype.is_view(schema):
-                continue
-            if objtype.issubclass(schema, cfg_object):
-                continue
-            descriptors.extend(_describe_object(schema, objtype,
-                                                protocol_version))
+        since = None
+        if incremental_since is not None:
+            _, _, since = _parse_dump_snapshot(incremental_since)
+        descriptors = _describe_objects(
+            schema, protocol_version, since=since)
 
         dynamic_ddl = []
         if sequences:
@@ -1129,7 +1151,14 @@ class Compiler:
         schema_ids: list[tuple[str, str, bytes]],
         blocks: list[tuple[bytes, bytes]],  # type_id, typespec
         protocol_version: defines.ProtocolVersion,
+        merge: bool = False,
     ) -> RestoreDescriptor:
+        """Describe how to restore a dump.
+
+        With *merge*, the dump is an incremental one, to be merged into
+        a branch with the same schema: the schema DDL is not applied,
+        only the sequence values are.
+        """
         schema_object_ids = {
             (
                 s_name.name_from_string(name),
@@ -1199,19 +1228,34 @@ class Compiler:
         # The state serializer generated below is somehow inappropriate,
         # so it's simply ignored here and the I/O process will do it on its own
         commands = edgeql.parse_block(ddl_source)
-        statements = self._reprocess_restore_config(commands)
-        units = _try_compile_ast(
-            ctx=ctx, source=ddl_source, statements=statements
-        ).units
+        statements: list[qlast.Base]
+        if merge:
+            # The sequence_reset() calls that follow the schema DDL.
+            statements = [
+                cmd for cmd in commands if isinstance(cmd, qlast.SelectQuery)
+            ]
+        else:
+            statements = self._reprocess_restore_config(commands)
+        units: list[dbstate.QueryUnit] = []
+        if statements:
+            units = _try_compile_ast(
+                ctx=ctx, source=ddl_source, statements=statements
+            ).units
 
         _check_force_database_error(ctx, scope='restore')
 
         schema = ctx.state.current_tx().get_schema(
             ctx.compiler_state.std_schema)
 
+        if merge:
+            _check_merge_layout(schema, blocks, protocol_version)
+
         # The AI extension needs to run some code before restoring data.
         # TODO: Generalize this mechanism.
-        if schema.get_global(s_ext.Extension, 'ai', default=None):
+        if (
+            not merge
+            and schema.get_global(s_ext.Extension, 'ai', default=None)
+        ):
             from edb.pgsql import delta_ext_ai
             ddl_source = edgeql.Source.from_string(
                 delta_ext_ai.get_ext_ai_pre_restore_script(schema))
@@ -1220,6 +1264,8 @@ class Compiler:
         restore_blocks = []
         tables = []
         repopulate_units = []
+        merge_prepare_units: list[str] = []
+        merge_units: list[str] = []
         for schema_object_id_bytes, typedesc in blocks:
             schema_object_id = uuidgen.from_bytes(schema_object_id_bytes)
             obj = schema.get_by_id(schema_object_id)
@@ -1350,17 +1396,61 @@ class Compiler:
             elided_cols = tuple(i for i, pn in enumerate(desc_ptrs)
                                 if pn in elided_col_set)
 
-            col_list = (
+            col_list = ", ".join(
                 pg_common.quote_ident(cols[pn])
                 for pn in desc_ptrs
                 if pn not in elided_col_set
             )
 
-            stmt = (
-                f'COPY {table_name} '
-                f'({", ".join(col_list)})'
-                f'FROM STDIN WITH (FORMAT binary, FREEZE true)'
-            ).encode()
+            if not merge:
+                stmt = (
+                    f'COPY {table_name} '
+                    f'({col_list})'
+                    f'FROM STDIN WITH (FORMAT binary, FREEZE true)'
+                ).encode()
+
+            elif isinstance(obj, s_objtypes.ObjectType):
+                # The changed objects and the ids of all the objects
+                # are staged, then replace the objects of the table.
+                staging = f'pg_temp."_merge_{obj.id.hex}"'
+                live = f'pg_temp."_merge_live_{obj.id.hex}"'
+                merge_prepare_units.append(
+                    f'CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS '
+                    f'SELECT {col_list} FROM ONLY {table_name} WITH NO DATA;'
+                    f'CREATE TEMPORARY TABLE {live} ON COMMIT DROP AS '
+                    f'SELECT id FROM ONLY {table_name} WITH NO DATA;'
+                )
+                merge_units.append(
+                    f'DELETE FROM ONLY {table_name} AS t '
+                    f'WHERE EXISTS (SELECT FROM {staging} s WHERE s.id = t.id)'
+                    f' OR NOT EXISTS (SELECT FROM {live} l WHERE l.id = t.id);'
+                    f'INSERT INTO {table_name} ({col_list}) '
+                    f'SELECT {col_list} FROM {staging};'
+                )
+                stmt = (
+                    f'COPY {staging} ({col_list}) '
+                    f'FROM STDIN WITH (FORMAT binary)'
+                ).encode()
+                restore_blocks.append(
+                    RestoreBlockDescriptor(
+                        schema_object_id=schema_object_id,
+                        sql_copy_stmt=(
+                            f'COPY {live} (id) '
+                            f'FROM STDIN WITH (FORMAT binary)'
+                        ).encode(),
+                        compat_elided_cols=(),
+                        data_mending_desc=(None,),
+                        live_ids=True,
+                    )
+                )
+
+            else:
+                # Link and property tables are dumped in full.
+                merge_prepare_units.append(f'DELETE FROM {table_name};')
+                stmt = (
+                    f'COPY {table_name} ({col_list}) '
+                    f'FROM STDIN WITH (FORMAT binary)'
+                ).encode()
 
             restore_blocks.append(
                 RestoreBlockDescriptor(
@@ -1378,6 +1468,8 @@ class Compiler:
             blocks=restore_blocks,
             tables=tables,
             repopulate_units=repopulate_units,
+            merge_prepare_units=merge_prepare_units,
+            merge_units=merge_units,
         )
 
     def analyze_explain_output(
@@ -1647,6 +1739,7 @@ def _get_compile_options(
             ctx.schema_reflection_mode
             or _get_config_val(ctx, '__internal_query_reflschema')
         ),
+        share_type_refs=not ctx.bootstrap_mode,
     )
 
 
@@ -2040,9 +2133,11 @@ def _compile_ql_query(
         server_param_conversions=server_param_conversions,
         cacheable=cacheable,
         has_dml=bool(ir.dml_exprs),
+        volatility=ir.volatility,
         query_asts=query_asts,
         warnings=ir.warnings,
         unsafe_isolation_dangers=ir.unsafe_isolation_dangers,
+        stats_id=sql_info.get('id'),
     )
 
 
@@ -3126,6 +3221,8 @@ def _make_query_unit(
         unit.server_param_conversions = comp.server_param_conversions
 
         unit.cacheable = comp.cacheable
+        unit.volatility = comp.volatility
+        unit.stats_id = comp.stats_id
 
         if comp.is_explain:
             unit.is_explain = True
@@ -3452,10 +3549,161 @@ def get_obj_ids(
     return ids, sequences
 
 
+def _describe_objects(
+    schema: s_schema.Schema,
+    protocol_version: defines.ProtocolVersion,
+    *,
+    since: Optional[str] = None,
+) -> list[DumpBlockDescriptor]:
+    objtypes = schema.get_objects(
+        type=s_objtypes.ObjectType,
+        exclude_stdlib=True,
+    )
+    descriptors = []
+
+    cfg_object = schema.get('cfg::ConfigObject', type=s_objtypes.ObjectType)
+    for objtype in objtypes:
+        if objtype.is_union_type(schema) or objtype.is_view(schema):
+            continue
+        if objtype.issubclass(schema, cfg_object):
+            continue
+        descriptors.extend(_describe_object(schema, objtype,
+                                            protocol_version, since))
+
+    return descriptors
+
+
+def _parse_pg_snapshot(snapshot: str) -> tuple[int, int]:
+    try:
+        xmin, xmax, xip = snapshot.split(':')
+        for xid in filter(None, xip.split(',')):
+            int(xid)
+        return int(xmin), int(xmax)
+    except ValueError:
+        raise errors.InputDataError(
+            f'invalid dump snapshot: {snapshot!r}') from None
+
+
+# The instdata key of the SNAPSHOT header of the last dump restored or
+# merged into a branch.
+RESTORED_DUMP_SNAPSHOT_KEY = 'restored_dump_snapshot'
+
+
+def make_dump_snapshot(
+    system_identifier: str, branch: str, snapshot: str
+) -> str:
+    """Build the SNAPSHOT header of a dump of *branch*.
+
+    *snapshot* is the Postgres snapshot the dump was taken in, and
+    *system_identifier* the one of the Postgres cluster, so that an
+    incremental dump can check it is taken from the same branch.
+    """
+    return json.dumps({
+        'system_identifier': system_identifier,
+        'branch': branch,
+        'snapshot': snapshot,
+    })
+
+
+def _parse_dump_snapshot(token: str) -> tuple[str, str, str]:
+    try:
+        data = json.loads(token)
+        result = (
+            data['system_identifier'],
+            data['branch'],
+            data['snapshot'],
+        )
+    except (ValueError, KeyError, TypeError):
+        raise errors.InputDataError(
+            f'invalid dump snapshot: {token!r}') from None
+    if not all(isinstance(v, str) for v in result):
+        raise errors.InputDataError(f'invalid dump snapshot: {token!r}')
+    return result
+
+
+def check_incremental_dump_since(since: str, snapshot: str) -> None:
+    """Check that a dump taken in *snapshot* can be incremental to *since*.
+
+    Both are SNAPSHOT headers, as built by make_dump_snapshot().  Changed
+    rows are found by comparing the 32-bit xmin of rows to *since*, so
+    it must come from the same branch of the same Postgres cluster and
+    must not be older than the wraparound horizon of xids.
+    """
+    since_sysid, since_branch, since_snapshot = _parse_dump_snapshot(since)
+    cur_sysid, cur_branch, cur_snapshot = _parse_dump_snapshot(snapshot)
+    since_xmin, since_xmax = _parse_pg_snapshot(since_snapshot)
+    cur_xmin, cur_xmax = _parse_pg_snapshot(cur_snapshot)
+    if (
+        since_sysid != cur_sysid
+        or since_branch != cur_branch
+        or since_xmax > cur_xmax
+    ):
+        raise errors.InputDataError(
+            'cannot take an incremental dump: the previous dump was not '
+            'taken from this branch')
+    if cur_xmax - since_xmin >= 2 ** 31:
+        raise errors.InputDataError(
+            'cannot take an incremental dump: the previous dump is too '
+            'old, take a full dump instead')
+
+
+def check_incremental_restore_since(
+    since: str, restored: Optional[str]
+) -> None:
+    """Check that an incremental dump can be merged into a branch.
+
+    *since* is the INCREMENTAL_SINCE header of the dump, and *restored*
+    the SNAPSHOT header of the last dump restored or merged into the
+    branch, if any.
+    """
+    if restored is None:
+        raise errors.InputDataError(
+            'cannot merge an incremental dump: no dump was restored into '
+            'this branch')
+    if since != restored:
+        raise errors.InputDataError(
+            'cannot merge an incremental dump: it is not incremental to '
+            'the last dump restored into this branch')
+
+
+def get_restored_dump_snapshot_sql() -> bytes:
+    schema = pg_common.versioned_schema('edgedbinstdata')
+    return (
+        f'SELECT text FROM {schema}.instdata '
+        f'WHERE key = {pg_common.quote_literal(RESTORED_DUMP_SNAPSHOT_KEY)}'
+    ).encode()
+
+
+def set_restored_dump_snapshot_sql(snapshot: Optional[str]) -> bytes:
+    schema = pg_common.versioned_schema('edgedbinstdata')
+    key = pg_common.quote_literal(RESTORED_DUMP_SNAPSHOT_KEY)
+    if snapshot is None:
+        return f'DELETE FROM {schema}.instdata WHERE key = {key}'.encode()
+    return (
+        f'INSERT INTO {schema}.instdata (key, text) '
+        f'VALUES ({key}, {pg_common.quote_literal(snapshot)}) '
+        f'ON CONFLICT (key) DO UPDATE SET text = EXCLUDED.text'
+    ).encode()
+
+
+def _get_changed_rows_filter(since: str) -> str:
+    # xmin is the 32-bit xid of the transaction that wrote the row.
+    # Widen it to an xid8 with the epoch of the current snapshot: this
+    # is exact for the rows written since the previous dump, and
+    # errs on the side of dumping very old rows again.
+    cur = 'pg_snapshot_xmax(pg_current_snapshot())::text::bigint'
+    xid = f'({cur} - ({cur} - xmin::text::bigint) % 4294967296)::text::xid8'
+    return (
+        f'NOT pg_visible_in_snapshot('
+        f'{xid}, {pg_common.quote_literal(since)}::pg_snapshot)'
+    )
+
+
 def _describe_object(
     schema: s_schema.Schema,
     source: s_obj.Object,
     protocol_version: defines.ProtocolVersion,
+    since: Optional[str] = None,
 ) -> list[DumpBlockDescriptor]:
 
     cols = []
@@ -3540,6 +3788,8 @@ def _describe_object(
             )
 
             if link_stor_info is not None:
+                # Link and property tables have no stable row identity,
+                # so they are dumped in full even in incremental dumps.
                 ptrdesc.extend(_describe_object(schema, ptr,
                                                 protocol_version))
 
@@ -3564,11 +3814,32 @@ def _describe_object(
         schema, source, catenate=True
     )
 
-    stmt = (
-        f'COPY {table_name} '
-        f'({", ".join(pg_common.quote_ident(c) for c in cols)}) '
-        f'TO STDOUT WITH BINARY'
-    ).encode()
+    col_list = ", ".join(pg_common.quote_ident(c) for c in cols)
+    live_ids: list[DumpBlockDescriptor] = []
+    if since is not None and isinstance(source, s_objtypes.ObjectType):
+        # Only the rows changed since the previous dump, along with the
+        # ids of all the objects, so that the deleted ones can be found.
+        stmt = (
+            f'COPY (SELECT {col_list} FROM ONLY {table_name} '
+            f'WHERE {_get_changed_rows_filter(since)}) '
+            f'TO STDOUT WITH BINARY'
+        ).encode()
+        live_ids.append(DumpBlockDescriptor(
+            schema_object_id=source.id,
+            schema_object_class=type(source).get_ql_class_or_die(),
+            schema_deps=(),
+            type_desc_id=type_id,
+            type_desc=type_data,
+            sql_copy_stmt=(
+                f'COPY (SELECT id FROM ONLY {table_name}) '
+                f'TO STDOUT WITH BINARY'
+            ).encode(),
+            live_ids=True,
+        ))
+    else:
+        stmt = (
+            f'COPY {table_name} ({col_list}) TO STDOUT WITH BINARY'
+        ).encode()
 
     return [DumpBlockDescriptor(
         schema_object_id=source.id,
@@ -3577,7 +3848,25 @@ def _describe_object(
         type_desc_id=type_id,
         type_desc=type_data,
         sql_copy_stmt=stmt,
-    )] + ptrdesc
+    )] + live_ids + ptrdesc
+
+
+def _check_merge_layout(
+    schema: s_schema.Schema,
+    blocks: list[tuple[bytes, bytes]],
+    protocol_version: defines.ProtocolVersion,
+) -> None:
+    # The data of an incremental dump can only be merged into tables of
+    # the same layout, so the type descriptors of all blocks must match.
+    expected = {
+        block.schema_object_id.bytes: block.type_desc
+        for block in _describe_objects(schema, protocol_version)
+    }
+    if expected != dict(blocks):
+        raise errors.SchemaError(
+            'cannot merge the incremental dump: the schema of the branch '
+            'is different from the one of the dump, restore a full dump '
+            'instead')
 
 
 def _check_dump_layout(
@@ -3846,6 +4135,9 @@ class DumpBlockDescriptor(NamedTuple):
     type_desc_id: uuid.UUID
     type_desc: bytes
     sql_copy_stmt: bytes
+    #: Whether the block holds the ids of all the objects of the type
+    #: instead of their data, to find deleted objects in incremental dumps.
+    live_ids: bool = False
 
 
 class RestoreDescriptor(NamedTuple):
@@ -3854,6 +4146,10 @@ class RestoreDescriptor(NamedTuple):
     blocks: Sequence[RestoreBlockDescriptor]
     tables: Sequence[str]
     repopulate_units: Sequence[str]
+    #: When merging an incremental dump, SQL to run before restoring
+    #: the blocks, and to merge them into the tables afterwards.
+    merge_prepare_units: Sequence[str] = ()
+    merge_units: Sequence[str] = ()
 
 
 class DataMendingDescriptor(NamedTuple):
@@ -3881,3 +4177,5 @@ class RestoreBlockDescriptor(NamedTuple):
     #: this will contain the recursive descriptor on which parts of
     #: each datum need mending.
     data_mending_desc: tuple[Optional[DataMendingDescriptor], ...]
+    #: Whether this is for the live ids blocks of an incremental dump.
+    live_ids: bool = False
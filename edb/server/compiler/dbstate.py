@@ -136,6 +136,11 @@ class Query(BaseQuery):
     query_asts: Any = None
     run_and_rollback: bool = False
 
+    volatility: qltypes.Volatility = qltypes.Volatility.Volatile
+
+    # The id of the query in sys::QueryStats, if tracked.
+    stats_id: Optional[str] = None
+
 
 @dataclasses.dataclass(frozen=True, kw_only=True)
 class SimpleQuery(BaseQuery):
@@ -293,6 +298,10 @@ class QueryUnit:
     # True if it is safe to cache this unit.
     cacheable: bool = False
 
+    # Volatility of the query in this unit, if any.  Units compiled
+    # before this was tracked are considered volatile.
+    volatility: qltypes.Volatility = qltypes.Volatility.Volatile
+
     # If non-None, contains a name of the DB that is about to be
     # created/deleted. If it's the former, the IO process needs to
     # introspect the new db. If it's the later, the server should
@@ -379,6 +388,9 @@ class QueryUnit:
     run_and_rollback: bool = False
     append_tx_op: bool = False
 
+    # The id of the query in sys::QueryStats, if tracked.
+    stats_id: Optional[str] = None
+
     # Translation source map.
     source_map: Optional[pgcodegen.SourceMap] = None
     # For SQL queries, the length of the query prefix applied
@@ -533,6 +533,8 @@ def _start_migration(
             ql.target,
             base_schema=base_schema,
             testmode=ctx.is_testmode(),
+            trace_cache=ctx.compiler_state.get_sdl_trace_cache(
+                current_tx.get_global_schema(), ctx.branch_name),
         )
 
         if not (
@@ -577,6 +579,8 @@ def _populate_migration(
         schema,
         mstate.target_schema,
         guidance=mstate.guidance,
+        max_rename_candidates=compiler._get_config_val(
+            ctx, 'migration_max_rename_candidates'),
     )
     if debug.flags.delta_plan:
         debug.header('Populate Migration Diff')
@@ -694,6 +698,8 @@ def _describe_current_migration(
                 mstate.target_schema,
                 generate_prompts=True,
                 guidance=mstate.guidance,
+                max_rename_candidates=compiler._get_config_val(
+                    ctx, 'migration_max_rename_candidates'),
             )
             if debug.flags.delta_plan:
                 debug.header('DESCRIBE CURRENT MIGRATION AS JSON delta')
@@ -83,6 +83,7 @@ def __init_worker__(
     )
 
 
+@worker_proc.METRICS.phase('sync')
 def __sync__(client_id, pickled_schema, invalidation) -> None:
     global clients
 
@@ -49,6 +49,7 @@ import psutil
 
 from edb.common import debug
 from edb.common import lru
+from edb.common import sampler
 
 from edb.pgsql import params as pgparams
 
@@ -106,6 +107,7 @@ ADAPTIVE_SCALE_DOWN_WAIT_TIME: float = 60.0
 WORKER_PKG: str = __name__.rpartition('.')[0] + '.'
 DEFAULT_CLIENT: str = 'default'
 HIGH_RSS_GRACE_PERIOD: tuple[int, int] = (20 * 3600, 30 * 3600)
+WORKER_METRICS_INTERVAL: float = 15.0
 CURRENT_COMPILER_PROTOCOL = 2
 
 
@@ -183,6 +185,21 @@ class BaseWorker:
         *args: Any,
         sync_state: Optional[SyncStateCallback] = None,
     ) -> Any:
+        data = await self._call(method_name, args)
+        self._last_used = time.monotonic()
+        return self._unpack_result(data, sync_state)
+
+    async def call_control(self, method_name: str, *args: Any) -> Any:
+        # Unlike call(), doesn't count as a use of the worker, so
+        # collecting metrics or samples doesn't keep idle workers alive.
+        data = await self._call(method_name, args)
+        return self._unpack_result(data, None)
+
+    async def _call(
+        self,
+        method_name: str,
+        args: tuple[Any, ...],
+    ) -> memoryview:
         assert not self._closed
         assert self._con is not None
 
@@ -191,12 +208,15 @@ class BaseWorker:
                 'the connection to the compiler worker process is '
                 'unexpectedly closed')
 
-        data = await self._request(method_name, args)
+        return await self._request(method_name, args)
 
+    def _unpack_result(
+        self,
+        data: memoryview,
+        sync_state: Optional[SyncStateCallback],
+    ) -> Any:
         status, *result = pickle.loads(data)
 
-        self._last_used = time.monotonic()
-
         if status == 0:
             if sync_state is not None:
                 sync_state()
@@ -864,6 +884,7 @@ class AbstractPool[
         db_config_json: bytes,
         protocol_version: defines.ProtocolVersion,
         with_secrets: bool,
+        incremental_since: Optional[str] = None,
     ) -> compiler.DumpDescriptor:
         return await self._simple_call(
             'describe_database_dump',
@@ -872,6 +893,7 @@ class AbstractPool[
             db_config_json,
             protocol_version,
             with_secrets,
+            incremental_since,
         )
 
     async def describe_database_restore(
@@ -884,6 +906,7 @@ class AbstractPool[
         schema_ids: list[tuple[str, str, bytes]],
         blocks: list[tuple[bytes, bytes]],  # type_id, typespec
         protocol_version: defines.ProtocolVersion,
+        merge: bool = False,
     ) -> compiler.RestoreDescriptor:
         return await self._simple_call(
             'describe_database_restore',
@@ -895,6 +918,7 @@ class AbstractPool[
             schema_ids,
             blocks,
             protocol_version,
+            merge,
         )
 
     async def analyze_explain_output(
@@ -940,6 +964,12 @@ class AbstractPool[
     def refresh_metrics(self) -> None:
         pass
 
+    async def start_profiling(self, duration: float, interval: float) -> None:
+        pass
+
+    async def stop_profiling(self) -> dict[str, sampler.Samples]:
+        return {}
+
     def _maybe_update_last_active_time(self) -> None:
         if sys.exc_info()[0] is None:
             self._last_active_time = time.monotonic()
@@ -953,6 +983,25 @@ class AbstractPool[
         return True
 
 
+def _merge_worker_metrics(
+    pid: str,
+    deltas: dict[str, dict[str, float]],
+) -> None:
+    for method, count in deltas['requests'].items():
+        metrics.compiler_process_requests.inc(count, pid, method)
+    for phase, seconds in deltas['phase_seconds'].items():
+        if seconds > 0:
+            metrics.compiler_process_phase_duration.inc(seconds, pid, phase)
+    for generation, count in deltas['gc_collections'].items():
+        metrics.compiler_process_gc_collections.inc(count, pid, generation)
+    for generation, seconds in deltas['gc_seconds'].items():
+        metrics.compiler_process_gc_duration.inc(seconds, pid, generation)
+    for result, count in deltas['parse_cache'].items():
+        if count > 0:
+            metrics.compiler_process_parse_cache_lookups.inc(
+                count, pid, result)
+
+
 class BaseLocalPool[Worker_T: Worker, InitArgs_T](
     AbstractPool[Worker_T, InitArgs_T, bytes],
     amsg.ServerProtocol,
@@ -972,6 +1021,7 @@ class BaseLocalPool[Worker_T: Worker, InitArgs_T](
     _running: Optional[bool]
     _stats_spawned: int
     _stats_killed: int
+    _metrics_task: Optional[asyncio.Task[None]]
 
     def __init__(
         self,
@@ -1002,6 +1052,7 @@ class BaseLocalPool[Worker_T: Worker, InitArgs_T](
 
         self._stats_spawned = 0
         self._stats_killed = 0
+        self._metrics_task = None
 
     def _report_branch_request(
         self, worker: Worker_T, cache_hit: bool, client: str = DEFAULT_CLIENT
@@ -1074,6 +1125,11 @@ class BaseLocalPool[Worker_T: Worker, InitArgs_T](
         metrics.compiler_process_branches.clear(pid_filter)
         metrics.compiler_process_branch_actions.clear(pid_filter)
         metrics.compiler_process_client_actions.clear(pid_filter)
+        metrics.compiler_process_requests.clear(pid_filter)
+        metrics.compiler_process_phase_duration.clear(pid_filter)
+        metrics.compiler_process_gc_collections.clear(pid_filter)
+        metrics.compiler_process_gc_duration.clear(pid_filter)
+        metrics.compiler_process_parse_cache_lookups.clear(pid_filter)
 
     async def start(self) -> None:
         if self._running is not None:
@@ -1090,6 +1146,9 @@ class BaseLocalPool[Worker_T: Worker, InitArgs_T](
 
         await self._wait_ready()
 
+        self._metrics_task = self._loop.create_task(
+            self._collect_worker_metrics())
+
     async def _wait_ready(self) -> None:
         await asyncio.wait_for(
             self._ready_evt.wait(),
@@ -1140,6 +1199,10 @@ class BaseLocalPool[Worker_T: Worker, InitArgs_T](
             return
         self._running = False
 
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+
         assert self._server is not None
         await self._server.stop()
         self._server = None
@@ -1221,6 +1284,60 @@ class BaseLocalPool[Worker_T: Worker, InitArgs_T](
         for w in self._workers.values():
             metrics.compiler_process_memory.set(w.get_rss(), str(w.get_pid()))
 
+    async def _collect_worker_metrics(self) -> None:
+        while True:
+            await asyncio.sleep(WORKER_METRICS_INTERVAL)
+            # Like the profiling calls, these bypass the worker queue.
+            workers = list(self._workers.values())
+            results = await asyncio.gather(
+                *(w.call_control('__collect_metrics__') for w in workers),
+                return_exceptions=True,
+            )
+            for w, res in zip(workers, results):
+                if isinstance(res, BaseException):
+                    logger.debug(
+                        'could not collect metrics from compiler worker '
+                        '%d: %s',
+                        w.get_pid(), res,
+                    )
+                    continue
+                try:
+                    _merge_worker_metrics(str(w.get_pid()), res)
+                except Exception:
+                    logger.exception(
+                        'could not merge the metrics of compiler worker %d',
+                        w.get_pid(),
+                    )
+
+    async def start_profiling(self, duration: float, interval: float) -> None:
+        # The control calls bypass the worker queue: a busy worker handles
+        # them as soon as it is done with its current request.
+        await asyncio.gather(
+            *(
+                w.call_control('__start_profiling__', duration, interval)
+                for w in list(self._workers.values())
+            ),
+            return_exceptions=True,
+        )
+
+    async def stop_profiling(self) -> dict[str, sampler.Samples]:
+        workers = list(self._workers.values())
+        results = await asyncio.gather(
+            *(w.call_control('__stop_profiling__') for w in workers),
+            return_exceptions=True,
+        )
+        samples = {}
+        for w, res in zip(workers, results):
+            if isinstance(res, BaseException):
+                # The worker was restarted or killed in the meantime.
+                logger.debug(
+                    'could not collect samples from compiler worker %d: %s',
+                    w.get_pid(), res,
+                )
+            else:
+                samples[f'compiler worker {w.get_pid()}'] = res
+        return samples
+
     async def health_check(self) -> bool:
         if not (
             self._running
@@ -83,6 +83,7 @@ def __init_worker__(
     )
 
 
+@worker_proc.METRICS.phase('sync')
 def __sync__(
     dbname: str,
     evicted_dbs: list[str],
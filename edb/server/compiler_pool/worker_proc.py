@@ -17,7 +17,11 @@
 #
 
 
+from typing import Any, Iterator, Optional
+
 import argparse
+import collections
+import contextlib
 import gc
 import os
 import pickle
@@ -30,7 +34,10 @@ from edb.common import debug
 from edb.common import devmode
 from edb.common import markup
 from edb.common import lru
+from edb.common import sampler
 from edb.edgeql import parser as ql_parser
+from edb.schema import expr as s_expr
+from edb.schema import std as s_std
 
 from . import amsg
 
@@ -40,13 +47,130 @@ from . import amsg
 NUM_SPAWNS_RESET_INTERVAL = 1
 
 
+PROFILER = sampler.SamplingProfiler()
+
+
+class WorkerMetrics:
+    """Metrics of a worker process, collected periodically by the pool.
+
+    Every collection returns the changes since the previous one, which
+    the pool adds to its counters labeled with the worker PID.  The time
+    spent handling requests is split into phases: "sync" (unpickling
+    schema and state updates), "parse" (parsing schema expressions),
+    "compile" (the rest of the handler) and "pickle" (pickling the
+    result).
+    """
+
+    requests: collections.Counter[str]
+    phase_seconds: collections.defaultdict[str, float]
+    gc_collections: collections.Counter[str]
+    gc_seconds: collections.defaultdict[str, float]
+
+    def __init__(self) -> None:
+        self._reset()
+        self._gc_started: Optional[float] = None
+        self._parse_stats = s_expr.parse_cache.get_stats()
+
+    def _reset(self) -> None:
+        self.requests = collections.Counter()
+        self.phase_seconds = collections.defaultdict(float)
+        self.gc_collections = collections.Counter()
+        self.gc_seconds = collections.defaultdict(float)
+
+    def track_gc(self) -> None:
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase: str, info: dict[str, Any]) -> None:
+        if phase == 'start':
+            self._gc_started = time.perf_counter()
+        elif self._gc_started is not None:
+            generation = str(info['generation'])
+            self.gc_collections[generation] += 1
+            self.gc_seconds[generation] += (
+                time.perf_counter() - self._gc_started)
+            self._gc_started = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[name] += time.perf_counter() - started
+
+    def call(self, methname: str, meth: Any, args: tuple[Any, ...]) -> Any:
+        # The time spent in the handler, except for syncing the state,
+        # which the handler reports as a phase of its own.
+        started = time.perf_counter()
+        synced = self.phase_seconds['sync']
+        try:
+            return meth(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            elapsed -= self.phase_seconds['sync'] - synced
+            self.requests[methname] += 1
+            self.phase_seconds['compile'] += max(elapsed, 0.0)
+
+    def collect(self) -> dict[str, dict[str, float]]:
+        prev, stats = self._parse_stats, s_expr.parse_cache.get_stats()
+        self._parse_stats = stats
+        deltas: dict[str, dict[str, float]] = dict(
+            requests=dict(self.requests),
+            phase_seconds=dict(self.phase_seconds),
+            gc_collections=dict(self.gc_collections),
+            gc_seconds=dict(self.gc_seconds),
+            parse_cache=dict(
+                hit=stats['hits'] - prev['hits'],
+                miss=stats['misses'] - prev['misses'],
+            ),
+        )
+        # Expressions are parsed while compiling; report that separately.
+        phases = deltas['phase_seconds']
+        phases['parse'] = stats['parse_time'] - prev['parse_time']
+        phases['compile'] = max(
+            phases.get('compile', 0.0) - phases['parse'], 0.0)
+        self._reset()
+        return deltas
+
+
+METRICS = WorkerMetrics()
+
+
+def __start_profiling__(duration, interval):
+    global PROFILER
+    if PROFILER.is_running():
+        PROFILER.stop()
+    PROFILER = sampler.SamplingProfiler(interval=interval)
+    PROFILER.start(duration)
+
+
+def __stop_profiling__():
+    return PROFILER.stop()
+
+
+def __collect_metrics__():
+    return METRICS.collect()
+
+
+# Handled by every worker, initialized or not.
+CONTROL_HANDLERS = {
+    '__start_profiling__': __start_profiling__,
+    '__stop_profiling__': __stop_profiling__,
+    '__collect_metrics__': __collect_metrics__,
+}
+
+
 def worker(sockname, version_serial, get_handler):
     con = amsg.WorkerConnection(sockname, version_serial)
+    METRICS.track_gc()
     try:
         for req_id, req in con.iter_request():
             try:
                 methname, args = pickle.loads(req)
-                meth = get_handler(methname)
+                meth = CONTROL_HANDLERS.get(methname)
+                is_control = meth is not None
+                if meth is None:
+                    meth = get_handler(methname)
             except Exception as ex:
                 prepare_exception(ex)
                 if debug.flags.server:
@@ -54,7 +178,10 @@ def worker(sockname, version_serial, get_handler):
                 data = (1, ex, traceback.format_exc())
             else:
                 try:
-                    res = meth(*args)
+                    if is_control:
+                        res = meth(*args)
+                    else:
+                        res = METRICS.call(methname, meth, args)
                     data = (0, res)
                 except Exception as ex:
                     prepare_exception(ex)
@@ -63,7 +190,8 @@ def worker(sockname, version_serial, get_handler):
                     data = (1, ex, traceback.format_exc())
 
             try:
-                pickled = pickle.dumps(data, -1)
+                with METRICS.phase('pickle'):
+                    pickled = pickle.dumps(data, -1)
             except Exception as ex:
                 ex_tb = traceback.format_exc()
                 ex_str = f"{ex}:\n\n{ex_tb}"
@@ -71,6 +199,16 @@ def worker(sockname, version_serial, get_handler):
 
             con.reply(req_id, pickled)
 
+            if debug.flags.log_metrics:
+                stats = s_expr.parse_cache.get_stats()
+                debug.print(
+                    f'compiler worker {os.getpid()} parse cache: '
+                    f'{stats["hit_rate"]:.1%} hits '
+                    f'({stats["hits"]}/{stats["hits"] + stats["misses"]}), '
+                    f'{stats["time_saved"]:.3f}s saved, '
+                    f'{stats["parse_time"]:.3f}s parsing'
+                )
+
             # Now that we have responded, clear the compiler LRU
             # caches to avoid hanging onto heavy objects like schemas.
             lru.clear_lru_caches()
@@ -124,6 +262,9 @@ def main(get_handler):
     sys.setrecursionlimit(2000)
 
     ql_parser.preload_spec()
+    # Load the parsed std expressions before forking the workers, so that
+    # they share them.
+    s_std.load_std_parse_cache()
     gc.freeze()
 
     listen_for_debugger()
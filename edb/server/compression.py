@@ -0,0 +1,371 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Compression of binary protocol connections.
+
+Clients request it with the ``compression`` protocol extension of
+ClientHandshake, listing the algorithms they accept by order of
+preference in its ``algorithms`` annotation, e.g. ``zstd,lz4``.  The
+server picks the first one it supports and confirms it in the
+``algorithm`` annotation of the extension in ServerHandshake.  From
+then on, each direction of the connection is a single compressed stream:
+everything the client sends after ClientHandshake, and everything the
+server sends after ServerHandshake.  The server flushes its stream each
+time it flushes its write buffer, so compression does not delay any
+message.
+
+zstd and lz4 require the optional ``zstandard`` and ``lz4`` packages;
+deflate is always available.  The deflate stream is flushed without
+ending it, so that matches can refer to earlier data.  With zstd and
+lz4, each flush is sent as independent blocks of at most MAX_BLOCK_SIZE
+uncompressed bytes, each prefixed with its length as a big-endian
+uint32: a zstd frame that records its content size, or an lz4 block
+prefixed with its uncompressed size as a little-endian uint32.  The
+size of their output is then known before decompressing them.
+
+Compression is negotiated before authentication, so decompressors never
+produce much more output than asked for: a small input cannot make the
+server allocate a lot of memory at once.
+"""
+
+from __future__ import annotations
+from typing import (
+    Callable,
+    Iterable,
+    Optional,
+    Protocol,
+)
+
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore
+
+try:
+    import lz4.block as lz4_block
+except ImportError:
+    lz4_block = None  # type: ignore
+
+from . import metrics
+
+
+EXTENSION = 'compression'
+
+# The largest zstd or lz4 block, bigger flushes are split.
+MAX_BLOCK_SIZE = 4 * 1024 * 1024
+# An upper bound of the compressed size of a block, as neither format
+# expands incompressible data by more than that.
+MAX_COMPRESSED_BLOCK_SIZE = MAX_BLOCK_SIZE + MAX_BLOCK_SIZE // 128 + 1024
+
+Buffer = bytes | bytearray | memoryview
+
+
+class Compressor(Protocol):
+
+    def compress(self, data: Buffer) -> bytes:
+        """Compress *data* and flush it, so that the peer can read it."""
+        ...
+
+
+class Decompressor(Protocol):
+
+    def decompress(self, data: Buffer, max_length: int) -> bytes:
+        """Decompress *data* along with the input kept from earlier calls.
+
+        Returns at most *max_length* bytes, or a single block for zstd
+        and lz4, and keeps the rest of the input.
+        """
+        ...
+
+    @property
+    def pending(self) -> bool:
+        """Whether more output can be produced without more input."""
+        ...
+
+
+def _split_blocks(data: Buffer) -> Iterable[memoryview]:
+    view = memoryview(data)
+    for i in range(0, len(view), MAX_BLOCK_SIZE):
+        yield view[i:i + MAX_BLOCK_SIZE]
+
+
+class _ZstdCompressor:
+
+    def __init__(self, level: int) -> None:
+        self._cctx = zstandard.ZstdCompressor(
+            level=level, write_content_size=True)
+
+    def compress(self, data: Buffer) -> bytes:
+        out = []
+        for block in _split_blocks(data):
+            frame = self._cctx.compress(block)
+            out.append(len(frame).to_bytes(4, 'big'))
+            out.append(frame)
+        return b''.join(out)
+
+
+class _Lz4Compressor:
+
+    def __init__(self, level: int) -> None:
+        self._level = level
+
+    def compress(self, data: Buffer) -> bytes:
+        out = []
+        for block in _split_blocks(data):
+            compressed = lz4_block.compress(
+                block,
+                mode='fast',
+                acceleration=max(self._level, 1),
+                store_size=True,
+            )
+            out.append(len(compressed).to_bytes(4, 'big'))
+            out.append(compressed)
+        return b''.join(out)
+
+
+class _BlockDecompressor:
+    """Decompressor of length-prefixed blocks."""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+    def _decompress_block(self, block: memoryview) -> bytes:
+        raise NotImplementedError
+
+    @property
+    def pending(self) -> bool:
+        return (
+            len(self._buf) >= 4
+            and len(self._buf) - 4 >= int.from_bytes(self._buf[:4], 'big')
+        )
+
+    def decompress(self, data: Buffer, max_length: int) -> bytes:
+        self._buf += data
+        out = []
+        size = 0
+        pos = 0
+        with memoryview(self._buf) as view:
+            while size < max_length and len(view) - pos >= 4:
+                length = int.from_bytes(view[pos:pos + 4], 'big')
+                if length > MAX_COMPRESSED_BLOCK_SIZE:
+                    raise ValueError(
+                        f'compressed block is too large: {length} bytes')
+                if len(view) - pos - 4 < length:
+                    break
+                block = self._decompress_block(
+                    view[pos + 4:pos + 4 + length])
+                out.append(block)
+                size += len(block)
+                pos += 4 + length
+        del self._buf[:pos]
+        return b''.join(out)
+
+
+class _ZstdDecompressor(_BlockDecompressor):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._dctx = zstandard.ZstdDecompressor()
+
+    def _decompress_block(self, block: memoryview) -> bytes:
+        size = zstandard.frame_content_size(block)
+        if size < 0 or size > MAX_BLOCK_SIZE:
+            raise ValueError(f'invalid zstd frame content size: {size}')
+        return self._dctx.decompress(block, max_output_size=MAX_BLOCK_SIZE)
+
+
+class _Lz4Decompressor(_BlockDecompressor):
+
+    def _decompress_block(self, block: memoryview) -> bytes:
+        size = int.from_bytes(block[:4], 'little')
+        if size > MAX_BLOCK_SIZE:
+            raise ValueError(f'lz4 block is too large: {size} bytes')
+        return lz4_block.decompress(block)
+
+
+class _DeflateCompressor:
+
+    def __init__(self, level: int) -> None:
+        self._obj = zlib.compressobj(level, wbits=-zlib.MAX_WBITS)
+
+    def compress(self, data: Buffer) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+
+class _DeflateDecompressor:
+
+    def __init__(self) -> None:
+        self._obj = zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+        self._capped = False
+
+    @property
+    def pending(self) -> bool:
+        # Output may remain in zlib even when all the input was consumed.
+        return self._capped or bool(self._obj.unconsumed_tail)
+
+    def decompress(self, data: Buffer, max_length: int) -> bytes:
+        if self._obj.unconsumed_tail:
+            data = self._obj.unconsumed_tail + data
+        out = self._obj.decompress(data, max_length)
+        self._capped = len(out) == max_length
+        return out
+
+
+class Algorithm:
+
+    def __init__(
+        self,
+        name: str,
+        compressor: Callable[[int], Compressor],
+        decompressor: Callable[[], Decompressor],
+        level: int,
+        available: bool,
+    ) -> None:
+        self.name = name
+        self.level = level
+        self.available = available
+        self._compressor = compressor
+        self._decompressor = decompressor
+
+    def new_compressor(self, level: Optional[int] = None) -> Compressor:
+        return self._compressor(self.level if level is None else level)
+
+    def new_decompressor(self) -> Decompressor:
+        return self._decompressor()
+
+
+# By order of preference of the server.  The levels favor speed: the
+# point is to save bandwidth without becoming CPU bound.
+ALGORITHMS: dict[str, Algorithm] = {
+    algo.name: algo
+    for algo in (
+        Algorithm('zstd', _ZstdCompressor, _ZstdDecompressor,
+                  level=3, available=zstandard is not None),
+        Algorithm('lz4', _Lz4Compressor, _Lz4Decompressor,
+                  level=1, available=lz4_block is not None),
+        Algorithm('deflate', _DeflateCompressor, _DeflateDecompressor,
+                  level=1, available=True),
+    )
+}
+
+
+def get_available() -> list[str]:
+    return [name for name, algo in ALGORITHMS.items() if algo.available]
+
+
+def negotiate(requested: str, allowed: Iterable[str]) -> Optional[str]:
+    """Pick the algorithm to use for a connection.
+
+    *requested* is the comma separated list of the client, by order of
+    preference, and *allowed* the algorithms enabled on the server.
+    """
+    allowed = frozenset(allowed)
+    for name in requested.split(','):
+        name = name.strip().lower()
+        algo = ALGORITHMS.get(name)
+        if algo is not None and algo.available and name in allowed:
+            return name
+    return None
+
+
+def compress_block(algorithm: str, data: Buffer) -> tuple[bytes, int]:
+    """Compress a dump block, returning it with the CRC32 of *data*.
+
+    Releases the GIL for most of the work, so it is worth running in a
+    thread.
+    """
+    out = ALGORITHMS[algorithm].new_compressor().compress(data)
+    return out, zlib.crc32(data)
+
+
+def decompress_block(algorithm: str, data: Buffer, checksum: int) -> bytes:
+    """Decompress a dump block and verify its checksum.
+
+    Raises ValueError if the block cannot be decompressed or if it does
+    not match the checksum.
+    """
+    algo = ALGORITHMS.get(algorithm)
+    if algo is None or not algo.available:
+        raise ValueError(
+            f'compression algorithm {algorithm!r} is not available')
+    try:
+        # Dumps are restored by authenticated superusers, so the size of
+        # blocks is not limited.
+        decompressor = algo.new_decompressor()
+        chunks = [decompressor.decompress(data, MAX_BLOCK_SIZE)]
+        while decompressor.pending:
+            chunks.append(decompressor.decompress(b'', MAX_BLOCK_SIZE))
+        out = b''.join(chunks)
+    except Exception as e:
+        raise ValueError(f'cannot decompress {algorithm} data: {e}') from e
+    if zlib.crc32(out) != checksum:
+        raise ValueError('checksum mismatch')
+    return out
+
+
+class CompressedStream:
+    """Both directions of a compressed connection."""
+
+    def __init__(self, algorithm: str, *, tenant_label: str) -> None:
+        algo = ALGORITHMS[algorithm]
+        self.algorithm = algorithm
+        self._compressor = algo.new_compressor()
+        self._decompressor = algo.new_decompressor()
+        self._tenant_label = tenant_label
+        self.raw_bytes_sent = 0
+        self.wire_bytes_sent = 0
+        self.raw_bytes_received = 0
+        self.wire_bytes_received = 0
+
+    def compress(self, data: Buffer) -> bytes:
+        out = self._compressor.compress(data)
+        raw = len(data)
+        self.raw_bytes_sent += raw
+        self.wire_bytes_sent += len(out)
+        metrics.client_compression_raw_bytes.inc(
+            raw, self._tenant_label, self.algorithm, 'sent')
+        metrics.client_compression_wire_bytes.inc(
+            len(out), self._tenant_label, self.algorithm, 'sent')
+        return out
+
+    @property
+    def pending(self) -> bool:
+        """Whether decompress() would return more data without input."""
+        return self._decompressor.pending
+
+    def decompress(self, data: Buffer, max_length: int) -> bytes:
+        out = self._decompressor.decompress(data, max_length)
+        self.raw_bytes_received += len(out)
+        self.wire_bytes_received += len(data)
+        metrics.client_compression_raw_bytes.inc(
+            len(out), self._tenant_label, self.algorithm, 'received')
+        metrics.client_compression_wire_bytes.inc(
+            len(data), self._tenant_label, self.algorithm, 'received')
+        return out
+
+    def get_ratio(self) -> float:
+        """The compression ratio of what was sent to the client."""
+        if not self.wire_bytes_sent:
+            return 1.0
+        return self.raw_bytes_sent / self.wire_bytes_sent
+
+    def on_connection_lost(self) -> None:
+        metrics.client_compression_ratio.observe(
+            self.get_ratio(), self._tenant_label, self.algorithm)
@@ -17,7 +17,9 @@
 #
 import os
 from .pool import Pool as Pool1Impl, _NaivePool  # NoQA
+from .pool import AffinityPolicy
 from .pool2 import Pool as Pool2Impl
+from .predictor import DemandPredictor
 
 # During the transition period we allow for the pool to be swapped out. The
 # current default is to use the old pool, however this will be switched to use
@@ -25,9 +27,34 @@ from .pool2 import Pool as Pool2Impl
 if os.environ.get("EDGEDB_USE_NEW_CONNPOOL", "") == "1":
     Pool = Pool2Impl
     Pool2 = Pool1Impl
+    _IS_POOL1 = False
 else:
     # The two pools have the same effective type shape
     Pool = Pool1Impl  # type: ignore
     Pool2 = Pool2Impl  # type: ignore
+    _IS_POOL1 = True
 
-__all__ = ('Pool', 'Pool2')
+# Predictive pre-warming of backend connections is opt-in, and only
+# implemented by the Python pool.
+PREWARM_ENABLED = (
+    _IS_POOL1
+    and os.environ.get("EDGEDB_CONNPOOL_PREWARM", "") == "1"
+)
+
+# Branch-affinity scheduling of a starving pool is opt-in as well.
+AFFINITY_ENABLED = (
+    _IS_POOL1
+    and os.environ.get("EDGEDB_CONNPOOL_AFFINITY", "") == "1"
+)
+
+# So is preferring idle connections that already have the statement to run
+# prepared.
+STMT_AFFINITY_ENABLED = (
+    _IS_POOL1
+    and os.environ.get("EDGEDB_CONNPOOL_STMT_AFFINITY", "") == "1"
+)
+
+__all__ = (
+    'Pool', 'Pool2', 'DemandPredictor', 'AffinityPolicy',
+    'PREWARM_ENABLED', 'AFFINITY_ENABLED', 'STMT_AFFINITY_ENABLED',
+)
@@ -23,5 +23,6 @@ MIN_LOG_TIME_THRESHOLD = 1
 MIN_IDLE_TIME_BEFORE_GC = 120
 CONNECT_FAILURE_RETRIES = 3
 STATS_COLLECT_INTERVAL = 0.1
+PREFERRED_CONN_SCAN_DEPTH = 8
 
 logger = logging.getLogger("edb.server")
@@ -23,10 +23,12 @@ import typing
 import asyncio
 import collections
 import dataclasses
+import math
 import time
 
 from . import rolavg
 from . import config
+from . import predictor as predictor_mod
 from .config import logger
 
 CP1 = typing.TypeVar('CP1', covariant=True)
@@ -51,6 +53,24 @@ class StatsCollector(typing.Protocol):
         pass
 
 
+class MetricsCollector(typing.Protocol):
+    # Receives per-block timings as they happen, so that the owner of the
+    # pool can export them (e.g. as Prometheus histograms).
+
+    def on_acquire(self, dbname: str, wait_time: float) -> None:
+        pass
+
+    def on_connect(self, dbname: str, duration: float) -> None:
+        pass
+
+    def on_transfer(self, dbname: str, duration: float) -> None:
+        pass
+
+    def on_steal(self, dbname: str) -> None:
+        # dbname is the block the connection was stolen from.
+        pass
+
+
 @dataclasses.dataclass
 class BlockSnapshot:
     dbname: str
@@ -87,6 +107,29 @@ class ConnectionState:
     in_use_since: float = 0
     in_use: bool = False
     in_stack_since: float = 0
+    connected_at: float = 0
+
+
+@dataclasses.dataclass(frozen=True)
+class AffinityPolicy:
+    # Parameters of the branch-affinity scheduling in a starving pool
+    # (Mode D), where the regular round-robin would transfer a connection
+    # to another block on almost every release. All the durations are
+    # expressed in multiples of the average connection time, i.e. of the
+    # cost of a transfer.
+
+    # A connection keeps serving the waiters of its block for at least this
+    # long before it can be transferred to another block.
+    hold_time: float = 4
+    # A block without connections receives a transferred one as soon as it
+    # has this many waiters...
+    batch_size: int = 2
+    # ... or after its first waiter waited this long.
+    max_delay: float = 4
+    # A block that already has connections only receives a transferred one
+    # if its waiters would otherwise wait longer than this (estimated from
+    # the average query time).
+    max_backlog: float = 2
 
 
 class Block[C]:
@@ -119,13 +162,19 @@ class Block[C]:
     conn_acquired_num: int
     conn_waiters_num: int
     conn_waiters: collections.deque[asyncio.Future[None]]
+    waiting_since: float
     conn_stack: collections.deque[C]
     connect_failures_num: int
 
     querytime_avg: rolavg.RollingAverage
     nwaiters_avg: rolavg.RollingAverage
+    acquire_wait_avg: rolavg.RollingAverage
     suppressed: bool
 
+    nconnects: int
+    ntransfers_in: int
+    nstolen: int
+
     _cached_calibrated_demand: float
 
     _is_log_batching: bool
@@ -148,13 +197,19 @@ class Block[C]:
         self.conn_acquired_num = 0
         self.conn_waiters_num = 0
         self.conn_waiters = collections.deque()
+        self.waiting_since = 0
         self.conn_stack = collections.deque()
         self.connect_failures_num = 0
 
         self.querytime_avg = rolavg.RollingAverage(history_size=20)
         self.nwaiters_avg = rolavg.RollingAverage(history_size=3)
+        self.acquire_wait_avg = rolavg.RollingAverage(history_size=20)
         self.suppressed = False
 
+        self.nconnects = 0
+        self.ntransfers_in = 0
+        self.nstolen = 0
+
         self._is_log_batching = False
         self._last_log_timestamp = 0
         self._log_events = {}
@@ -219,7 +274,14 @@ class Block[C]:
 
         return self.conn_stack.popleft()
 
-    async def try_acquire(self, *, attempts: int = 1) -> typing.Optional[C]:
+    async def try_acquire(
+        self,
+        *,
+        attempts: int = 1,
+        prefer: typing.Optional[typing.Callable[[C], bool]] = None,
+    ) -> typing.Optional[C]:
+        if not self.conn_waiters_num:
+            self.waiting_since = time.monotonic()
         self.conn_waiters_num += 1
         try:
             # Skip the waiters' queue if we can grab a connection from the
@@ -263,17 +325,38 @@ class Block[C]:
             # woken up with an empty queue -- hence the 'try'.
             # acquire will put a while loop around this
 
-            # Yield the most recently used connection from the top of the stack
             if self.conn_stack:
-                return self.conn_stack.pop()
+                return self._pop_conn(prefer)
             else:
                 return None
         finally:
             self.conn_waiters_num -= 1
 
-    async def acquire(self) -> C:
+    def _pop_conn(
+        self, prefer: typing.Optional[typing.Callable[[C], bool]]
+    ) -> C:
+        # Yield the most recently used connection from the top of the stack,
+        # unless one of the next few connections is preferred by the caller
+        # (e.g. because it has the statement to run already prepared). Only
+        # the top of the stack is searched, so that the least recently used
+        # connections stay at the bottom for the GC.
+        stack = self.conn_stack
+        if prefer is not None:
+            depth = min(len(stack), config.PREFERRED_CONN_SCAN_DEPTH)
+            for i in range(1, depth + 1):
+                conn = stack[-i]
+                if prefer(conn):
+                    del stack[-i]
+                    return conn
+        return stack.pop()
+
+    async def acquire(
+        self, prefer: typing.Optional[typing.Callable[[C], bool]] = None
+    ) -> C:
         attempts = 1
-        while (c := await self.try_acquire(attempts=attempts)) is None:
+        while (
+            c := await self.try_acquire(attempts=attempts, prefer=prefer)
+        ) is None:
             attempts += 1
         return c
 
@@ -344,6 +427,7 @@ class BasePool[C]:
     _connect_cb: Connector[C]
     _disconnect_cb: Disconnector[C]
     _stats_cb: typing.Optional[StatsCollector]
+    _metrics_cb: typing.Optional[MetricsCollector]
 
     _max_capacity: int  # total number of connections allowed in the pool
     _cur_capacity: int  # counter of all connections (with pending) in the pool
@@ -374,10 +458,12 @@ class BasePool[C]:
         disconnect: Disconnector[C],
         max_capacity: int,
         stats_collector: typing.Optional[StatsCollector]=None,
+        metrics_collector: typing.Optional[MetricsCollector]=None,
     ) -> None:
         self._connect_cb = connect
         self._disconnect_cb = disconnect
         self._stats_cb = stats_collector
+        self._metrics_cb = metrics_collector
 
         self._max_capacity = max_capacity
         self._cur_capacity = 0
@@ -457,6 +543,36 @@ class BasePool[C]:
             successful_disconnects=self._successful_disconnects,
         )
 
+    def get_block_table(self) -> list[dict[str, typing.Any]]:
+        # A detailed dump of the live per-block state, for debugging.
+        now = time.monotonic()
+        table: list[dict[str, typing.Any]] = []
+        for block in self._blocks.values():
+            table.append(dict(
+                dbname=block.dbname,
+                quota=block.quota,
+                nconns=len(block.conns),
+                npending=block.count_pending_conns(),
+                nqueued=block.count_queued_conns(),
+                nacquired=block.conn_acquired_num,
+                nwaiters=block.count_waiters(),
+                nwaiters_avg=block.nwaiters_avg.avg(),
+                querytime_avg=block.querytime_avg.avg(),
+                acquire_wait_avg=block.acquire_wait_avg.avg(),
+                nconnects=block.nconnects,
+                ntransfers_in=block.ntransfers_in,
+                nstolen=block.nstolen,
+                connect_failures=block.connect_failures_num,
+                suppressed=block.suppressed,
+                since_last_connect=(
+                    now - block.last_connect_timestamp
+                    if block.last_connect_timestamp
+                    else None
+                ),
+            ))
+        table.sort(key=lambda b: b['dbname'])
+        return table
+
     def _capture_snapshot(self, *, now: float) -> None:
         if self._stats_cb is None:
             return None
@@ -557,8 +673,18 @@ class BasePool[C]:
             self._conntime_avg.add(ended_at - started_at)
             block.pending_conns -= 1
         self._successful_connects += 1
-        block.conns[conn] = ConnectionState()
+        block.conns[conn] = ConnectionState(connected_at=ended_at)
         block.last_connect_timestamp = ended_at
+        if event == 'transferred in':
+            block.ntransfers_in += 1
+            if self._metrics_cb is not None:
+                self._metrics_cb.on_transfer(
+                    block.dbname, ended_at - started_at)
+        else:
+            block.nconnects += 1
+            if self._metrics_cb is not None:
+                self._metrics_cb.on_connect(
+                    block.dbname, ended_at - started_at)
 
         # Release the connection to block waiters.
         block.release(conn)
@@ -678,6 +804,9 @@ class Pool[C](BasePool[C]):
     _to_drop: list[Block[C]]
     _gc_interval: float  # minimum seconds between GC runs
     _gc_requests: int  # number of GC requests
+    _predictor: typing.Optional[predictor_mod.DemandPredictor]
+    _hprewarm: typing.Optional[asyncio.TimerHandle]
+    _affinity: typing.Optional[AffinityPolicy]
 
     def __init__(
         self,
@@ -687,11 +816,15 @@ class Pool[C](BasePool[C]):
         max_capacity: int,
         stats_collector: typing.Optional[StatsCollector]=None,
         min_idle_time_before_gc: float = config.MIN_IDLE_TIME_BEFORE_GC,
+        metrics_collector: typing.Optional[MetricsCollector]=None,
+        predictor: typing.Optional[predictor_mod.DemandPredictor]=None,
+        affinity: typing.Optional[AffinityPolicy]=None,
     ) -> None:
         super().__init__(
             connect=connect,
             disconnect=disconnect,
             stats_collector=stats_collector,
+            metrics_collector=metrics_collector,
             max_capacity=max_capacity,
         )
 
@@ -705,6 +838,15 @@ class Pool[C](BasePool[C]):
         self._to_drop = []
         self._gc_interval = min_idle_time_before_gc
         self._gc_requests = 0
+        self._predictor = predictor
+        self._hprewarm = None
+        self._affinity = affinity
+
+    async def close(self) -> None:
+        if self._hprewarm is not None:
+            self._hprewarm.cancel()
+            self._hprewarm = None
+        await super().close()
 
     def _maybe_schedule_tick(self) -> None:
         if self._first_tick:
@@ -844,7 +986,13 @@ class Pool[C](BasePool[C]):
                     self._log_to_snapshot(
                         dbname=block.dbname, event='reset-quota')
 
-            if not was_starving and self._new_blocks_waitlist:
+            if self._affinity is not None:
+                # Instead of waiting for releases in a round-robin fashion,
+                # feed the blocks that have accumulated enough waiters with
+                # the idle connections of the other blocks.
+                self._feed_neediest_blocks()
+
+            elif not was_starving and self._new_blocks_waitlist:
                 # Mode D assumes all connections are already in use or to be
                 # used, depending on their `release()` to schedule transfers.
                 # When just entering Mode D, there can be a special case when
@@ -939,7 +1087,11 @@ class Pool[C](BasePool[C]):
                 reverse=True
             )
 
-    def _should_free_conn(self, from_block: Block[C]) -> bool:
+    def _should_free_conn(
+        self,
+        from_block: Block[C],
+        conn: typing.Optional[C] = None,
+    ) -> bool:
         # First, if we only manage one connection to one PostgreSQL DB --
         # we don't need to bother with rebalancing the pool. So we bail out.
         if len(self._blocks) <= 1:
@@ -985,6 +1137,20 @@ class Pool[C](BasePool[C]):
         ):
             return False
 
+        # Finally, with branch affinity, a starving pool doesn't take the
+        # connection away from a block that still has waiters, until the
+        # connection has served the block for long enough to amortize the
+        # cost of the transfer.
+        if (
+            self._affinity is not None and
+            self._is_starving and
+            conn is not None and
+            from_block.count_waiters() and
+            (time.monotonic() - from_block.conns[conn].connected_at) <
+                self._affinity.hold_time * self._get_conntime()
+        ):
+            return False
+
         return True
 
     def _maybe_free_into_starving_blocks(
@@ -992,7 +1158,10 @@ class Pool[C](BasePool[C]):
         from_block: Block[C],
         conn: C,
     ) -> bool:
-        label, to_block = self._find_most_starving_block()
+        if self._affinity is not None and self._is_starving:
+            label, to_block = self._find_neediest_block(from_block)
+        else:
+            label, to_block = self._find_most_starving_block()
         if to_block is None or to_block is from_block:
             return False
         assert label is not None
@@ -1024,16 +1193,26 @@ class Pool[C](BasePool[C]):
     def _try_steal_conn(self, for_block: Block[C]) -> bool:
         if not self._blocks_over_quota:
             return False
+        if self._affinity is not None and self._is_starving:
+            # Starving blocks are fed by _feed_neediest_blocks() instead.
+            return False
         for block in self._blocks_over_quota:
             if block is for_block or not self._should_free_conn(block):
                 continue
-            if (conn := block.try_steal()) is not None:
-                self._log_to_snapshot(
-                    dbname=block.dbname, event='conn-stolen')
-                self._schedule_transfer(block, conn, for_block)
+            if self._steal_conn_from(block, for_block):
                 return True
         return False
 
+    def _steal_conn_from(self, block: Block[C], for_block: Block[C]) -> bool:
+        if (conn := block.try_steal()) is None:
+            return False
+        self._log_to_snapshot(dbname=block.dbname, event='conn-stolen')
+        block.nstolen += 1
+        if self._metrics_cb is not None:
+            self._metrics_cb.on_steal(block.dbname)
+        self._schedule_transfer(block, conn, for_block)
+        return True
+
     def _find_most_starving_block(
         self,
     ) -> tuple[typing.Optional[str], typing.Optional[Block[C]]]:
@@ -1087,7 +1266,94 @@ class Pool[C](BasePool[C]):
 
         return None, None
 
-    async def _acquire(self, dbname: str) -> C:
+    def _get_conntime(self) -> float:
+        return max(self._conntime_avg.avg(), config.MIN_CONN_TIME_THRESHOLD)
+
+    def _find_neediest_block(
+        self,
+        from_block: typing.Optional[Block[C]] = None,
+    ) -> tuple[typing.Optional[str], typing.Optional[Block[C]]]:
+        # The branch-affinity counterpart of _find_most_starving_block():
+        # a connection is only worth transferring to a block without
+        # connections that has accumulated a batch of waiters (so that one
+        # reconnect serves several requests) or waited for too long, or to
+        # a block whose connections can't serve its waiters in time.
+        assert self._affinity is not None
+        conntime = self._get_conntime()
+        max_wait_since = (
+            time.monotonic() - self._affinity.max_delay * conntime
+        )
+        max_backlog = self._affinity.max_backlog * conntime
+
+        revive_block = None
+        redist_block = None
+        max_backlog_found: float = 0
+        for block in self._blocks.values():
+            nwaiters = block.count_waiters()
+            if block is from_block or not nwaiters or block.suppressed:
+                continue
+            nconns = block.count_conns()
+            if not nconns:
+                if (
+                    nwaiters < self._affinity.batch_size and
+                    block.waiting_since > max_wait_since
+                ):
+                    continue
+                # Serve the blocks without connections in the order in
+                # which they started waiting.
+                if (
+                    revive_block is None or
+                    block.waiting_since < revive_block.waiting_since
+                ):
+                    revive_block = block
+            elif revive_block is None:
+                backlog = nwaiters * max(
+                    block.querytime_avg.avg(), config.MIN_QUERY_TIME_THRESHOLD
+                ) / nconns
+                if backlog > max_backlog and backlog > max_backlog_found:
+                    max_backlog_found = backlog
+                    redist_block = block
+
+        if revive_block is not None:
+            return 'revive-conn', revive_block
+        elif redist_block is not None:
+            return 'redist-conn', redist_block
+        else:
+            return None, None
+
+    def _feed_neediest_blocks(self) -> None:
+        # Transfer the least recently used idle connections of the blocks
+        # without waiters to the blocks found by _find_neediest_block().
+        while True:
+            label, to_block = self._find_neediest_block()
+            if to_block is None:
+                return
+            assert label is not None
+
+            from_block = None
+            oldest: float = 0
+            for block in self._blocks.values():
+                if block is to_block or block.count_waiters():
+                    continue
+                if block.conn_stack:
+                    in_stack_since = (
+                        block.conns[block.conn_stack[0]].in_stack_since)
+                    if from_block is None or in_stack_since < oldest:
+                        from_block = block
+                        oldest = in_stack_since
+            if from_block is None:
+                return
+
+            stolen = self._steal_conn_from(from_block, to_block)
+            assert stolen
+            self._log_to_snapshot(
+                dbname=to_block.dbname, event=label, value=1)
+
+    async def _acquire(
+        self,
+        dbname: str,
+        prefer: typing.Optional[typing.Callable[[C], bool]],
+    ) -> C:
         block = self._get_block(dbname)
         block.suppressed = False
 
@@ -1116,7 +1382,7 @@ class Pool[C](BasePool[C]):
                 # Block has no connections at all, or not enough connections.
                 self._schedule_new_conn(block)
 
-            return await block.acquire()
+            return await block.acquire(prefer)
 
         if not block_nconns:
             # This is a block without any connections.
@@ -1124,15 +1390,80 @@ class Pool[C](BasePool[C]):
             # reallocated for this block.
             if not self._try_steal_conn(block):
                 self._new_blocks_waitlist[block] = True
-            return await block.acquire()
+            return await block.acquire(prefer)
 
         if block_nconns < block.quota:
             # Let's see if we can steal a connection from some block
             # that's over quota and open a new one.
             self._try_steal_conn(block)
-            return await block.acquire()
+            return await block.acquire(prefer)
+
+        return await block.acquire(prefer)
 
-        return await block.acquire()
+    def _maybe_schedule_prewarm(self) -> None:
+        if self._hprewarm is not None or not self._running:
+            return
+        assert self._predictor is not None
+        self._hprewarm = self._get_loop().call_later(
+            self._predictor.interval, self._prewarm
+        )
+
+    def _prewarm(self) -> None:
+        # Open (or transfer) connections to the blocks that are predicted to
+        # be busy soon, but only using the spare capacity of the pool or the
+        # idle connections of blocks that have more than they will need.
+        self._hprewarm = None
+        assert self._predictor is not None
+
+        predictions = list(self._predictor.iter_predictions())
+        if not predictions:
+            # Nothing to predict until the next acquire()
+            return
+        self._maybe_schedule_prewarm()
+
+        if self._is_starving:
+            # All the connections are in demand right now.
+            return
+
+        expected: dict[str, int] = {}
+        for dbname, rate in predictions:
+            block = self._blocks.get(dbname)
+            querytime = block.querytime_avg.avg() if block is not None else 0
+            expected[dbname] = min(
+                math.ceil(
+                    rate * max(querytime, config.MIN_QUERY_TIME_THRESHOLD)
+                ),
+                self._predictor.max_conns_per_block,
+            )
+
+        for dbname, nconns in sorted(
+            expected.items(), key=lambda e: e[1], reverse=True
+        ):
+            block = self._get_block(dbname)
+            if block.suppressed:
+                continue
+            while block.count_conns() < nconns:
+                if self._cur_capacity < self._max_capacity:
+                    self._schedule_new_conn(block, 'prewarmed')
+                elif not self._steal_idle_conn(block, expected):
+                    # No spare connections left anywhere.
+                    return
+
+    def _steal_idle_conn(
+        self,
+        for_block: Block[C],
+        expected: dict[str, int],
+    ) -> bool:
+        for block in self._blocks.values():
+            if (
+                block is for_block
+                or block.count_waiters()
+                or block.count_conns() <= expected.get(block.dbname, 0)
+            ):
+                continue
+            if self._steal_conn_from(block, for_block):
+                return True
+        return False
 
     def _run_gc(self) -> None:
         loop = self._get_loop()
@@ -1159,15 +1490,30 @@ class Pool[C](BasePool[C]):
             while (conn := block.try_steal(only_older_than)) is not None:
                 self._schedule_discard(block, conn)
 
-    async def acquire(self, dbname: str) -> C:
+    async def acquire(
+        self,
+        dbname: str,
+        *,
+        prefer: typing.Optional[typing.Callable[[C], bool]] = None,
+    ) -> C:
+        # If prefer is given, an idle connection for which it returns True
+        # is handed out before the most recently used one.
         self._nacquires += 1
         self._maybe_schedule_tick()
+        started_at = time.monotonic()
         try:
-            conn = await self._acquire(dbname)
+            conn = await self._acquire(dbname, prefer)
         finally:
             self._nacquires -= 1
 
         block = self._blocks[dbname]
+        wait_time = time.monotonic() - started_at
+        block.acquire_wait_avg.add(wait_time)
+        if self._metrics_cb is not None:
+            self._metrics_cb.on_acquire(dbname, wait_time)
+        if self._predictor is not None:
+            self._predictor.on_acquire(dbname)
+            self._maybe_schedule_prewarm()
         assert not block.conns[conn].in_use
         block.inc_acquire_counter()
         block.conns[conn].in_use = True
@@ -1205,6 +1551,10 @@ class Pool[C](BasePool[C]):
 
         self._maybe_schedule_tick()
 
+        if self._affinity is not None and self._is_starving:
+            self._release_with_affinity(block, conn, discard)
+            return
+
         if not (
             self._should_free_conn(block)
             and self._maybe_free_into_starving_blocks(block, conn)
@@ -1218,6 +1568,28 @@ class Pool[C](BasePool[C]):
             else:
                 self._release_unused(block, conn)
 
+    def _release_with_affinity(
+        self, block: Block[C], conn: C, discard: bool
+    ) -> None:
+        # A released connection stays in its block, unless it has been
+        # serving the waiters of the block for too long and another block
+        # needs it more. The other blocks in need are fed with the least
+        # recently used idle connections instead, so that the connections
+        # of the busy blocks are not moved around.
+        if (
+            block.count_waiters()
+            and self._should_free_conn(block, conn)
+            and self._maybe_free_into_starving_blocks(block, conn)
+        ):
+            return
+
+        if discard:
+            self._schedule_discard(block, conn)
+            self._schedule_new_conn(block)
+        else:
+            self._release_unused(block, conn)
+        self._feed_neediest_blocks()
+
     def _release_unused(self, block: Block[C], conn: C) -> None:
         block.release(conn)
 
@@ -1239,6 +1611,8 @@ class Pool[C](BasePool[C]):
         # actually tries to connect.
         # TODO: Is it possible to safely drop the block?
         block.suppressed = True
+        if self._predictor is not None:
+            self._predictor.forget(dbname)
 
         conns = []
         while (conn := block.try_steal()) is not None:
@@ -1291,11 +1665,13 @@ class _NaivePool[C](BasePool[C]):
         max_capacity: int,
         stats_collector: typing.Optional[StatsCollector]=None,
         min_idle_time_before_gc: float = config.MIN_IDLE_TIME_BEFORE_GC,
+        metrics_collector: typing.Optional[MetricsCollector]=None,
     ) -> None:
         super().__init__(
             connect=connect,
             disconnect=disconnect,
             stats_collector=stats_collector,
+            metrics_collector=metrics_collector,
             max_capacity=max_capacity,
         )
         self._conns = {}
@@ -1343,7 +1719,12 @@ class _NaivePool[C](BasePool[C]):
                 self._blocks.move_to_end(block.dbname, last=True)
                 return
 
-    async def acquire(self, dbname: str) -> C:
+    async def acquire(
+        self,
+        dbname: str,
+        *,
+        prefer: typing.Optional[typing.Callable[[C], bool]] = None,
+    ) -> C:
         self._maybe_tick()
 
         block = self._get_block(dbname)
@@ -1356,7 +1737,7 @@ class _NaivePool[C](BasePool[C]):
             # in `release()`, because it would hang if no other block releases.
             await self._steal_conn(block)
 
-        return await block.acquire()
+        return await block.acquire(prefer)
 
     def release(self, dbname: str, conn: C) -> None:
         self._maybe_tick()
@@ -79,6 +79,22 @@ class StatsCollector(typing.Protocol):
         pass
 
 
+class MetricsCollector(typing.Protocol):
+
+    def on_acquire(self, dbname: str, wait_time: float) -> None:
+        pass
+
+    def on_connect(self, dbname: str, duration: float) -> None:
+        pass
+
+    def on_transfer(self, dbname: str, duration: float) -> None:
+        pass
+
+    def on_steal(self, dbname: str) -> None:
+        # dbname is the block the connection was stolen from.
+        pass
+
+
 # Connections must be hashable because we use them to reverse-lookup
 # an internal ID.
 class Pool[C: typing.Hashable]:
@@ -94,11 +110,13 @@ class Pool[C: typing.Hashable]:
     _acquires: dict[int, asyncio.Future[int]]
     _prunes: dict[int, asyncio.Future[None]]
     _conns: dict[int, C]
+    _conn_dbs: dict[int, str]
     _errors: dict[int, BaseException]
     _conns_held: dict[C, int]
     _loop: asyncio.AbstractEventLoop
     _counts: typing.Any
     _stats_collector: typing.Optional[StatsCollector]
+    _metrics_collector: typing.Optional[MetricsCollector]
 
     def __init__(
         self,
@@ -108,6 +126,7 @@ class Pool[C: typing.Hashable]:
         max_capacity: int,
         stats_collector: typing.Optional[StatsCollector] = None,
         min_idle_time_before_gc: float = config.MIN_IDLE_TIME_BEFORE_GC,
+        metrics_collector: typing.Optional[MetricsCollector] = None,
     ) -> None:
         # Re-load the logger if it's been mocked for testing
         global logger
@@ -126,6 +145,7 @@ class Pool[C: typing.Hashable]:
         self._next_conn_id = 0
         self._acquires = {}
         self._conns = {}
+        self._conn_dbs = {}
         self._errors = {}
         self._conns_held = {}
         self._prunes = {}
@@ -145,6 +165,7 @@ class Pool[C: typing.Hashable]:
 
         self._counts = None
         self._stats_collector = stats_collector
+        self._metrics_collector = metrics_collector
         if stats_collector:
             stats_collector(self._build_snapshot(now=time.monotonic()))
 
@@ -224,9 +245,14 @@ class Pool[C: typing.Hashable]:
 
     async def _perform_connect(self, id: int, db: str) -> None:
         self._cur_capacity += 1
+        started_at = time.monotonic()
         try:
             self._conns[id] = await self._connect(db)
+            self._conn_dbs[id] = db
             self._successful_connects += 1
+            if self._metrics_collector is not None:
+                self._metrics_collector.on_connect(
+                    db, time.monotonic() - started_at)
             if self._pool:
                 self._pool._completed(id)
         except Exception as e:
@@ -237,6 +263,7 @@ class Pool[C: typing.Hashable]:
     async def _perform_disconnect(self, id: int) -> None:
         try:
             conn = self._conns.pop(id)
+            self._conn_dbs.pop(id, None)
             await self._disconnect(conn)
             self._successful_disconnects += 1
             self._cur_capacity -= 1
@@ -252,12 +279,22 @@ class Pool[C: typing.Hashable]:
             # Note that we cannot hold this connection here as there is an
             # implicit expectation that the connection will GC after disconnect
             # but before reconnect.
+            started_at = time.monotonic()
             conn = self._conns.pop(id)
+            from_db = self._conn_dbs.pop(id, None)
             await self._disconnect(conn)
             self._successful_disconnects += 1
             try:
                 self._conns[id] = await self._connect(db)
+                self._conn_dbs[id] = db
                 self._successful_connects += 1
+                if self._metrics_collector is not None:
+                    self._metrics_collector.on_transfer(
+                        db, time.monotonic() - started_at)
+                    # The Rust pool only moves connections between
+                    # blocks by stealing them.
+                    if from_db is not None:
+                        self._metrics_collector.on_steal(from_db)
                 if self._pool:
                     self._pool._completed(id)
             except Exception as e:
@@ -274,11 +311,17 @@ class Pool[C: typing.Hashable]:
     async def _perform_prune(self, id: int) -> None:
         self._prunes[id].set_result(None)
 
-    async def acquire(self, dbname: str) -> C:
+    async def acquire(
+        self,
+        dbname: str,
+        *,
+        prefer: typing.Optional[typing.Callable[[C], bool]] = None,
+    ) -> C:
         """Acquire a connection from the database. This connection must be
-        released."""
+        released. Connection preferences are not supported and ignored."""
         if not self._task:
             raise asyncio.CancelledError()
+        started_at = time.monotonic()
         for i in range(config.CONNECT_FAILURE_RETRIES + 1):
             id = self._next_conn_id
             self._next_conn_id += 1
@@ -291,6 +334,9 @@ class Pool[C: typing.Hashable]:
                 conn = await acquire
                 c = self._conns[conn]
                 self._conns_held[c] = id
+                if self._metrics_collector is not None:
+                    self._metrics_collector.on_acquire(
+                        dbname, time.monotonic() - started_at)
                 return c
             except Exception as e:
                 # 3D000 - INVALID CATALOG NAME, database does not exist
@@ -347,6 +393,15 @@ class Pool[C: typing.Hashable]:
         for conn in self._conns.values():
             yield conn
 
+    def get_block_table(self) -> list[dict[str, typing.Any]]:
+        # The per-block state lives in the Rust pool; dump its latest
+        # reported counters.
+        snapshot = self._build_snapshot(now=time.monotonic())
+        return sorted(
+            (dataclasses.asdict(block) for block in snapshot.blocks),
+            key=lambda b: b['dbname'],
+        )
+
     def _build_snapshot(self, *, now: float) -> Snapshot:
         blocks: list[BlockSnapshot] = []
         if self._counts:
@@ -0,0 +1,161 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+import typing
+
+import time
+
+from . import rolavg
+
+
+class _BlockHistory:
+    # Acquisition history of one block (database).
+    #
+    # Acquisitions are counted in fixed-size time slots. When a slot is
+    # over, its rate (acquisitions per second) is folded into a rolling
+    # average of the recent slots, and into an exponentially weighted
+    # average of the same slot in previous periods (e.g. the same 5 minutes
+    # of the previous days).
+
+    __slots__ = ('slot', 'count', 'recent', 'seasonal')
+
+    slot: int
+    count: int
+    recent: rolavg.RollingAverage
+    seasonal: dict[int, float]
+
+    def __init__(self, slot: int) -> None:
+        self.slot = slot
+        self.count = 0
+        self.recent = rolavg.RollingAverage(history_size=3)
+        self.seasonal = {}
+
+
+class DemandPredictor:
+    # Predicts the demand of each block in the near future, so that the pool
+    # can open connections to a block *before* the requests arrive, e.g. for
+    # cron-like jobs hitting otherwise cold databases at the same time every
+    # day.
+    #
+    # The predictor only knows about acquisition rates; the pool turns them
+    # into an expected number of connections using the per-block average
+    # query time (Little's law).
+
+    _slot_size: float
+    _period_slots: int
+    _lead_time: float
+    _decay: float
+    _min_rate: float
+    _clock: typing.Callable[[], float]
+    _history: dict[str, _BlockHistory]
+
+    def __init__(
+        self,
+        *,
+        slot_size: float = 300,
+        period: float = 86400,
+        lead_time: float = 60,
+        decay: float = 0.5,
+        min_rate: float = 0.01,
+        interval: typing.Optional[float] = None,
+        max_conns_per_block: int = 4,
+        clock: typing.Callable[[], float] = time.time,
+    ) -> None:
+        # slot_size: the granularity of the history, in seconds;
+        # period: the length of the seasonal cycle (a day by default);
+        # lead_time: how far ahead of the expected demand to pre-warm;
+        # decay: weight of the previous periods in the seasonal average;
+        # min_rate: predicted rates below this value are ignored;
+        # interval: how often the pool should ask for predictions;
+        # max_conns_per_block: upper limit of pre-warmed connections.
+        if slot_size <= 0 or period < slot_size:
+            raise ValueError('invalid slot size or period')
+        self._slot_size = slot_size
+        # Not period // slot_size, which is off by one for e.g. 0.5 // 0.05
+        self._period_slots = max(round(period / slot_size), 1)
+        self._lead_time = lead_time
+        self._decay = decay
+        self._min_rate = min_rate
+        self.interval = interval if interval is not None else slot_size / 2
+        self.max_conns_per_block = max_conns_per_block
+        self._clock = clock
+        self._history = {}
+
+    def _get_slot(self, now: float) -> int:
+        return int(now // self._slot_size)
+
+    def _advance(self, hist: _BlockHistory, slot: int) -> None:
+        # Fold the finished slots (including the empty ones in between)
+        # into the averages.
+        if slot <= hist.slot:
+            return
+        missed = min(slot - hist.slot, self._period_slots)
+        first = slot - missed
+        for s in range(first, slot):
+            count = hist.count if s == hist.slot else 0
+            rate = count / self._slot_size
+            hist.recent.add(rate)
+            key = s % self._period_slots
+            prev = hist.seasonal.get(key)
+            if prev is None:
+                value = rate
+            else:
+                value = prev * self._decay + rate * (1 - self._decay)
+            if value >= self._min_rate:
+                hist.seasonal[key] = value
+            elif prev is not None:
+                del hist.seasonal[key]
+        hist.slot = slot
+        hist.count = 0
+
+    def on_acquire(self, dbname: str) -> None:
+        slot = self._get_slot(self._clock())
+        hist = self._history.get(dbname)
+        if hist is None:
+            hist = self._history[dbname] = _BlockHistory(slot)
+        else:
+            self._advance(hist, slot)
+        hist.count += 1
+
+    def forget(self, dbname: str) -> None:
+        self._history.pop(dbname, None)
+
+    def predict_rate(self, dbname: str) -> float:
+        # The expected acquisition rate of the block within the lead time.
+        hist = self._history.get(dbname)
+        if hist is None:
+            return 0
+        now = self._clock()
+        self._advance(hist, self._get_slot(now))
+        target = self._get_slot(now + self._lead_time) % self._period_slots
+        rate = max(hist.seasonal.get(target, 0), hist.recent.avg())
+        if rate < self._min_rate:
+            return 0
+        return rate
+
+    def iter_predictions(self) -> typing.Iterator[tuple[str, float]]:
+        for dbname in tuple(self._history):
+            hist = self._history[dbname]
+            rate = self.predict_rate(dbname)
+            if rate:
+                yield dbname, rate
+            elif not hist.seasonal and not hist.count:
+                # Nothing to remember about this block.
+                del self._history[dbname]
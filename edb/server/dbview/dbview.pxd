@@ -99,6 +99,7 @@ cdef class Database:
         readonly object extensions
         readonly object _feature_used_metrics
         readonly int dml_queries_executed
+        readonly object compile_flights
 
     cdef _invalidate_caches(self)
     cdef _cache_compiled_query(self, key, compiled)
@@ -177,6 +177,9 @@ cdef class Database:
             maxsize=self.lookup_config('query_cache_size')
         )
         self._cache_locks = {}
+        # Coalesces concurrent SQL and GraphQL compilations of the same
+        # query, see PgConnection.compile() and graphql's _execute().
+        self.compile_flights = asyncutil.SingleFlight()
         self._sql_to_compiled = lru.LRUMapping(
             maxsize=self.lookup_config('query_cache_size')
         )
@@ -1309,6 +1312,8 @@ cdef class DatabaseConnectionView:
         self._modaliases = self._in_tx_modaliases
         self._globals = self._in_tx_globals
 
+        if self._in_tx_capabilities & DML_CAPABILITIES:
+            self._db.dml_queries_executed += 1
         if self._in_tx_new_types:
             self._db._update_backend_ids(self._in_tx_new_types)
         if user_schema is not None:
@@ -76,6 +76,32 @@ MAX_RUNSTATE_DIR_PATH = 104 - MAX_UNIX_SOCKET_PATH_LENGTH - 1
 
 HTTP_PORT_QUERY_CACHE_SIZE = 1000
 
+# Limits of the result cache of read-only queries (see result_cache.py):
+# its total size and the size of a single result in bytes, and the
+# maximum age of a cached result in seconds a client can ask for.
+RESULT_CACHE_SIZE = 64 * 1024 * 1024
+RESULT_CACHE_MAX_ENTRY_SIZE = 1024 * 1024
+RESULT_CACHE_MAX_AGE = 3600
+
+# Limits of the sampling profiler of the system API, in seconds.
+PROFILER_MAX_DURATION = 300
+PROFILER_MIN_INTERVAL = 0.001
+PROFILER_DEFAULT_INTERVAL = 0.01
+
+# Limits of the slow query plan capture (see auto_explain.py): the number
+# of captured plans kept per tenant, the number of plans that can be
+# captured concurrently, and the maximum size of a plan in bytes.
+AUTO_EXPLAIN_LOG_SIZE = 100
+AUTO_EXPLAIN_MAX_IN_FLIGHT = 4
+AUTO_EXPLAIN_MAX_PLAN_SIZE = 1024 * 1024
+
+# Frontend query statistics (see query_stats.py): the size of the
+# count-min sketch estimating the total time of untracked statements, and
+# the maximum length of the query text kept for each tracked statement.
+QUERY_STATS_SKETCH_WIDTH = 4096
+QUERY_STATS_SKETCH_DEPTH = 4
+QUERY_STATS_MAX_QUERY_LENGTH = 4096
+
 # The time in seconds the Gel server shall wait between retries to connect
 # to the system database after the connection was broken during runtime.
 SYSTEM_DB_RECONNECT_INTERVAL = 1
@@ -85,6 +111,16 @@ ProtocolVersion: TypeAlias = tuple[int, int]
 MIN_PROTOCOL: ProtocolVersion = (1, 0)
 CURRENT_PROTOCOL: ProtocolVersion = (3, 0)
 
+# Dumps of this version have compressed and checksummed data blocks.
+# The version of other dumps is the protocol of their type descriptors,
+# which dumps of this version record in a header instead.  It has to
+# stay above the CURRENT_PROTOCOL of the servers that cannot restore
+# such dumps.
+DUMP_COMPRESSED_BLOCKS_VERSION: ProtocolVersion = (3, 1)
+# Incremental dumps, which must be merged into an existing branch.
+# Their own version, so that older servers refuse to restore them.
+DUMP_INCREMENTAL_VERSION: ProtocolVersion = (3, 2)
+
 # Emulated PG binary protocol
 POSTGRES_PROTOCOL: ProtocolVersion = (-3, 0)
 
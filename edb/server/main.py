@@ -207,6 +207,8 @@ async def _run_server(
         logger.info("detected service manager socket activation")
 
     with signalctl.SignalController(signal.SIGINT, signal.SIGTERM) as sc:
+        from . import admission
+        from . import auto_explain
         from . import tenant as edbtenant
 
         # max_backend_connections should've been calculated already by now
@@ -217,6 +219,19 @@ async def _run_server(
             max_backend_connections=args.max_backend_connections,
             backend_adaptive_ha=args.backend_adaptive_ha,
             extensions_dir=args.extensions_dir,
+            role_admission_limits=admission.AdmissionLimits(
+                rate=args.role_rate_limit,
+                max_in_flight=args.role_max_in_flight,
+            ),
+            branch_admission_limits=admission.AdmissionLimits(
+                rate=args.branch_rate_limit,
+                max_in_flight=args.branch_max_in_flight,
+            ),
+            auto_explain_settings=auto_explain.AutoExplainSettings(
+                threshold=args.auto_explain_threshold,
+                sample_rate=args.auto_explain_sample_rate,
+            ),
+            query_stats_size=args.query_stats_size,
         )
         tenant.set_init_con_data(init_con_data)
         tenant.set_reloadable_files(
@@ -257,6 +272,7 @@ async def _run_server(
                 srvargs.ReloadTrigger.FileSystemEvent,
             ],
             net_worker_mode=args.net_worker_mode,
+            binary_compression=args.binary_compression,
         )
         magic_smtp = os.getenv('EDGEDB_MAGIC_SMTP_CONFIG')
         if magic_smtp:
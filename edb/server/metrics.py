@@ -30,6 +30,11 @@ COUNT_BUCKETS = prom.per_order_buckets(
 BYTES_BUCKETS = prom.per_order_buckets(
     32, 2**20, entries_per_order=1, base=2,
 )
+# Covers waits from 100us to 10s, for latencies that are mostly well
+# below the millisecond the default buckets start at.
+LATENCY_BUCKETS = prom.per_order_buckets(
+    0.0001, 10, entries_per_order=2,
+)
 
 compiler_process_spawns = registry.new_counter(
     'compiler_process_spawns_total',
@@ -78,6 +83,39 @@ compiler_process_client_actions = registry.new_labeled_counter(
     labels=('pid', 'action'),
 )
 
+compiler_process_requests = registry.new_labeled_counter(
+    'compiler_process_requests_total',
+    'Number of requests handled by each compiler process.',
+    labels=('pid', 'method'),
+)
+
+compiler_process_phase_duration = registry.new_labeled_counter(
+    'compiler_process_phase_duration_total',
+    'Time compiler processes spent in each phase of handling requests.',
+    unit=prom.Unit.SECONDS,
+    labels=('pid', 'phase'),
+)
+
+compiler_process_gc_collections = registry.new_labeled_counter(
+    'compiler_process_gc_collections_total',
+    'Number of garbage collections in each compiler process.',
+    labels=('pid', 'generation'),
+)
+
+compiler_process_gc_duration = registry.new_labeled_counter(
+    'compiler_process_gc_duration_total',
+    'Time compiler processes were paused by garbage collections.',
+    unit=prom.Unit.SECONDS,
+    labels=('pid', 'generation'),
+)
+
+compiler_process_parse_cache_lookups = registry.new_labeled_counter(
+    'compiler_process_parse_cache_lookups_total',
+    'Number of lookups in the schema expression parse cache of each '
+    'compiler process.',
+    labels=('pid', 'result'),
+)
+
 compiler_pool_wait_time = registry.new_histogram(
     'compiler_pool_wait_time',
     'Time it takes to acquire a compiler process.',
@@ -133,6 +171,35 @@ backend_connection_aborted = registry.new_labeled_counter(
     labels=('tenant', 'pgcode')
 )
 
+backend_pool_acquire_wait = registry.new_labeled_histogram(
+    'backend_pool_acquire_wait',
+    'Time it takes to acquire a backend connection from the pool.',
+    unit=prom.Unit.SECONDS,
+    buckets=LATENCY_BUCKETS,
+    labels=('tenant', 'branch'),
+)
+
+backend_pool_connect_duration = registry.new_labeled_histogram(
+    'backend_pool_connect_duration',
+    'Time it takes the pool to open a new backend connection to a branch.',
+    unit=prom.Unit.SECONDS,
+    labels=('tenant', 'branch'),
+)
+
+backend_pool_transfer_duration = registry.new_labeled_histogram(
+    'backend_pool_transfer_duration',
+    'Time it takes the pool to transfer a backend connection from another '
+    'branch (disconnect plus reconnect).',
+    unit=prom.Unit.SECONDS,
+    labels=('tenant', 'branch'),
+)
+
+backend_pool_conn_steals = registry.new_labeled_counter(
+    'backend_pool_conn_steals_total',
+    'Number of backend connections stolen from a branch by other branches.',
+    labels=('tenant', 'branch'),
+)
+
 backend_query_duration = registry.new_labeled_histogram(
     'backend_query_duration',
     'Time it takes to run a query on a backend connection.',
@@ -140,6 +207,33 @@ backend_query_duration = registry.new_labeled_histogram(
     labels=('tenant',),
 )
 
+backend_prepared_statements = registry.new_labeled_counter(
+    'backend_prepared_statements_total',
+    'Number of prepared statement lookups on backend connections: a hit '
+    'when the statement was prepared already, a miss or a stale entry '
+    'when it had to be parsed.',
+    labels=('tenant', 'result'),
+)
+
+backend_prepared_statement_evictions = registry.new_labeled_counter(
+    'backend_prepared_statement_evictions_total',
+    'Number of prepared statements closed to stay within the '
+    'per-connection prepared statement cache size.',
+    labels=('tenant',),
+)
+
+query_result_cache_lookups = registry.new_labeled_counter(
+    'query_result_cache_lookups_total',
+    'Number of lookups in the result cache of read-only queries.',
+    labels=('tenant', 'result'),
+)
+
+auto_explain_captures = registry.new_labeled_counter(
+    'auto_explain_captures_total',
+    'Number of plans of slow queries captured by auto-explain.',
+    labels=('tenant', 'result'),
+)
+
 total_client_connections = registry.new_labeled_counter(
     'client_connections_total',
     'Total number of clients.',
@@ -165,6 +259,30 @@ client_connection_duration = registry.new_labeled_histogram(
     labels=('tenant', 'interface'),
 )
 
+client_compression_raw_bytes = registry.new_labeled_counter(
+    'client_compression_raw_total',
+    'Size of the data sent and received over compressed client '
+    'connections, before compression.',
+    unit=prom.Unit.BYTES,
+    labels=('tenant', 'algorithm', 'direction'),
+)
+
+client_compression_wire_bytes = registry.new_labeled_counter(
+    'client_compression_wire_total',
+    'Size of the data sent and received over compressed client '
+    'connections, after compression.',
+    unit=prom.Unit.BYTES,
+    labels=('tenant', 'algorithm', 'direction'),
+)
+
+client_compression_ratio = registry.new_labeled_histogram(
+    'client_compression_ratio',
+    'Compression ratio of the data sent over a compressed client '
+    'connection, observed when the connection is closed.',
+    buckets=[1, 1.5, 2, 3, 4, 6, 8, 12, 16, 32],
+    labels=('tenant', 'algorithm'),
+)
+
 edgeql_query_compilations = registry.new_labeled_counter(
     'edgeql_query_compilations_total',
     'Number of compiled/cached queries or scripts.',
@@ -191,6 +309,13 @@ query_compilation_duration = registry.new_labeled_histogram(
     labels=('tenant', 'interface'),
 )
 
+query_compilations_coalesced = registry.new_labeled_counter(
+    'query_compilations_coalesced_total',
+    'Number of queries that waited for a concurrent compilation of '
+    'the same query instead of compiling it again.',
+    labels=('tenant', 'interface'),
+)
+
 sql_queries = registry.new_labeled_counter(
     'sql_queries_total',
     'Number of SQL queries.',
@@ -224,6 +349,13 @@ background_errors = registry.new_labeled_counter(
     labels=('tenant', 'source')
 )
 
+admission_rejections = registry.new_labeled_counter(
+    'admission_rejections_total',
+    'Number of requests rejected by per-role or per-branch admission '
+    'control.',
+    labels=('tenant', 'scope', 'reason'),
+)
+
 transaction_serialization_errors = registry.new_labeled_counter(
     'transaction_serialization_errors_total',
     'Number of transaction serialization errors.',
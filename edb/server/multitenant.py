@@ -39,6 +39,8 @@ from edb.pgsql import params as pgparams
 from edb.server import compiler as edbcompiler
 from edb.server import metrics
 
+from . import admission
+from . import auto_explain
 from . import args as srvargs
 from . import config
 from . import defines
@@ -63,6 +65,13 @@ TenantConfig = TypedDict(
         "readiness-state-file": str,
         "admin": bool,
         "config-file": str,
+        "role-rate-limit": float,
+        "role-max-in-flight": int,
+        "branch-rate-limit": float,
+        "branch-max-in-flight": int,
+        "auto-explain-threshold": float,
+        "auto-explain-sample-rate": float,
+        "query-stats-size": int,
     },
 )
 
@@ -247,6 +256,12 @@ class MultiTenantServer(server.BaseServer):
             instance_name=conf["instance-name"],
             max_backend_connections=max_conns,
             backend_adaptive_ha=conf.get("backend-adaptive-ha", False),
+            role_admission_limits=admission.limits_from_config(conf, "role"),
+            branch_admission_limits=admission.limits_from_config(
+                conf, "branch"
+            ),
+            auto_explain_settings=auto_explain.settings_from_config(conf),
+            query_stats_size=conf.get("query-stats-size", 0),
         )
         tenant.set_init_con_data(self._init_con_data)
         config_file = conf.get("config-file")
@@ -473,6 +488,7 @@ async def run_server(
             testmode=args.testmode,
             admin_ui=args.admin_ui,
             cors_always_allowed_origins=args.cors_always_allowed_origins,
+            binary_compression=args.binary_compression,
             disable_dynamic_system_config=args.disable_dynamic_system_config,
             compiler_pool_size=args.compiler_pool_size,
             compiler_worker_branch_limit=args.compiler_worker_branch_limit,
@@ -92,6 +92,7 @@ class PGConnection(asyncio.Protocol):
     def add_log_listener(self, cb: Callable[[str, str], None]) -> None: ...
     def get_server_parameter_status(self, parameter: str) -> Optional[str]: ...
     def set_stmt_cache_size(self, size: int) -> None: ...
+    def has_prepared_statement(self, stmt_name: bytes) -> bool: ...
     def set_server(self, server: object) -> None: ...
     async def signal_sysevent(self, event: str, *, dbname: str) -> None: ...
     def abort(self) -> None: ...
@@ -79,6 +79,8 @@ from edb.common import debug
 
 from . import errors as pgerror
 
+# Rows are forwarded to the client in batches of about this many bytes;
+# after each batch, reading from Postgres stops while the client is slow.
 DEF DATA_BUFFER_SIZE = 100_000
 DEF PREP_STMTS_CACHE = 100
 
@@ -214,6 +216,10 @@ cdef class PGConnection:
     cpdef set_stmt_cache_size(self, int maxsize):
         self.prep_stmts.resize(maxsize)
 
+    def has_prepared_statement(self, bytes stmt_name):
+        # Does not count as a use of the statement in the LRU order.
+        return stmt_name in self.prep_stmts
+
     @property
     def is_ssl(self):
         return self._is_ssl
@@ -377,7 +383,9 @@ cdef class PGConnection:
         int dbver,
         WriteBuffer outbuf,
     ):
-        cdef bint parse = 1
+        cdef:
+            bint parse = 1
+            str result = 'miss'
 
         while self.prep_stmts.needs_cleanup():
             stmt_name_to_clean, _ = self.prep_stmts.cleanup_one()
@@ -385,17 +393,25 @@ cdef class PGConnection:
                 self.debug_print(f"discarding ps {stmt_name_to_clean!r}")
             outbuf.write_buffer(
                 self.make_clean_stmt_message(stmt_name_to_clean))
+            metrics.backend_prepared_statement_evictions.inc(
+                1.0, self.get_tenant_label()
+            )
 
         if stmt_name in self.prep_stmts:
             if self.prep_stmts[stmt_name] == dbver:
                 parse = 0
+                result = 'hit'
             else:
                 if self.debug:
                     self.debug_print(f"discarding ps {stmt_name!r}")
                 outbuf.write_buffer(
                     self.make_clean_stmt_message(stmt_name))
                 del self.prep_stmts[stmt_name]
+                result = 'stale'
 
+        metrics.backend_prepared_statements.inc(
+            1.0, self.get_tenant_label(), result
+        )
         return parse
 
     cdef write_sync(self, WriteBuffer outbuf):
@@ -695,6 +711,18 @@ cdef class PGConnection:
         else:
             await self._parse_apply_state_resp(2 if state is None else 3)
 
+    async def _wait_for_frontend(self, waiter):
+        # The client does not keep up with the rows we forward to it.  Stop
+        # reading from Postgres until it catches up, so that the result is
+        # held back by Postgres and the socket buffers instead of piling
+        # up in the memory of the server.
+        self.transport.pause_reading()
+        try:
+            await waiter
+        finally:
+            if self.transport is not None:
+                self.transport.resume_reading()
+
     async def wait_for_command(
         self,
         object query_unit,
@@ -733,10 +761,14 @@ cdef class PGConnection:
                         if buf is None:
                             buf = WriteBuffer.new()
 
-                        self.buffer.redirect_messages(buf, b'D', 0)
+                        self.buffer.redirect_messages(
+                            buf, b'D', DATA_BUFFER_SIZE)
                         if buf.len() >= DATA_BUFFER_SIZE:
                             fe_conn.write(buf)
                             buf = None
+                            waiter = fe_conn.get_write_waiter()
+                            if waiter is not None:
+                                await self._wait_for_frontend(waiter)
 
                 elif mtype == b'C':  ## result
                     # CommandComplete
@@ -1207,10 +1239,14 @@ cdef class PGConnection:
                             if buf is None:
                                 buf = WriteBuffer.new()
 
-                            self.buffer.redirect_messages(buf, b'D', 0)
+                            self.buffer.redirect_messages(
+                                buf, b'D', DATA_BUFFER_SIZE)
                             if buf.len() >= DATA_BUFFER_SIZE:
                                 fe_conn.write(buf)
                                 buf = None
+                                waiter = fe_conn.get_write_waiter()
+                                if waiter is not None:
+                                    await self._wait_for_frontend(waiter)
 
                     elif mtype == b'C':  ## result
                         # CommandComplete
@@ -60,6 +60,9 @@ cdef class EdgeConnection(frontend.FrontendConnection):
 
         dbview.CompiledQuery _last_anon_compiled
         int64_t _last_anon_compiled_hash
+        bint _last_anon_compiled_hit
+        # The number of queries compiled for this connection.
+        int64_t _compile_count
 
         bint query_cache_enabled
 
@@ -86,7 +89,7 @@ cdef class EdgeConnection(frontend.FrontendConnection):
     cdef sync_status(self)
 
     cdef WriteBuffer make_negotiate_protocol_version_msg(
-        self, tuple target_proto
+        self, tuple target_proto, str compression_algo=*
     )
     cdef WriteBuffer make_command_data_description_msg(
         self, dbview.CompiledQuery query
@@ -99,6 +102,16 @@ cdef class EdgeConnection(frontend.FrontendConnection):
     cdef dict parse_annotations(self)
     cdef inline ignore_annotations(self)
     cdef get_checked_tag(self, dict annotations)
+    cdef get_result_cache_max_age(self, dict annotations)
+    cdef record_query_stats(
+        self,
+        object query_req,
+        dbview.CompiledQuery compiled,
+        double duration,
+        Py_ssize_t response_bytes,
+        bint cache_hit,
+    )
+    cdef bint can_auto_explain(self, object query_req, object query_unit)
 
     cdef write_status(self, bytes name, bytes value)
     cdef write_edgedb_error(self, exc)
@@ -65,7 +65,9 @@ from edb.server.dbview cimport dbview
 from edb.server import config
 
 from edb.server import args as srvargs
+from edb.server import auto_explain
 from edb.server import compiler
+from edb.server import compression
 from edb.server import defines as edbdef
 from edb.server.compiler import errormech
 from edb.server.compiler import enums
@@ -78,6 +80,7 @@ from edb.server.protocol cimport frontend
 from edb.server.pgcon cimport pgcon
 from edb.server.pgcon import errors as pgerror
 from edb.server import metrics
+from edb.server import result_cache
 
 from edb.schema import objects as s_obj
 
@@ -110,7 +113,7 @@ cdef object LANG_SQL = compiler.InputLanguage.SQL
 cdef object LANG_GRAPHQL = compiler.InputLanguage.GRAPHQL
 
 cdef tuple DUMP_VER_MIN = (0, 7)
-cdef tuple DUMP_VER_MAX = edbdef.CURRENT_PROTOCOL
+cdef tuple DUMP_VER_MAX = edbdef.DUMP_INCREMENTAL_VERSION
 
 cdef tuple MIN_PROTOCOL = edbdef.MIN_PROTOCOL
 cdef tuple CURRENT_PROTOCOL = edbdef.CURRENT_PROTOCOL
@@ -130,6 +133,18 @@ def parse_catalog_version_header(value: bytes) -> uint64_t:
     return catver
 
 
+def parse_descriptor_protocol_header(value: bytes) -> tuple:
+    if len(value) != 4:
+        raise errors.BinaryProtocolError(
+            f'descriptor protocol value must be exactly 4 bytes '
+            f'(got {len(value)})'
+        )
+    return (
+        int.from_bytes(value[:2], 'big', signed=True),
+        int.from_bytes(value[2:], 'big', signed=True),
+    )
+
+
 cdef class EdgeConnection(frontend.FrontendConnection):
     interface = "edgeql"
 
@@ -149,6 +164,8 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         self._dbview = None
 
         self._last_anon_compiled = None
+        self._last_anon_compiled_hit = False
+        self._compile_count = 0
 
         self.query_cache_enabled = not (debug.flags.disable_qcache or
                                         debug.flags.edgeql_compile)
@@ -335,8 +352,11 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             uint16_t major
             uint16_t minor
             int i
-            uint16_t reserved
+            int j
+            uint16_t nexts
+            uint16_t nannos
             dict params = {}
+            dict extensions = {}
 
         major = <uint16_t>self.buffer.read_int16()
         minor = <uint16_t>self.buffer.read_int16()
@@ -349,10 +369,16 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             v = self.buffer.read_len_prefixed_utf8()
             params[k] = v
 
-        reserved = <uint16_t>self.buffer.read_int16()
-        if reserved != 0:
-            raise errors.BinaryProtocolError(
-                f'unexpected value in reserved field of ClientHandshake')
+        nexts = <uint16_t>self.buffer.read_int16()
+        for i in range(nexts):
+            name = self.buffer.read_len_prefixed_utf8()
+            annotations = {}
+            nannos = <uint16_t>self.buffer.read_int16()
+            for j in range(nannos):
+                k = self.buffer.read_len_prefixed_utf8()
+                v = self.buffer.read_len_prefixed_utf8()
+                annotations[k] = v
+            extensions[name] = annotations
 
         self.buffer.finish_message()
 
@@ -366,10 +392,30 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         else:
             target_proto = self.protocol_version
 
-        if negotiate:
-            self.write(self.make_negotiate_protocol_version_msg(target_proto))
+        # Unsupported extensions are ignored: not listing them in
+        # ServerHandshake is how the client learns about it.
+        compression_algo = None
+        if compression.EXTENSION in extensions:
+            compression_algo = compression.negotiate(
+                extensions[compression.EXTENSION].get('algorithms', ''),
+                self.server.get_binary_compression(),
+            )
+
+        if negotiate or compression_algo is not None:
+            self.write(self.make_negotiate_protocol_version_msg(
+                target_proto, compression_algo))
             self.flush()
 
+        if compression_algo is not None:
+            if self.buffer._length:
+                # The client must wait for ServerHandshake to learn
+                # the algorithm before sending anything else.
+                raise errors.BinaryProtocolError(
+                    'unexpected data after ClientHandshake requesting '
+                    'compression')
+            self._compression = compression.CompressedStream(
+                compression_algo, tenant_label=self.get_tenant_label())
+
         return params
 
     async def _start_connection(self, database: str) -> None:
@@ -563,6 +609,7 @@ cdef class EdgeConnection(frontend.FrontendConnection):
 
         query_unit_group = dbv.lookup_compiled_query(query_req)
         if query_unit_group is None:
+            self._compile_count += 1
             # If we have to do a compile within a transaction, suppress
             # the idle_in_transaction_session_timeout.
             suppress_timeout = dbv.in_tx() and not dbv.in_tx_error()
@@ -682,6 +729,7 @@ cdef class EdgeConnection(frontend.FrontendConnection):
     cdef WriteBuffer make_negotiate_protocol_version_msg(
         self,
         tuple target_proto,
+        str compression_algo=None,
     ):
         cdef:
             WriteBuffer msg
@@ -692,8 +740,15 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         msg.write_int16(target_proto[0])
         # Highest supported minor version of the protocol.
         msg.write_int16(target_proto[1])
-        # No extensions are currently supported.
-        msg.write_int16(0)
+        # Accepted extensions.
+        if compression_algo is None:
+            msg.write_int16(0)
+        else:
+            msg.write_int16(1)
+            msg.write_len_prefixed_bytes(compression.EXTENSION.encode())
+            msg.write_int16(1)
+            msg.write_len_prefixed_bytes(b'algorithm')
+            msg.write_len_prefixed_bytes(compression_algo.encode())
 
         msg.end_message()
         return msg
@@ -805,24 +860,80 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         use_prep_stmt: bint,
         *,
         query_req: Optional[rpc.CompilationRequest] = None,
+        cache_max_age: Optional[float] = None,
     ):
         cdef:
             dbview.DatabaseConnectionView dbv
             pgcon.PGConnection conn
+            WriteBuffer buf
 
         dbv = self.get_dbview()
-        async with self.with_pgcon() as conn:
-            await execute.execute(
-                conn,
-                dbv,
-                compiled,
+        query_unit = compiled.query_unit_group[0]
+        fe_conn = self
+
+        recorder = None
+        data = None
+        if (
+            cache_max_age is not None
+            and query_req is not None
+            and not dbv.in_tx()
+            and result_cache.is_cacheable(query_unit)
+        ):
+            cache = self.tenant.get_result_cache()
+            cache_key = (
+                self.dbname,
+                self.username,
+                query_req,
                 bind_args,
-                fe_conn=self,
-                use_prep_stmt=use_prep_stmt,
-                query_req=query_req,
+                dbv.serialize_state(),
+                dbv.get_globals(),
+            )
+            # Taken before running the query, so that the result is
+            # invalidated by any DML committed while it runs.
+            cache_stamp = (
+                dbv.dbver,
+                dbv._db.dml_queries_executed,
+                dbv.get_global_schema_pickle(),
             )
+            started_at = cache.now()
+            data = cache.get(cache_key, cache_stamp, cache_max_age)
+            if data is not None:
+                metrics.query_result_cache_lookups.inc(
+                    1.0, self.get_tenant_label(), 'hit'
+                )
+                buf = WriteBuffer.new()
+                buf.write_bytes(data)
+                self.write(buf)
+            else:
+                metrics.query_result_cache_lookups.inc(
+                    1.0, self.get_tenant_label(), 'miss'
+                )
+                fe_conn = recorder = execute.ResultRecorder(
+                    self, cache.max_entry_size
+                )
+
+        if data is None:
+            sql_hash = None
+            if use_prep_stmt:
+                sql_hash = query_unit.sql_hash
+            async with self.with_pgcon(sql_hash) as conn:
+                await execute.execute(
+                    conn,
+                    dbv,
+                    compiled,
+                    bind_args,
+                    fe_conn=fe_conn,
+                    use_prep_stmt=use_prep_stmt,
+                    query_req=query_req,
+                )
+
+            if recorder is not None:
+                data = recorder.get_data()
+                if data is not None:
+                    cache.put(
+                        cache_key, cache_stamp, data, created_at=started_at
+                    )
 
-        query_unit = compiled.query_unit_group[0]
         if query_unit.config_requires_restart:
             self.write_log(
                 EdgeSeverity.EDGE_SEVERITY_NOTICE,
@@ -938,6 +1049,12 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                 'bad annotation: tag too long (> 128 bytes)')
         return tag
 
+    cdef get_result_cache_max_age(self, dict annotations):
+        max_age = annotations.get("result-cache")
+        if not max_age:
+            return None
+        return result_cache.parse_max_age(max_age)
+
     async def parse(self):
         cdef:
             bytes eql
@@ -958,6 +1075,7 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         if _dbview.get_state_serializer() is None:
             await _dbview.reload_state_serializer()
         query_req, allow_capabilities = self.parse_execute_request()
+        compile_count = self._compile_count
         compiled = await self._parse(query_req, allow_capabilities)
 
         buf = self.make_command_data_description_msg(compiled)
@@ -969,6 +1087,7 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         # are cacheable.
         self._last_anon_compiled = compiled
         self._last_anon_compiled_hash = hash(query_req)
+        self._last_anon_compiled_hit = self._compile_count == compile_count
 
         self.write(buf)
         self.flush()
@@ -981,12 +1100,19 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             bytes out_tid
             bytes args
             uint64_t allow_capabilities
+            int64_t compile_count = self._compile_count
+            Py_ssize_t bytes_written = self._bytes_written
+            bint cache_hit = True
 
+        received_at = time.monotonic()
         if self.protocol_version >= (3, 0):
-            tag = self.get_checked_tag(self.parse_annotations())
+            annotations = self.parse_annotations()
+            tag = self.get_checked_tag(annotations)
+            cache_max_age = self.get_result_cache_max_age(annotations)
         else:
             self.ignore_headers()
             tag = None
+            cache_max_age = None
 
         _dbview = self.get_dbview()
         if _dbview.get_state_serializer() is None:
@@ -1006,6 +1132,7 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         ):
             compiled = self._last_anon_compiled
             query_unit_group = compiled.query_unit_group
+            cache_hit = self._last_anon_compiled_hit
         else:
             query_unit_group = _dbview.lookup_compiled_query(query_req)
 
@@ -1085,6 +1212,9 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             self.debug_print('EXECUTE', query_req.source.text())
 
         force_script = any(x.needs_readback for x in query_unit_group)
+        # The execution time of a single statement, for the query stats
+        # and auto-explain.
+        duration = None
         if (
             _dbview.in_tx_error()
             or query_unit_group[0].tx_savepoint_rollback
@@ -1099,7 +1229,15 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                 len(query_unit_group) == 1
                 and bool(query_unit_group[0].sql_hash)
             )
-            await self._execute(compiled, args, use_prep, query_req=query_req)
+            started_at = time.monotonic()
+            await self._execute(
+                compiled,
+                args,
+                use_prep,
+                query_req=query_req,
+                cache_max_age=cache_max_age,
+            )
+            duration = time.monotonic() - started_at
 
         if self._cancelled:
             raise ConnectionAbortedError
@@ -1114,6 +1252,161 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         )
         self.flush()
 
+        if duration is not None:
+            self.record_query_stats(
+                query_req,
+                compiled,
+                time.monotonic() - received_at,
+                self._bytes_written - bytes_written,
+                cache_hit and self._compile_count == compile_count,
+            )
+
+        if (
+            duration is not None
+            and self.can_auto_explain(query_req, query_unit_group[0])
+            and self.tenant.accept_new_tasks
+            and self.tenant.get_slow_query_log().should_capture(duration)
+        ):
+            # In the background, so that Sync is not held up by it.
+            _dbview = self.get_dbview()
+            self.tenant.create_task(
+                self._explain_slow_query(
+                    query_req,
+                    args,
+                    duration,
+                    _dbview.get_modaliases(),
+                    _dbview.get_session_config(),
+                    _dbview.get_globals(),
+                ),
+                interruptable=True,
+            )
+
+    cdef record_query_stats(
+        self,
+        object query_req,
+        dbview.CompiledQuery compiled,
+        double duration,
+        Py_ssize_t response_bytes,
+        bint cache_hit,
+    ):
+        stats = self.tenant.get_query_stats()
+        if not stats.is_enabled():
+            return
+        # Without edb_stat_statements there is no sys::QueryStats id
+        # to match, so fall back to the compilation cache key.
+        stmt_id = compiled.query_unit_group[0].stats_id
+        if stmt_id is None:
+            stmt_id = str(query_req.get_cache_key())
+        stats.record(
+            self.dbname,
+            stmt_id,
+            query_req.source.text(),
+            duration,
+            tag=compiled.tag,
+            response_bytes=response_bytes,
+            cache_hit=cache_hit,
+        )
+
+    cdef bint can_auto_explain(self, object query_req, object query_unit):
+        # Only plain queries and DML outside of transactions are explained,
+        # the rest either has no plan or its plan depends on the state of
+        # the transaction.
+        return (
+            query_req.input_language is LANG_EDGEQL
+            and bool(query_unit.sql)
+            and not query_unit.is_explain
+            and not (
+                query_unit.capabilities & ~enums.Capability.MODIFICATIONS
+            )
+            and not self.get_dbview().in_tx()
+        )
+
+    async def _explain_slow_query(
+        self,
+        rpc.CompilationRequest query_req,
+        bytes args,
+        double duration,
+        object modaliases,
+        object session_config,
+        object globals_,
+    ):
+        cdef:
+            dbview.DatabaseConnectionView _dbview
+            rpc.CompilationRequest explain_req
+
+        # The query is only planned again, not executed.  This runs
+        # after the response has been sent, on a view of its own with
+        # the state the query ran in, so that the connection can go on
+        # with the next queries meanwhile.
+        slow_query_log = self.tenant.get_slow_query_log()
+        dbname = self.dbname
+        role_name = self.username
+        text = query_req.source.text()
+        plan = error = None
+        try:
+            _dbview = await self.tenant.new_dbview(
+                dbname=dbname,
+                query_cache=False,
+                protocol_version=self.protocol_version,
+                role_name=role_name,
+            )
+            _dbview.is_transient = True
+            try:
+                _dbview.recover_aliases_and_config(
+                    modaliases, session_config, globals_)
+                explain_req = rpc.CompilationRequest(
+                    source=self._tokenize(
+                        auto_explain.explain_query(text).encode('utf-8'),
+                        LANG_EDGEQL,
+                    ),
+                    protocol_version=self.protocol_version,
+                    schema_version=_dbview.schema_version,
+                    compilation_config_serializer=(
+                        self.server.compilation_config_serializer
+                    ),
+                    modaliases=modaliases,
+                    session_config=session_config,
+                    database_config=_dbview.get_database_config(),
+                    system_config=_dbview.get_compilation_system_config(),
+                    role_name=role_name,
+                    branch_name=dbname,
+                )
+                compiled = await _dbview.parse(explain_req)
+                recorder = execute.ResultRecorder(
+                    None, edbdef.AUTO_EXPLAIN_MAX_PLAN_SIZE
+                )
+                async with self.tenant.with_pgcon(dbname) as conn:
+                    await execute.execute(
+                        conn,
+                        _dbview,
+                        compiled,
+                        args,
+                        fe_conn=recorder,
+                        query_req=explain_req,
+                    )
+            finally:
+                self.tenant.remove_dbview(_dbview)
+            data = recorder.get_data()
+            if data is None:
+                error = 'the plan is too large'
+            else:
+                plan = auto_explain.plan_from_data(data)
+        except Exception as ex:
+            error = f'{type(ex).__name__}: {ex}'
+            if self.debug:
+                self.debug_print('AUTO-EXPLAIN ERROR', error)
+        finally:
+            slow_query_log.capture_done()
+
+        slow_query_log.add(
+            branch=dbname,
+            role=role_name,
+            query=text,
+            duration=duration,
+            plan=plan,
+            error=error,
+        )
+
     async def sync(self):
         self.buffer.consume_message()
         self.write(self.sync_status())
@@ -1148,10 +1441,24 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             self.check_readiness()
 
             if mtype == b'O':
-                await self.execute()
+                admission = self.tenant.get_admission_controller()
+                admission.acquire(self.username, self.dbname)
+                try:
+                    await self.execute()
+                finally:
+                    admission.release(self.username, self.dbname)
 
             elif mtype == b'P':
-                await self.parse()
+                # Parse is usually followed by an Execute of the same
+                # query, so only the latter counts against the rate limits.
+                admission = self.tenant.get_admission_controller()
+                admission.acquire(
+                    self.username, self.dbname, count_rate=False
+                )
+                try:
+                    await self.parse()
+                finally:
+                    admission.release(self.username, self.dbname)
 
             elif mtype == b'S':
                 await self.sync()
@@ -1211,7 +1518,10 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             if self._con_status == EDGECON_BAD:
                 return True
 
-            self.get_dbview().tx_error()
+            # A request rejected by the admission control never ran,
+            # so the transaction it was sent in can go on.
+            if not isinstance(ex, errors.RateLimitExceededError):
+                self.get_dbview().tx_error()
             self.buffer.finish_message()
 
             ex = await self.interpret_error(ex)
@@ -1432,16 +1742,32 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             uint64_t flags
 
         # Parse the "Dump" message
+        incremental_since = None
+        requested_compression = None
         if self.protocol_version >= (3, 0):
-            self.ignore_annotations()
+            annotations = self.parse_annotations()
             flags = <uint64_t>self.buffer.read_int64()
             include_secrets = flags & messages.DumpFlag.DUMP_SECRETS
+            # The snapshot of an earlier dump, to only dump what changed
+            # since then.
+            incremental_since = annotations.get('incremental-since')
+            # The algorithms the client accepts for the data blocks.
+            requested_compression = annotations.get('compression')
         else:
             headers = self.parse_headers()
             include_secrets = headers.get(QUERY_HEADER_DUMP_SECRETS) == b'\x01'
 
         self.buffer.finish_message()
 
+        algorithm = None
+        if requested_compression is not None:
+            algorithm = compression.negotiate(
+                requested_compression, compression.get_available())
+            if algorithm is None:
+                raise errors.ProtocolError(
+                    f'none of the requested dump compression algorithms '
+                    f'is available: {requested_compression}')
+
         _dbview = self.get_dbview()
         if _dbview.txid:
             raise errors.ProtocolError(
@@ -1487,12 +1813,33 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                 ''',
             )
 
+            pg_snapshot = (await pgcon.sql_fetch_val(
+                b'SELECT pg_current_snapshot()::text'
+            )).decode()
+            system_identifier = (await pgcon.sql_fetch_val(
+                b'SELECT system_identifier::text FROM pg_control_system()'
+            )).decode()
+            snapshot = compiler.make_dump_snapshot(
+                system_identifier, dbname, pg_snapshot)
+            if incremental_since is not None:
+                compiler.check_incremental_dump_since(
+                    incremental_since, snapshot)
+
             user_schema_json = await server.introspect_user_schema_json(pgcon)
             global_schema_json = (
                 await server.introspect_global_schema_json(pgcon)
             )
             db_config_json = await server.introspect_db_config(pgcon)
             dump_protocol = self.max_protocol
+            # Dumps that older servers cannot restore get a version of
+            # their own; the protocol of the type descriptors is in the
+            # DESCRIPTOR_PROTOCOL header then.
+            if incremental_since is not None:
+                dump_version = edbdef.DUMP_INCREMENTAL_VERSION
+            elif algorithm is not None:
+                dump_version = edbdef.DUMP_COMPRESSED_BLOCKS_VERSION
+            else:
+                dump_version = dump_protocol
 
             schema_ddl, schema_dynamic_ddl, schema_ids, blocks = (
                 await compiler_pool.describe_database_dump(
@@ -1501,6 +1848,7 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                     db_config_json,
                     dump_protocol,
                     include_secrets,
+                    incremental_since,
                 )
             )
 
@@ -1512,7 +1860,8 @@ cdef class EdgeConnection(frontend.FrontendConnection):
 
             msg_buf = WriteBuffer.new_message(b'@')  # DumpHeader
 
-            msg_buf.write_int16(4)  # number of key-value pairs
+            # number of key-value pairs
+            msg_buf.write_int16(6 if incremental_since is None else 7)
             msg_buf.write_int16(DUMP_HEADER_BLOCK_TYPE)
             msg_buf.write_len_prefixed_bytes(DUMP_HEADER_BLOCK_TYPE_INFO)
             msg_buf.write_int16(DUMP_HEADER_SERVER_VER)
@@ -1522,9 +1871,18 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             msg_buf.write_int64(buildmeta.EDGEDB_CATALOG_VERSION)
             msg_buf.write_int16(DUMP_HEADER_SERVER_TIME)
             msg_buf.write_len_prefixed_utf8(str(int(time.time())))
-
+            msg_buf.write_int16(DUMP_HEADER_SNAPSHOT)
+            msg_buf.write_len_prefixed_utf8(snapshot)
+            msg_buf.write_int16(DUMP_HEADER_DESCRIPTOR_PROTOCOL)
+            msg_buf.write_int32(4)
             msg_buf.write_int16(dump_protocol[0])
             msg_buf.write_int16(dump_protocol[1])
+            if incremental_since is not None:
+                msg_buf.write_int16(DUMP_HEADER_INCREMENTAL_SINCE)
+                msg_buf.write_len_prefixed_utf8(incremental_since)
+
+            msg_buf.write_int16(dump_version[0])
+            msg_buf.write_int16(dump_version[1])
             msg_buf.write_len_prefixed_utf8(schema_ddl)
 
             msg_buf.write_int32(len(schema_ids))
@@ -1534,8 +1892,11 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                 assert len(tid) == 16
                 msg_buf.write_bytes(tid)  # uuid
 
-            msg_buf.write_int32(len(blocks))
-            for block in blocks:
+            # The live ids blocks are for the same objects as their data
+            # blocks.
+            described_blocks = [b for b in blocks if not b.live_ids]
+            msg_buf.write_int32(len(described_blocks))
+            for block in described_blocks:
                 assert len(block.schema_object_id.bytes) == 16
                 msg_buf.write_bytes(block.schema_object_id.bytes)  # uuid
                 msg_buf.write_len_prefixed_bytes(block.type_desc)
@@ -1545,11 +1906,16 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                     assert len(depid.bytes) == 16
                     msg_buf.write_bytes(depid.bytes)  # uuid
 
-            self._transport.write(memoryview(msg_buf.end_message()))
+            # Through flush(), so that the dump is compressed along with
+            # the rest of the connection.
+            self.write(msg_buf.end_message())
             self.flush()
 
             blocks_queue = collections.deque(blocks)
             output_queue = asyncio.Queue(maxsize=2)
+            # Blocks being compressed in threads, in dump order.
+            compressing = collections.deque()
+            loop = asyncio.get_running_loop()
 
             async with asyncio.TaskGroup() as g:
                 g.create_task(pgcon.dump(
@@ -1571,25 +1937,29 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                             break
                     else:
                         block, block_num, data = out
-
-                        msg_buf = WriteBuffer.new_message(b'=')  # DumpBlock
-                        msg_buf.write_int16(4)  # number of key-value pairs
-
-                        msg_buf.write_int16(DUMP_HEADER_BLOCK_TYPE)
-                        msg_buf.write_len_prefixed_bytes(
-                            DUMP_HEADER_BLOCK_TYPE_DATA)
-                        msg_buf.write_int16(DUMP_HEADER_BLOCK_ID)
-                        msg_buf.write_len_prefixed_bytes(
-                            block.schema_object_id.bytes)
-                        msg_buf.write_int16(DUMP_HEADER_BLOCK_NUM)
-                        msg_buf.write_len_prefixed_bytes(
-                            str(block_num).encode())
-                        msg_buf.write_int16(DUMP_HEADER_BLOCK_DATA)
-                        msg_buf.write_len_prefixed_buffer(data)
-
-                        self._transport.write(memoryview(msg_buf.end_message()))
-                        if self._write_waiter:
-                            await self._write_waiter
+                        if algorithm is None:
+                            await self._write_dump_block(
+                                block, block_num, data)
+                            continue
+                        compressing.append((
+                            block,
+                            block_num,
+                            loop.run_in_executor(
+                                None,
+                                compression.compress_block,
+                                algorithm,
+                                memoryview(data),
+                            ),
+                        ))
+                        if len(compressing) >= DUMP_COMPRESSION_CONCURRENCY:
+                            await self._write_compressed_dump_block(
+                                algorithm, *compressing.popleft())
+
+                while compressing:
+                    if self._cancelled:
+                        raise ConnectionAbortedError
+                    await self._write_compressed_dump_block(
+                        algorithm, *compressing.popleft())
 
             await pgcon.sql_execute(b"ROLLBACK;")
 
@@ -1602,6 +1972,70 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         self.write(msg_buf.end_message())
         self.flush()
 
+    async def _write_compressed_dump_block(
+        self, str algorithm, object block, int block_num, object compressed
+    ):
+        data, checksum = await compressed
+        await self._write_dump_block(
+            block, block_num, data, algorithm, checksum)
+
+    async def _write_dump_block(
+        self,
+        object block,
+        int block_num,
+        object data,
+        str algorithm=None,
+        object checksum=None,
+    ):
+        cdef:
+            WriteBuffer msg_buf
+
+        msg_buf = WriteBuffer.new_message(b'=')  # DumpBlock
+        # number of key-value pairs
+        msg_buf.write_int16(4 if algorithm is None else 6)
+
+        msg_buf.write_int16(DUMP_HEADER_BLOCK_TYPE)
+        if block.live_ids:
+            msg_buf.write_len_prefixed_bytes(DUMP_HEADER_BLOCK_TYPE_LIVE_IDS)
+        else:
+            msg_buf.write_len_prefixed_bytes(DUMP_HEADER_BLOCK_TYPE_DATA)
+        msg_buf.write_int16(DUMP_HEADER_BLOCK_ID)
+        msg_buf.write_len_prefixed_bytes(block.schema_object_id.bytes)
+        msg_buf.write_int16(DUMP_HEADER_BLOCK_NUM)
+        msg_buf.write_len_prefixed_bytes(str(block_num).encode())
+        if algorithm is not None:
+            msg_buf.write_int16(DUMP_HEADER_BLOCK_COMPRESSION)
+            msg_buf.write_len_prefixed_bytes(algorithm.encode())
+            msg_buf.write_int16(DUMP_HEADER_BLOCK_CHECKSUM)
+            msg_buf.write_int32(4)
+            msg_buf.write_int32(<int32_t><uint32_t>checksum)
+        msg_buf.write_int16(DUMP_HEADER_BLOCK_DATA)
+        if algorithm is None:
+            msg_buf.write_len_prefixed_buffer(data)
+        else:
+            msg_buf.write_len_prefixed_bytes(data)
+
+        self.write(msg_buf.end_message())
+        self.flush()
+        if self._write_waiter:
+            await self._write_waiter
+
+    async def _restore_compressed_block(
+        self, pgcon, object restore_block, object decompressed
+    ):
+        try:
+            data = await decompressed
+        except ValueError as e:
+            raise errors.ProtocolError(f'corrupted data block: {e}')
+        await self._restore_block(pgcon, restore_block, data)
+
+    async def _restore_block(self, pgcon, object restore_block, bytes data):
+        type_id_map = self._build_type_id_map_for_restore_mending(
+            restore_block)
+        self._transport.pause_reading()
+        await pgcon.restore(restore_block, data, type_id_map)
+        self._transport.resume_reading()
+
     async def _execute_utility_stmt(self, eql: str, pgcon):
         cdef dbview.DatabaseConnectionView _dbview = self.get_dbview()
 
@@ -1679,6 +2113,9 @@ cdef class EdgeConnection(frontend.FrontendConnection):
 
         dump_server_ver_str = None
         cat_ver = None
+        snapshot = None
+        incremental_since = None
+        descriptor_proto = None
         headers_num = self.buffer.read_int16()
         for _ in range(headers_num):
             hdrname = self.buffer.read_int16()
@@ -1687,6 +2124,14 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                 dump_server_ver_str = hdrval.decode('utf-8')
             if hdrname == DUMP_HEADER_SERVER_CATALOG_VERSION:
                 cat_ver = parse_catalog_version_header(hdrval)
+            if hdrname == DUMP_HEADER_SNAPSHOT:
+                snapshot = hdrval.decode('utf-8')
+            if hdrname == DUMP_HEADER_INCREMENTAL_SINCE:
+                incremental_since = hdrval.decode('utf-8')
+            if hdrname == DUMP_HEADER_DESCRIPTOR_PROTOCOL:
+                descriptor_proto = parse_descriptor_protocol_header(hdrval)
+
+        incremental = incremental_since is not None
 
         proto_major = self.buffer.read_int16()
         proto_minor = self.buffer.read_int16()
@@ -1694,6 +2139,18 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         if proto > DUMP_VER_MAX or proto < DUMP_VER_MIN:
             raise errors.ProtocolError(
                 f'unsupported dump version {proto_major}.{proto_minor}')
+        if descriptor_proto is not None:
+            if (
+                descriptor_proto > CURRENT_PROTOCOL
+                or descriptor_proto < DUMP_VER_MIN
+            ):
+                raise errors.ProtocolError(
+                    f'unsupported dump descriptor protocol '
+                    f'{descriptor_proto[0]}.{descriptor_proto[1]}')
+            proto = descriptor_proto
+        elif proto >= edbdef.DUMP_COMPRESSED_BLOCKS_VERSION:
+            raise errors.ProtocolError(
+                'dump header is missing the descriptor protocol')
 
         schema_ddl = self.buffer.read_len_prefixed_bytes()
 
@@ -1741,16 +2198,31 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                     ''',
                 )
 
-                schema_sql_units, restore_blocks, tables, repopulate_units = \
-                    await compiler_pool.describe_database_restore(
-                        user_schema_pickle,
-                        global_schema_pickle,
-                        dump_server_ver_str,
-                        cat_ver,
-                        schema_ddl,
-                        schema_ids,
-                        blocks,
-                        proto,
+                (
+                    schema_sql_units,
+                    restore_blocks,
+                    tables,
+                    repopulate_units,
+                    merge_prepare_units,
+                    merge_units,
+                ) = await compiler_pool.describe_database_restore(
+                    user_schema_pickle,
+                    global_schema_pickle,
+                    dump_server_ver_str,
+                    cat_ver,
+                    schema_ddl,
+                    schema_ids,
+                    blocks,
+                    proto,
+                    incremental,
+                )
+
+                if incremental:
+                    restored = await pgcon.sql_fetch_val(
+                        compiler.get_restored_dump_snapshot_sql())
+                    compiler.check_incremental_restore_since(
+                        incremental_since,
+                        restored.decode('utf-8') if restored else None,
                     )
 
                 for query_unit in schema_sql_units:
@@ -1780,9 +2252,15 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                     else:
                         _dbview.on_success(query_unit, new_types)
 
+                live_id_blocks = {
+                    b.schema_object_id: b
+                    for b in restore_blocks
+                    if b.live_ids
+                }
                 restore_blocks = {
                     b.schema_object_id: b
                     for b in restore_blocks
+                    if not b.live_ids
                 }
 
                 disable_trigger_q = ''
@@ -1797,6 +2275,13 @@ cdef class EdgeConnection(frontend.FrontendConnection):
 
                 await pgcon.sql_execute(disable_trigger_q.encode())
 
+                for merge_unit in merge_prepare_units:
+                    await pgcon.sql_execute(merge_unit.encode())
+
+                # Blocks being decompressed in threads, in dump order.
+                decompressing = collections.deque()
+                loop = asyncio.get_running_loop()
+
                 # Send "RestoreReady" message
                 msg = WriteBuffer.new_message(b'+')
                 msg.write_int16(0)  # no annotations
@@ -1817,6 +2302,8 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                         block_id = None
                         block_num = None
                         block_data = None
+                        block_compression = None
+                        block_checksum = None
 
                         num_headers = self.buffer.read_int16()
                         for _ in range(num_headers):
@@ -1830,32 +2317,80 @@ cdef class EdgeConnection(frontend.FrontendConnection):
                                 block_num = self.buffer.read_len_prefixed_bytes()
                             elif header == DUMP_HEADER_BLOCK_DATA:
                                 block_data = self.buffer.read_len_prefixed_bytes()
+                            elif header == DUMP_HEADER_BLOCK_COMPRESSION:
+                                block_compression = (
+                                    self.buffer.read_len_prefixed_utf8())
+                            elif header == DUMP_HEADER_BLOCK_CHECKSUM:
+                                if self.buffer.read_int32() != 4:
+                                    raise errors.ProtocolError(
+                                        'invalid data block checksum')
+                                block_checksum = (
+                                    <uint32_t>self.buffer.read_int32())
+                            else:
+                                self.buffer.read_len_prefixed_bytes()
 
                         self.buffer.finish_message()
 
                         if (block_type is None or block_id is None
                                 or block_num is None or block_data is None):
                             raise errors.ProtocolError('incomplete data block')
+                        if (
+                            block_compression is not None
+                            and block_checksum is None
+                        ):
+                            raise errors.ProtocolError('incomplete data block')
 
-                        restore_block = restore_blocks[block_id]
-                        type_id_map = self._build_type_id_map_for_restore_mending(
-                            restore_block)
-                        self._transport.pause_reading()
-                        await pgcon.restore(restore_block, block_data, type_id_map)
-                        self._transport.resume_reading()
+                        if block_type == DUMP_HEADER_BLOCK_TYPE_LIVE_IDS:
+                            if not incremental:
+                                raise errors.ProtocolError(
+                                    'unexpected live ids block')
+                            restore_block = live_id_blocks[block_id]
+                        else:
+                            restore_block = restore_blocks[block_id]
+
+                        if block_compression is not None:
+                            decompressing.append((
+                                restore_block,
+                                loop.run_in_executor(
+                                    None,
+                                    compression.decompress_block,
+                                    block_compression,
+                                    block_data,
+                                    block_checksum,
+                                ),
+                            ))
+                            if (
+                                len(decompressing)
+                                >= DUMP_COMPRESSION_CONCURRENCY
+                            ):
+                                await self._restore_compressed_block(
+                                    pgcon, *decompressing.popleft())
+                        else:
+                            await self._restore_block(
+                                pgcon, restore_block, block_data)
 
                     elif mtype == b'.':  # RestoreEof
                         self.buffer.finish_message()
+                        while decompressing:
+                            await self._restore_compressed_block(
+                                pgcon, *decompressing.popleft())
                         break
 
                     else:
                         self.fallthrough()
 
+                for merge_unit in merge_units:
+                    await pgcon.sql_execute(merge_unit.encode())
+
                 for repopulate_unit in repopulate_units:
                     await pgcon.sql_execute(repopulate_unit.encode())
 
                 await pgcon.sql_execute(enable_trigger_q.encode())
 
+                # So that the next incremental dump can be merged.
+                await pgcon.sql_execute(
+                    compiler.set_restored_dump_snapshot_sql(snapshot))
+
             except Exception:
                 await pgcon.sql_execute(b'ROLLBACK')
                 _dbview.abort_tx()
@@ -22,12 +22,25 @@ DEF DUMP_BLOCK_SIZE = 1024 * 1024 * 10
 DEF DUMP_HEADER_BLOCK_TYPE = 101
 DEF DUMP_HEADER_BLOCK_TYPE_INFO = b'I'
 DEF DUMP_HEADER_BLOCK_TYPE_DATA = b'D'
+DEF DUMP_HEADER_BLOCK_TYPE_LIVE_IDS = b'L'
 
 DEF DUMP_HEADER_SERVER_TIME = 102
 DEF DUMP_HEADER_SERVER_VER = 103
 DEF DUMP_HEADER_BLOCKS_INFO = 104
 DEF DUMP_HEADER_SERVER_CATALOG_VERSION = 105
+DEF DUMP_HEADER_SNAPSHOT = 106
+DEF DUMP_HEADER_INCREMENTAL_SINCE = 107
+DEF DUMP_HEADER_DESCRIPTOR_PROTOCOL = 108
 
 DEF DUMP_HEADER_BLOCK_ID = 110
 DEF DUMP_HEADER_BLOCK_NUM = 111
 DEF DUMP_HEADER_BLOCK_DATA = 112
+DEF DUMP_HEADER_BLOCK_COMPRESSION = 113
+DEF DUMP_HEADER_BLOCK_CHECKSUM = 114
+
+# Number of dump blocks being compressed or decompressed at once.
+DEF DUMP_COMPRESSION_CONCURRENCY = 4
+
+# HTTP response bodies no larger than this are joined with the headers
+# into a single buffer; bigger ones are written as separate chunks.
+DEF HTTP_BODY_JOIN_THRESHOLD = 1024 * 16
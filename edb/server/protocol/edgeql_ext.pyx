@@ -152,4 +152,6 @@ async def handle_request(
 
         response.body = json.dumps({'error': ex.to_json()}).encode()
     else:
-        response.body = b'{"data":' + result + b'}'
+        # Hand the result over as separate chunks to avoid copying
+        # potentially large JSON payloads.
+        response.body_chunks = (b'{"data":', result, b'}')
@@ -29,6 +29,10 @@ from edb.server import defines as edbdef
 from edb.server.compiler import sertypes
 from edb.server.dbview import dbview
 
+class ResultRecorder:
+    def __init__(self, fe_conn: Any, max_size: int) -> None: ...
+    def get_data(self) -> Optional[bytes]: ...
+
 async def describe(
     db: dbview.Database,
     query: str,
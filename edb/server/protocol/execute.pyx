@@ -63,6 +63,50 @@ cdef object FMT_NONE = compiler.OutputFormat.NONE
 cdef WriteBuffer NO_ARGS = args_ser.combine_raw_args()
 
 
+cdef class ResultRecorder(frontend.AbstractFrontendConnection):
+    # Forwards the data messages of a query to the client, while keeping
+    # a copy of them for the result cache unless they get too large.
+    # Without a client connection the messages are only recorded.
+
+    cdef:
+        frontend.AbstractFrontendConnection _fe_conn
+        WriteBuffer _buf
+        ssize_t _max_size
+
+    def __init__(
+        self,
+        frontend.AbstractFrontendConnection fe_conn,
+        ssize_t max_size,
+    ):
+        self._fe_conn = fe_conn
+        self._buf = WriteBuffer.new()
+        self._max_size = max_size
+
+    cdef write(self, WriteBuffer buf):
+        # Copy first: the frontend connection may keep appending to buf.
+        if self._buf is not None:
+            if self._buf.len() + buf.len() > self._max_size:
+                self._buf = None
+            else:
+                self._buf.write_buffer(buf)
+        if self._fe_conn is not None:
+            self._fe_conn.write(buf)
+
+    cdef flush(self):
+        if self._fe_conn is not None:
+            self._fe_conn.flush()
+
+    cdef get_write_waiter(self):
+        if self._fe_conn is not None:
+            return self._fe_conn.get_write_waiter()
+        return None
+
+    def get_data(self) -> Optional[bytes]:
+        if self._buf is None:
+            return None
+        return bytes(self._buf)
+
+
 cdef class ExecutionGroup:
     def __cinit__(self):
         self.group = compiler.QueryUnitGroup()
@@ -26,6 +26,7 @@ cdef class AbstractFrontendConnection:
 
     cdef write(self, WriteBuffer buf)
     cdef flush(self)
+    cdef get_write_waiter(self)
 
 
 cdef class FrontendConnection(AbstractFrontendConnection):
@@ -46,8 +47,10 @@ cdef class FrontendConnection(AbstractFrontendConnection):
         object _transport
         WriteBuffer _write_buf
         object _write_waiter
+        object _compression
         object connection_made_at
         int _query_count
+        Py_ssize_t _bytes_written
 
         ReadBuffer buffer
         object _msg_take_waiter
@@ -69,6 +72,7 @@ cdef class FrontendConnection(AbstractFrontendConnection):
         bint _external_auth
 
     cdef _after_idling(self)
+    cdef bint _feed_decompressed(self, data)
     cdef _main_task_created(self)
     cdef _main_task_stopped_normally(self)
     cdef write_error(self, exc)
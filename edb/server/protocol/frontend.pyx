@@ -34,6 +34,12 @@ from . cimport auth_helpers
 
 
 DEF FLUSH_BUFFER_AFTER = 100_000
+# Maximum amount of data a compressed connection inflates at once; the
+# rest stays in the decompressor until the messages have been consumed.
+DEF DECOMPRESS_CHUNK_SIZE = 256 * 1024
+# Clients that have not authenticated yet have no business sending
+# large messages; drop them instead of inflating more data.
+DEF MAX_UNAUTHED_BUFFER_SIZE = 1024 * 1024
 cdef object logger = logging.getLogger('edb.server')
 
 
@@ -45,6 +51,11 @@ cdef class AbstractFrontendConnection:
     cdef flush(self):
         raise NotImplementedError
 
+    cdef get_write_waiter(self):
+        # A future resolved once the client is ready to take more data,
+        # or None if it is already.
+        return None
+
 
 cdef class FrontendConnection(AbstractFrontendConnection):
     interface = "frontend"
@@ -71,9 +82,11 @@ cdef class FrontendConnection(AbstractFrontendConnection):
 
         self.connection_made_at = connection_made_at
         self._query_count = 0
+        self._bytes_written = 0
         self._transport = None
         self._write_buf = None
         self._write_waiter = None
+        self._compression = None
 
         self.buffer = ReadBuffer()
         self._msg_take_waiter = None
@@ -113,7 +126,7 @@ cdef class FrontendConnection(AbstractFrontendConnection):
             # fail all tests if this ever happens.
             self.abort_pinned_pgcon()
 
-    async def get_pgcon(self) -> pgcon.PGConnection:
+    async def get_pgcon(self, sql_hash=None) -> pgcon.PGConnection:
         if self._cancelled or self._pgcon_released_in_connection_lost:
             raise RuntimeError(
                 'cannot acquire a pgconn; the connection is closed')
@@ -130,7 +143,9 @@ cdef class FrontendConnection(AbstractFrontendConnection):
                 return self._pinned_pgcon
             if self._pinned_pgcon is not None:
                 raise RuntimeError('there is already a pinned pgcon')
-            conn = await self.tenant.acquire_pgcon(self.dbname)
+            conn = await self.tenant.acquire_pgcon(
+                self.dbname, sql_hash=sql_hash
+            )
             self._pinned_pgcon = conn
             conn.pinned_by = self
             return conn
@@ -174,8 +189,8 @@ cdef class FrontendConnection(AbstractFrontendConnection):
                 )
 
     @contextlib.asynccontextmanager
-    async def with_pgcon(self):
-        con = await self.get_pgcon()
+    async def with_pgcon(self, sql_hash=None):
+        con = await self.get_pgcon(sql_hash)
         try:
             yield con
         finally:
@@ -205,6 +220,7 @@ cdef class FrontendConnection(AbstractFrontendConnection):
 
     cdef write(self, WriteBuffer buf):
         # One rule for this method: don't write partial messages.
+        self._bytes_written += buf.len()
         if self._write_buf is not None:
             self._write_buf.write_buffer(buf)
             if self._write_buf.len() >= FLUSH_BUFFER_AFTER:
@@ -220,7 +236,16 @@ cdef class FrontendConnection(AbstractFrontendConnection):
         if self._write_buf is not None and self._write_buf.len():
             buf = self._write_buf
             self._write_buf = None
-            self._transport.write(memoryview(buf))
+            if self._compression is not None:
+                self._transport.write(
+                    self._compression.compress(memoryview(buf)))
+            else:
+                self._transport.write(memoryview(buf))
+
+    cdef get_write_waiter(self):
+        if self._write_waiter is not None and not self._write_waiter.done():
+            return self._write_waiter
+        return None
 
     def pause_writing(self):
         if self._write_waiter and not self._write_waiter.done():
@@ -235,10 +260,40 @@ cdef class FrontendConnection(AbstractFrontendConnection):
     # I/O read methods
 
     def data_received(self, data):
+        if self._compression is not None:
+            self._feed_decompressed(data)
+            return
+        self.buffer.feed_data(data)
+        if self._msg_take_waiter is not None and self.buffer.take_message():
+            self._msg_take_waiter.set_result(True)
+            self._msg_take_waiter = None
+
+    cdef bint _feed_decompressed(self, data):
+        # Inflate at most DECOMPRESS_CHUNK_SIZE bytes of *data*.  If the
+        # decompressor has more output pending, stop reading from the
+        # socket until wait_for_message() has drained it.
+        try:
+            data = self._compression.decompress(data, DECOMPRESS_CHUNK_SIZE)
+        except Exception as ex:
+            # The stream cannot be resynchronized.
+            logger.debug('invalid compressed data from %s: %r',
+                         self._id, ex)
+            self._transport.abort()
+            return False
+        if self._compression.pending:
+            self._transport.pause_reading()
+        if not data:
+            return True
         self.buffer.feed_data(data)
+        if not self.authed and self.buffer._length > MAX_UNAUTHED_BUFFER_SIZE:
+            logger.debug('too much compressed data from unauthenticated '
+                         'client %s', self._id)
+            self._transport.abort()
+            return False
         if self._msg_take_waiter is not None and self.buffer.take_message():
             self._msg_take_waiter.set_result(True)
             self._msg_take_waiter = None
+        return True
 
     def eof_received(self):
         pass
@@ -257,6 +312,14 @@ cdef class FrontendConnection(AbstractFrontendConnection):
             # method is finalizing.
             raise ConnectionAbortedError
 
+        if self._compression is not None:
+            while self._compression.pending:
+                if not self._feed_decompressed(b''):
+                    raise ConnectionAbortedError
+                if self.buffer.take_message():
+                    return
+            self._transport.resume_reading()
+
         self._msg_take_waiter = self.loop.create_future()
         if report_idling:
             self.idling = True
@@ -514,6 +577,8 @@ cdef class FrontendConnection(AbstractFrontendConnection):
                 )
             if isinstance(exc, ConnectionError):
                 metrics.connection_errors.inc(1.0, tenant_label)
+            if self._compression is not None:
+                self._compression.on_connection_lost()
 
         if (self._msg_take_waiter is not None and
             not self._msg_take_waiter.done()):
@@ -533,7 +598,7 @@ cdef class FrontendConnection(AbstractFrontendConnection):
             self._cancelled = True
 
             # Make sure nothing is blocked on flow control.
-            # (Currently only dump uses this.)
+            # (Dump and the streaming of query results use this.)
             self.resume_writing()
 
             if not self.authed:
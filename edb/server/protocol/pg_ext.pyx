@@ -1759,10 +1759,32 @@ cdef class PgConnection(frontend.FrontendConnection):
         ignore_cache |= self._disable_cache
 
         result: List[dbstate.SQLQueryUnit]
-        if not ignore_cache:
-            result = self.database.lookup_compiled_sql(key)
-            if result is not None:
-                return result
+        if ignore_cache:
+            return await self._compile(source, dbv, key)
+
+        result = self.database.lookup_compiled_sql(key)
+        if result is not None:
+            return result
+
+        # Let only one of the concurrent compilations of the same query
+        # go to the compiler pool; the rest share its result if it can be
+        # cached, and compile the query themselves otherwise.
+        flight_key = ('sql', key, self.database.schema_version)
+        result, shared = await self.database.compile_flights.run(
+            flight_key,
+            lambda: self._compile(source, dbv, key),
+            shareable=_is_cacheable_sql,
+        )
+        if shared:
+            metrics.query_compilations_coalesced.inc(
+                1.0, self.tenant.get_instance_name(), "sql"
+            )
+        return result
+
+    async def _compile(
+        self, source: pg_parser.Source, ConnectionView dbv, bytes key
+    ) -> List[dbstate.SQLQueryUnit]:
+        result: List[dbstate.SQLQueryUnit]
         # Remember the schema version we are compiling on, so that we can
         # cache the result with the matching version. In case of concurrent
         # schema update, we're only storing an outdated cache entry, and
@@ -1839,6 +1861,11 @@ cdef class PgConnection(frontend.FrontendConnection):
         return qu
 
 
+def _is_cacheable_sql(units: List[dbstate.SQLQueryUnit]) -> bool:
+    # Same as in Database.cache_compiled_sql()
+    return all(unit.cacheable for unit in units)
+
+
 def compute_cache_key(
     source: pg_parser.Source, fe_settings: dbstate.SQLSettings
 ) -> bytes:
@@ -46,6 +46,7 @@ cdef class HttpResponse:
         public bytes content_type
         public dict custom_headers
         public bytes body
+        public object body_chunks
         public bint sent
 
 
@@ -79,9 +80,11 @@ cdef class HttpProtocol:
                       str message)
     cdef _unauthorized(self, HttpRequest request, HttpResponse response,
                        str message)
+    cdef _too_many_requests(self, HttpRequest request, HttpResponse response,
+                            rejection)
     cdef _return_binary_error(self, binary.EdgeConnection proto)
     cdef _write(self, bytes req_version, bytes resp_status,
-                bytes content_type, dict custom_headers, bytes body,
+                bytes content_type, dict custom_headers, object body,
                 bint close_connection)
 
     cpdef write(self, HttpRequest request, HttpResponse response)
@@ -16,6 +16,8 @@
 # limitations under the License.
 #
 
+from typing import Optional, Sequence
+
 import asyncio
 import http
 import http.cookies
@@ -46,6 +48,7 @@ class HttpResponse:
     content_type: bytes
     custom_headers: dict[str, str]
     body: bytes
+    body_chunks: Optional[Sequence[bytes | memoryview]]
     sent: bool
 
 class HttpProtocol(asyncio.Protocol):
@@ -90,6 +90,7 @@ cdef class HttpResponse:
         self.content_type = b'text/plain'
         self.custom_headers = {}
         self.body = b''
+        self.body_chunks = None
         self.close_connection = False
         self.sent = False
 
@@ -342,17 +343,33 @@ cdef class HttpProtocol:
             self.transport.resume_reading()
 
     cdef _write(self, bytes req_version, bytes resp_status,
-                bytes content_type, dict custom_headers, bytes body,
+                bytes content_type, dict custom_headers, object body,
                 bint close_connection):
+        # `body` is either a bytes object or a sequence of bytes-like
+        # chunks; the latter are handed to the transport as-is so that
+        # large responses are not copied into one contiguous buffer.
+        cdef:
+            Py_ssize_t body_len
+
         if self.transport is None:
             return
+
+        if isinstance(body, bytes):
+            body_len = len(body)
+            chunks = (body,) if body_len else ()
+        else:
+            chunks = body
+            body_len = 0
+            for chunk in chunks:
+                body_len += len(chunk)
+
         data = [
             b'HTTP/', req_version, b' ', resp_status, b'\r\n',
             b'Content-Type: ', content_type, b'\r\n',
         ]
         if content_type != b"text/event-stream":
             data.extend(
-                (b'Content-Length: ', f'{len(body)}'.encode(), b'\r\n'),
+                (b'Content-Length: ', f'{body_len}'.encode(), b'\r\n'),
             )
 
         for key, value in custom_headers.items():
@@ -361,9 +378,13 @@ cdef class HttpProtocol:
         if close_connection:
             data.append(b'Connection: close\r\n')
         data.append(b'\r\n')
-        if body:
-            data.append(body)
-        self.transport.write(b''.join(data))
+
+        if body_len <= HTTP_BODY_JOIN_THRESHOLD:
+            data.extend(chunks)
+            self.transport.write(b''.join(data))
+        else:
+            self.transport.write(b''.join(data))
+            self.transport.writelines(chunks)
 
     cpdef write(self, HttpRequest request, HttpResponse response):
         assert type(response.status) is HTTPStatus
@@ -372,7 +393,11 @@ cdef class HttpProtocol:
             f'{response.status.value} {response.status.phrase}'.encode(),
             response.content_type,
             response.custom_headers,
-            response.body,
+            (
+                response.body_chunks
+                if response.body_chunks is not None
+                else response.body
+            ),
             response.close_connection or not request.should_keep_alive)
         response.sent = True
 
@@ -677,50 +702,66 @@ cdef class HttpProtocol:
                 if extname not in db.extensions:
                     return self._not_found(request, response)
 
-                if extname == 'graphql':
-                    await graphql_ext.handle_request(
-                        request, response, db, role_name, args, self.tenant
-                    )
-                elif extname == 'notebook':
-                    await notebook_ext.handle_request(
-                        request, response, db, role_name, args, self.tenant
-                    )
-                elif extname == 'edgeql_http':
-                    await edgeql_ext.handle_request(
-                        request, response, db, role_name, args, self.tenant
-                    )
-                elif extname == 'ai':
-                    await ai_ext.handle_request(
-                        self,
-                        request, response, db, role_name, args, self.tenant
-                    )
-                elif extname == 'auth':
-                    netloc = (
-                        f"{request_url.host.decode()}:{request_url.port}"
-                            if request_url.port
-                            else request_url.host.decode()
-                    )
-                    ext_base_path = f"{request_url.schema.decode()}://" \
-                                    f"{netloc}/{route}/" \
-                                    f"{urllib.parse.quote(dbname)}/ext/auth"
-                    handler = auth_ext.http.Router(
-                        db=db,
-                        base_path=ext_base_path,
-                        tenant=self.tenant,
-                    )
-                    await handler.handle_request(request, response, args)
-                    if args:
-                        if args[0] == 'ui':
-                            if not (len(args) > 1 and args[1] == "_static"):
-                                srv_metrics.auth_ui_renders.inc(
+                admission = self.tenant.get_admission_controller()
+                if role_name is not None:
+                    rejection = admission.try_acquire(role_name, dbname)
+                    if rejection is not None:
+                        return self._too_many_requests(
+                            request, response, rejection
+                        )
+
+                try:
+                    if extname == 'graphql':
+                        await graphql_ext.handle_request(
+                            request, response, db, role_name, args, self.tenant
+                        )
+                    elif extname == 'notebook':
+                        await notebook_ext.handle_request(
+                            request, response, db, role_name, args, self.tenant
+                        )
+                    elif extname == 'edgeql_http':
+                        await edgeql_ext.handle_request(
+                            request, response, db, role_name, args, self.tenant
+                        )
+                    elif extname == 'ai':
+                        await ai_ext.handle_request(
+                            self,
+                            request, response, db, role_name, args, self.tenant
+                        )
+                    elif extname == 'auth':
+                        netloc = (
+                            f"{request_url.host.decode()}:{request_url.port}"
+                                if request_url.port
+                                else request_url.host.decode()
+                        )
+                        ext_base_path = (
+                            f"{request_url.schema.decode()}://"
+                            f"{netloc}/{route}/"
+                            f"{urllib.parse.quote(dbname)}/ext/auth"
+                        )
+                        handler = auth_ext.http.Router(
+                            db=db,
+                            base_path=ext_base_path,
+                            tenant=self.tenant,
+                        )
+                        await handler.handle_request(request, response, args)
+                        if args:
+                            if args[0] == 'ui':
+                                if not (
+                                    len(args) > 1 and args[1] == "_static"
+                                ):
+                                    srv_metrics.auth_ui_renders.inc(
+                                        1.0, self.get_tenant_label()
+                                    )
+                            else:
+                                srv_metrics.auth_api_calls.inc(
                                     1.0, self.get_tenant_label()
                                 )
-                        else:
-                            srv_metrics.auth_api_calls.inc(
-                                1.0, self.get_tenant_label()
-                            )
-                else:
-                    return self._not_found(request, response)
+                    else:
+                        return self._not_found(request, response)
+                finally:
+                    if role_name is not None:
+                        admission.release(role_name, dbname)
 
         elif route == 'auth':
             if await self._handle_cors(
@@ -739,7 +780,12 @@ cdef class HttpProtocol:
                 self.tenant,
             )
         elif route == 'server':
-            if not await self._authenticate_for_default_conn_transport(
+            if system_api.requires_superuser(path_parts[1:]):
+                if not await self._check_http_superuser_auth(
+                    request, response
+                ):
+                    return
+            elif not await self._authenticate_for_default_conn_transport(
                 request,
                 response,
                 srvargs.ServerConnTransport.HTTP_HEALTH,
@@ -783,6 +829,15 @@ cdef class HttpProtocol:
                 response,
                 self.server,
             )
+        elif (path_parts == ['server-info', 'pg-pool'] and
+            request.method == b'GET' and
+            (self.server.in_dev_mode() or self.server.in_test_mode())
+        ):
+            await server_info.handle_pg_pool_request(
+                request,
+                response,
+                self.tenant,
+            )
         elif path_parts[0] == 'ui':
             if not self.server.is_admin_ui_enabled():
                 return self._not_found(
@@ -822,6 +877,19 @@ cdef class HttpProtocol:
         response.status = http.HTTPStatus.BAD_REQUEST
         response.close_connection = True
 
+    cdef _too_many_requests(
+        self,
+        HttpRequest request,
+        HttpResponse response,
+        rejection,
+    ):
+        ex = rejection.to_error()
+        response.body = f'{type(ex).__name__}: {ex}'.encode("utf-8")
+        response.status = http.HTTPStatus.TOO_MANY_REQUESTS
+        response.custom_headers['Retry-After'] = str(
+            rejection.get_retry_after()
+        )
+
     async def _handle_cors(
         self,
         HttpRequest request,
@@ -988,6 +1056,27 @@ cdef class HttpProtocol:
 
         return username
 
+    async def _check_http_superuser_auth(
+        self,
+        HttpRequest request,
+        HttpResponse response,
+    ):
+        username = await self._check_http_auth(
+            request, response, edbdef.EDGEDB_SUPERUSER_DB)
+        if not username:
+            return False
+
+        role = self.tenant.get_roles().get(username)
+        if not role or not role.get('superuser'):
+            self._unauthorized(
+                request,
+                response,
+                'authentication failed: superuser role required',
+            )
+            return False
+
+        return True
+
     async def _authenticate_for_default_conn_transport(
         self,
         HttpRequest request,
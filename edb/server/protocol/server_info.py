@@ -34,6 +34,7 @@ from edb.common import markup
 
 if TYPE_CHECKING:
     from edb.server import server as edbserver
+    from edb.server import tenant as edbtenant
     from edb.server.protocol import protocol
 
 
@@ -77,6 +78,29 @@ async def handle_request(
         )
 
 
+async def handle_pg_pool_request(
+    request: protocol.HttpRequest,
+    response: protocol.HttpResponse,
+    tenant: edbtenant.Tenant,
+) -> None:
+    try:
+        output = ImmutableEncoder().encode(tenant.get_pg_pool_debug_info())
+        response.status = http.HTTPStatus.OK
+        response.content_type = b'application/json'
+        response.body = output.encode()
+        response.close_connection = True
+
+    except Exception as ex:
+        if debug.flags.server:
+            markup.dump(ex)
+
+        ex_type = errors.InternalServerError
+
+        _response_error(
+            response, http.HTTPStatus.INTERNAL_SERVER_ERROR, str(ex), ex_type
+        )
+
+
 def _response_error(
     response: protocol.HttpResponse,
     status: http.HTTPStatus,
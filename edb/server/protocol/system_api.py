@@ -22,11 +22,15 @@ from typing import TYPE_CHECKING
 import asyncio
 import http
 import json
+import urllib.parse
 
 from edb import errors
 
 from edb.common import debug
 from edb.common import markup
+from edb.common import sampler
+
+from edb.server import defines
 
 
 if TYPE_CHECKING:
@@ -34,6 +38,16 @@ if TYPE_CHECKING:
     from edb.server.protocol import protocol
 
 
+# Endpoints that expose the text of the queries of every branch, and so
+# require authenticating as a superuser role rather than with the
+# HTTP_HEALTH methods, which allow everyone by default.
+SUPERUSER_PATHS = frozenset({'slow-queries', 'query-stats'})
+
+
+def requires_superuser(path_parts: list[str]) -> bool:
+    return len(path_parts) == 1 and path_parts[0] in SUPERUSER_PATHS
+
+
 async def handle_request(
     request: protocol.HttpRequest,
     response: protocol.HttpResponse,
@@ -72,6 +86,26 @@ async def handle_request(
                     handle_liveness_query(request, response, tenant),
                     interruptable=False,
                 )
+        elif (
+            path_parts == ['profile']
+            and request.method == b'POST'
+            and server.is_profiling_enabled()
+        ):
+            await handle_profile_request(request, response, server)
+        elif (
+            path_parts == ['slow-queries']
+            and request.method == b'GET'
+            and tenant is not None
+            and tenant.get_slow_query_log().is_enabled()
+        ):
+            handle_slow_queries_request(response, tenant)
+        elif (
+            path_parts == ['query-stats']
+            and request.method in (b'GET', b'DELETE')
+            and tenant is not None
+            and tenant.get_query_stats().is_enabled()
+        ):
+            handle_query_stats_request(request, response, tenant)
         else:
             _response(
                 response,
@@ -207,3 +241,99 @@ async def handle_readiness_query(
         )
     else:
         await _ping(response, tenant)
+
+
+async def handle_profile_request(
+    request: protocol.HttpRequest,
+    response: protocol.HttpResponse,
+    server: edbserver.BaseServer,
+) -> None:
+    qs: dict[str, list[str]] = {}
+    if request.url.query:
+        qs = urllib.parse.parse_qs(request.url.query.decode('ascii'))
+
+    try:
+        duration = float(qs.get('duration', ['10'])[0])
+        interval = float(
+            qs.get('interval', [str(defines.PROFILER_DEFAULT_INTERVAL)])[0])
+    except ValueError:
+        duration = interval = -1
+    fmt = qs.get('format', ['collapsed'])[0]
+    if not (
+        0 < duration <= defines.PROFILER_MAX_DURATION
+        and interval >= defines.PROFILER_MIN_INTERVAL
+        and fmt in ('collapsed', 'svg')
+    ):
+        _response_error(
+            response,
+            http.HTTPStatus.BAD_REQUEST,
+            f'duration must be a number of seconds between 0 and '
+            f'{defines.PROFILER_MAX_DURATION}, interval at least '
+            f'{defines.PROFILER_MIN_INTERVAL} seconds, and format '
+            f'either "collapsed" or "svg"',
+            errors.InvalidValueError,
+        )
+        return
+
+    if server.is_profiling():
+        _response_error(
+            response,
+            http.HTTPStatus.CONFLICT,
+            'the profiler is already running',
+            errors.AvailabilityError,
+        )
+        return
+
+    samples = await server.run_sampling_profiler(duration, interval)
+
+    if fmt == 'svg' and samples:
+        from edb.tools.profiling import profiler
+
+        body = profiler.render_samples_svg(samples).encode()
+        response.content_type = b'image/svg+xml'
+    else:
+        body = sampler.format_collapsed(samples).encode()
+        response.content_type = b'text/plain'
+    response.body = body
+    response.status = http.HTTPStatus.OK
+    response.close_connection = False
+
+
+def handle_slow_queries_request(
+    response: protocol.HttpResponse,
+    tenant: edbtenant.Tenant,
+) -> None:
+    entries = tenant.get_slow_query_log().get_entries()
+    _response_ok(response, json.dumps(entries).encode())
+
+
+def handle_query_stats_request(
+    request: protocol.HttpRequest,
+    response: protocol.HttpResponse,
+    tenant: edbtenant.Tenant,
+) -> None:
+    stats = tenant.get_query_stats()
+    if request.method == b'DELETE':
+        stats.reset()
+        _response_ok(response, b'"OK"')
+        return
+
+    qs: dict[str, list[str]] = {}
+    if request.url.query:
+        qs = urllib.parse.parse_qs(request.url.query.decode('ascii'))
+    branch = qs.get('branch', [None])[0]
+    try:
+        limit = int(qs.get('limit', ['100'])[0])
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        _response_error(
+            response,
+            http.HTTPStatus.BAD_REQUEST,
+            'limit must be a non-negative integer',
+            errors.InvalidValueError,
+        )
+        return
+
+    body = stats.get_stats(branch=branch, limit=limit)
+    _response_ok(response, json.dumps(body).encode())
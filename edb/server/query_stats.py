@@ -0,0 +1,293 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Execution statistics of queries as observed by the server.
+
+sys::QueryStats only covers the time queries spend in Postgres.  This
+module keeps what the clients see instead: the time from receiving a
+query to having sent its results (so including compilation, waiting for
+a backend connection and sending the results), the size of the
+responses and how often the compiled query cache was hit.  Statements
+are keyed by branch and by the same id as in sys::QueryStats, so that
+the two can be joined.
+
+Only the statements with the largest total time are tracked.  Every
+execution is also added to a count-min sketch of the total time per
+statement, so that a statement that becomes hot replaces the coldest
+tracked one with an estimate of its earlier executions.  Executions of
+untracked statements are summed up separately.  Tables can be merged,
+e.g. to aggregate the statistics of several servers.
+"""
+
+from __future__ import annotations
+from typing import (
+    Any,
+    Optional,
+)
+
+import array
+import dataclasses
+import hashlib
+import heapq
+import math
+
+from . import defines
+
+
+@dataclasses.dataclass(slots=True)
+class StatementStats:
+    branch: str
+    id: str
+    query: str
+    tag: Optional[str] = None
+    calls: int = 0
+    # Includes estimated_time.
+    total_time: float = 0.0
+    min_time: float = math.inf
+    max_time: float = 0.0
+    # The estimated total time of the executions before the statement
+    # was tracked, which is an upper bound of the error of total_time.
+    estimated_time: float = 0.0
+    response_bytes: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def record(
+        self,
+        duration: float,
+        response_bytes: int,
+        cache_hit: bool,
+    ) -> None:
+        self.calls += 1
+        self.total_time += duration
+        if duration < self.min_time:
+            self.min_time = duration
+        if duration > self.max_time:
+            self.max_time = duration
+        self.response_bytes += response_bytes
+        if cache_hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    def merge(self, other: StatementStats) -> None:
+        self.calls += other.calls
+        self.total_time += other.total_time
+        self.min_time = min(self.min_time, other.min_time)
+        self.max_time = max(self.max_time, other.max_time)
+        self.estimated_time += other.estimated_time
+        self.response_bytes += other.response_bytes
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+
+    def to_json(self) -> dict[str, Any]:
+        rv = dataclasses.asdict(self)
+        rv['mean_time'] = self.total_time / self.calls if self.calls else 0.0
+        if not self.calls:
+            rv['min_time'] = 0.0
+        return rv
+
+
+class CountMinSketch:
+
+    def __init__(
+        self,
+        width: int = defines.QUERY_STATS_SKETCH_WIDTH,
+        depth: int = defines.QUERY_STATS_SKETCH_DEPTH,
+    ) -> None:
+        self._width = width
+        self._depth = depth
+        self._rows = [array.array('d', bytes(8 * width)) for _ in range(depth)]
+
+    def _indexes(self, key: str) -> list[int]:
+        # Not hash(), which is randomized per process: sketches of
+        # different servers have to be mergeable.
+        digest = hashlib.blake2b(
+            key.encode('utf-8'), digest_size=4 * self._depth
+        ).digest()
+        return [
+            int.from_bytes(digest[i * 4:i * 4 + 4], 'little') % self._width
+            for i in range(self._depth)
+        ]
+
+    def add(self, key: str, value: float) -> float:
+        """Add *value* to *key* and return the new estimate for it."""
+        estimate = math.inf
+        for row, idx in zip(self._rows, self._indexes(key)):
+            row[idx] += value
+            estimate = min(estimate, row[idx])
+        return estimate
+
+    def estimate(self, key: str) -> float:
+        return min(
+            row[idx] for row, idx in zip(self._rows, self._indexes(key))
+        )
+
+    def merge(self, other: CountMinSketch) -> None:
+        if (self._width, self._depth) != (other._width, other._depth):
+            raise ValueError('cannot merge sketches of different sizes')
+        for row, other_row in zip(self._rows, other._rows):
+            for i, value in enumerate(other_row):
+                if value:
+                    row[i] += value
+
+    def clear(self) -> None:
+        for row in self._rows:
+            row[:] = array.array('d', bytes(8 * self._width))
+
+
+class QueryStatsTable:
+
+    def __init__(
+        self,
+        max_size: int,
+        *,
+        sketch_width: int = defines.QUERY_STATS_SKETCH_WIDTH,
+        sketch_depth: int = defines.QUERY_STATS_SKETCH_DEPTH,
+    ) -> None:
+        self._max_size = max_size
+        self._entries: dict[tuple[str, str], StatementStats] = {}
+        # One (total_time, branch, id) item per tracked statement, with
+        # the total time as of when it was pushed.  Total times only grow,
+        # so the items are lower bounds and are refreshed lazily when they
+        # reach the top (see _evict_below()).
+        self._heap: list[tuple[float, str, str]] = []
+        self._sketch = CountMinSketch(sketch_width, sketch_depth)
+        # A lower bound of the total time of the tracked statements: it
+        # only grows, so a statement estimated below it is never tracked.
+        self._min_total_time = 0.0
+        self._other_calls = 0
+        self._other_time = 0.0
+
+    def is_enabled(self) -> bool:
+        return self._max_size > 0
+
+    def record(
+        self,
+        branch: str,
+        stmt_id: str,
+        query: str,
+        duration: float,
+        *,
+        tag: Optional[str] = None,
+        response_bytes: int = 0,
+        cache_hit: bool = True,
+    ) -> None:
+        if self._max_size <= 0:
+            return
+        key = (branch, stmt_id)
+        estimate = self._sketch.add(f'{branch}\x00{stmt_id}', duration)
+        entry = self._entries.get(key)
+        if entry is None:
+            if (
+                len(self._entries) >= self._max_size
+                and not self._evict_below(estimate)
+            ):
+                self._other_calls += 1
+                self._other_time += duration
+                return
+            earlier = max(estimate - duration, 0.0)
+            entry = self._entries[key] = StatementStats(
+                branch=branch,
+                id=stmt_id,
+                query=query[:defines.QUERY_STATS_MAX_QUERY_LENGTH],
+                tag=tag,
+                total_time=earlier,
+                estimated_time=earlier,
+            )
+            heapq.heappush(self._heap, (earlier, branch, stmt_id))
+        entry.record(duration, response_bytes, cache_hit)
+
+    def _evict_below(self, total_time: float) -> bool:
+        if total_time <= self._min_total_time:
+            return False
+        heap = self._heap
+        while True:
+            pushed_time, branch, stmt_id = heap[0]
+            coldest = self._entries[branch, stmt_id]
+            if coldest.total_time == pushed_time:
+                break
+            heapq.heapreplace(heap, (coldest.total_time, branch, stmt_id))
+        self._min_total_time = coldest.total_time
+        if total_time <= coldest.total_time:
+            return False
+        heapq.heappop(heap)
+        del self._entries[coldest.branch, coldest.id]
+        self._other_calls += coldest.calls
+        self._other_time += coldest.total_time - coldest.estimated_time
+        return True
+
+    def merge(self, other: QueryStatsTable) -> None:
+        for key, other_entry in other._entries.items():
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = dataclasses.replace(other_entry)
+            else:
+                entry.merge(other_entry)
+        self._sketch.merge(other._sketch)
+        self._other_calls += other._other_calls
+        self._other_time += other._other_time
+
+        if len(self._entries) > self._max_size:
+            by_time = sorted(
+                self._entries.values(),
+                key=lambda e: e.total_time,
+                reverse=True,
+            )
+            for entry in by_time[self._max_size:]:
+                del self._entries[entry.branch, entry.id]
+                self._other_calls += entry.calls
+                self._other_time += entry.total_time - entry.estimated_time
+        self._heap = [
+            (e.total_time, e.branch, e.id) for e in self._entries.values()
+        ]
+        heapq.heapify(self._heap)
+        self._min_total_time = 0.0
+
+    def get_stats(
+        self,
+        *,
+        branch: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """Return the tracked statements by descending total time."""
+        entries = sorted(
+            (
+                e for e in self._entries.values()
+                if branch is None or e.branch == branch
+            ),
+            key=lambda e: e.total_time,
+            reverse=True,
+        )
+        if limit is not None:
+            entries = entries[:limit]
+        return {
+            'statements': [e.to_json() for e in entries],
+            'other': {
+                'calls': self._other_calls,
+                'total_time': self._other_time,
+            },
+        }
+
+    def reset(self) -> None:
+        self._entries.clear()
+        self._heap.clear()
+        self._sketch.clear()
+        self._min_total_time = 0.0
+        self._other_calls = 0
+        self._other_time = 0.0
@@ -0,0 +1,162 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Cache of the results of read-only queries.
+
+Clients opt in per query with the "result-cache" protocol annotation,
+whose value is the maximum age of a cached result in seconds.
+
+A cached result is only valid for the schema version and the number of
+committed data modifications of the branch it was read from, so any
+DML on the branch through this server invalidates all of its cached
+results.  Writes the server does not see (made by other servers or
+directly in Postgres) are only bounded by the maximum age.
+"""
+
+from __future__ import annotations
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    NamedTuple,
+    Optional,
+    TYPE_CHECKING,
+)
+
+import collections
+import time
+
+from edb import errors
+from edb.edgeql import qltypes
+
+from . import defines
+
+if TYPE_CHECKING:
+    from edb.server.compiler import dbstate
+
+
+class _Entry(NamedTuple):
+    stamp: Hashable
+    created_at: float
+    data: bytes
+
+
+class ResultCache:
+
+    def __init__(
+        self,
+        *,
+        max_size: int = defines.RESULT_CACHE_SIZE,
+        max_entry_size: int = defines.RESULT_CACHE_MAX_ENTRY_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_size = max_size
+        self._max_entry_size = max_entry_size
+        self._clock = clock
+        self._entries: collections.OrderedDict[Hashable, _Entry] = (
+            collections.OrderedDict()
+        )
+        self._size = 0
+
+    @property
+    def max_entry_size(self) -> int:
+        return self._max_entry_size
+
+    def get(
+        self,
+        key: Hashable,
+        stamp: Hashable,
+        max_age: float,
+    ) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if (
+            entry.stamp != stamp
+            or self._clock() - entry.created_at > max_age
+        ):
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.data
+
+    def put(
+        self,
+        key: Hashable,
+        stamp: Hashable,
+        data: bytes,
+        *,
+        created_at: float,
+    ) -> None:
+        # created_at is when the query started, so that the age of the
+        # result accounts for its execution time.
+        if len(data) > self._max_entry_size:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(stamp, created_at, data)
+        self._size += len(data)
+        while self._size > self._max_size:
+            self._remove(next(iter(self._entries)))
+
+    def now(self) -> float:
+        return self._clock()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._size -= len(entry.data)
+
+    def get_debug_info(self) -> dict[str, Any]:
+        return dict(
+            entries=len(self._entries),
+            size=self._size,
+            max_size=self._max_size,
+        )
+
+
+def is_cacheable(query_unit: dbstate.QueryUnit) -> bool:
+    """Check if the results of a query unit can be cached at all."""
+    return (
+        bool(query_unit.sql)
+        # Capabilities are only required by DML, DDL, configuration and
+        # transaction control.
+        and not query_unit.capabilities
+        and query_unit.volatility <= qltypes.Volatility.Stable
+        and not query_unit.is_explain
+        and not query_unit.needs_readback
+        # Only cache results that have nothing to report besides the data.
+        and not query_unit.warnings
+    )
+
+
+def parse_max_age(value: str) -> float:
+    """Parse the value of the "result-cache" annotation."""
+    try:
+        max_age = float(value)
+    except ValueError:
+        max_age = -1
+    if not (0 < max_age <= defines.RESULT_CACHE_MAX_AGE):
+        raise errors.BinaryProtocolError(
+            f'bad annotation: result-cache must be a number of seconds '
+            f'between 0 and {defines.RESULT_CACHE_MAX_AGE}'
+        )
+    return max_age
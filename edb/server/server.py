@@ -54,6 +54,7 @@ from edb import errors
 
 from edb.common import devmode
 from edb.common import lru
+from edb.common import sampler
 from edb.common import secretkey
 from edb.common import windowedsum
 from edb.common.log import current_tenant
@@ -96,6 +97,12 @@ ADMIN_PLACEHOLDER = "<edgedb:admin>"
 logger = logging.getLogger('edb.server')
 log_metrics = logging.getLogger('edb.server.metrics')
 
+# The profiling endpoint of the system API is always available in the dev
+# and test modes, and has to be enabled explicitly otherwise.
+PROFILING_ENDPOINT_ENABLED = (
+    os.environ.get('GEL_SERVER_PROFILING_ENDPOINT') == '1'
+)
+
 
 class StartupError(Exception):
     pass
@@ -168,6 +175,7 @@ class BaseServer:
         compiler_state: edbcompiler.CompilerState,
         use_monitor_fs: bool = False,
         net_worker_mode: srvargs.NetWorkerMode = srvargs.NetWorkerMode.Default,
+        binary_compression: Sequence[str] = (),
     ):
         self.__loop = asyncio.get_running_loop()
         self._use_monitor_fs = use_monitor_fs
@@ -224,6 +232,8 @@ class BaseServer:
         self._devmode = devmode.is_in_dev_mode()
         self._testmode = testmode
 
+        self._profiler: Optional[sampler.SamplingProfiler] = None
+
         self._binary_proto_id_counter = 0
         self._binary_conns = collections.OrderedDict()
         self._pgext_conns = {}
@@ -268,6 +278,8 @@ class BaseServer:
             for origin in cors_always_allowed_origins.split(',')
         ] if cors_always_allowed_origins else []
 
+        self._binary_compression = frozenset(binary_compression)
+
         self._file_watch_handles = []
         self._tls_certs_reload_retry_handle: Any | asyncio.TimerHandle = None
 
@@ -324,9 +336,46 @@ class BaseServer:
     def is_admin_ui_enabled(self):
         return self._admin_ui
 
+    def is_profiling_enabled(self) -> bool:
+        return PROFILING_ENDPOINT_ENABLED or self._devmode or self._testmode
+
+    def is_profiling(self) -> bool:
+        return self._profiler is not None
+
+    async def run_sampling_profiler(
+        self,
+        duration: float,
+        interval: float,
+    ) -> sampler.Samples:
+        """Sample the stacks of the server and of its compiler workers.
+
+        Returns the samples of all processes merged, with the process
+        as the outermost frame.
+        """
+        assert self._profiler is None
+        self._profiler = profiler = sampler.SamplingProfiler(
+            interval=interval)
+        pool = self._compiler_pool
+        try:
+            profiler.start(duration)
+            if pool is not None:
+                await pool.start_profiling(duration, interval)
+            await asyncio.sleep(duration)
+            samples = {'server': profiler.stop()}
+            if pool is not None:
+                samples.update(await pool.stop_profiling())
+        finally:
+            # The workers stop on their own after the duration.
+            profiler.stop()
+            self._profiler = None
+        return sampler.merge_samples(samples)
+
     def get_cors_always_allowed_origins(self):
         return self._cors_always_allowed_origins
 
+    def get_binary_compression(self) -> frozenset[str]:
+        return self._binary_compression
+
     def on_binary_client_created(self) -> str:
         self._binary_proto_id_counter += 1
         return str(self._binary_proto_id_counter)
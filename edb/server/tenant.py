@@ -56,6 +56,8 @@ from edb.common import retryloop
 from edb.common import verutils
 from edb.common.log import current_tenant
 
+from . import admission
+from . import auto_explain
 from . import auth
 from . import args as srvargs
 from . import config
@@ -67,6 +69,8 @@ from . import metrics
 from . import pgcon
 from . import compiler as edbcompiler
 from . import pgconnparams
+from . import query_stats
+from . import result_cache
 
 from .ha import adaptive as adaptive_ha
 from .ha import base as ha_base
@@ -103,6 +107,42 @@ class RoleDescriptor(TypedDict):
     apply_access_policies_pg_default: bool | None
 
 
+class PoolMetricsCollector:
+    # Exports the backend connection pool timings as server metrics.
+
+    def __init__(self, tenant_label: str) -> None:
+        self._tenant_label = tenant_label
+
+    def on_acquire(self, dbname: str, wait_time: float) -> None:
+        metrics.backend_pool_acquire_wait.observe(
+            wait_time, self._tenant_label, dbname
+        )
+
+    def on_connect(self, dbname: str, duration: float) -> None:
+        metrics.backend_pool_connect_duration.observe(
+            duration, self._tenant_label, dbname
+        )
+
+    def on_transfer(self, dbname: str, duration: float) -> None:
+        metrics.backend_pool_transfer_duration.observe(
+            duration, self._tenant_label, dbname
+        )
+
+    def on_steal(self, dbname: str) -> None:
+        metrics.backend_pool_conn_steals.inc(1.0, self._tenant_label, dbname)
+
+    def clear_branch(self, dbname: str) -> None:
+        # Drop the series of a dropped branch, so that they don't pile
+        # up as branches come and go.
+        def label_filter(tenant: str, branch: str) -> bool:
+            return tenant == self._tenant_label and branch == dbname
+
+        metrics.backend_pool_acquire_wait.clear(label_filter)
+        metrics.backend_pool_connect_duration.clear(label_filter)
+        metrics.backend_pool_transfer_duration.clear(label_filter)
+        metrics.backend_pool_conn_steals.clear(label_filter)
+
+
 class Tenant(ha_base.ClusterProtocol):
     _server: edbserver.BaseServer
     _cluster: pgcluster.BaseCluster
@@ -129,6 +169,7 @@ class Tenant(ha_base.ClusterProtocol):
     _max_backend_connections: int
     _suggested_client_pool_size: int
     _pg_pool: connpool.Pool
+    _pool_metrics: PoolMetricsCollector
     _pg_unavailable_msg: str | None
     _init_con_data: list[config.ConState]
     _init_con_sql: bytes | None
@@ -166,6 +207,16 @@ class Tenant(ha_base.ClusterProtocol):
         max_backend_connections: int,
         backend_adaptive_ha: bool = False,
         extensions_dir: tuple[pathlib.Path, ...] = (),
+        role_admission_limits: admission.AdmissionLimits = (
+            admission.UNLIMITED
+        ),
+        branch_admission_limits: admission.AdmissionLimits = (
+            admission.UNLIMITED
+        ),
+        auto_explain_settings: auto_explain.AutoExplainSettings = (
+            auto_explain.DISABLED
+        ),
+        query_stats_size: int = 0,
     ):
         self._cluster = cluster
         self._tenant_id = self.get_backend_runtime_params().tenant_id
@@ -210,13 +261,31 @@ class Tenant(ha_base.ClusterProtocol):
             ),
             defines.MIN_SUGGESTED_CLIENT_POOL_SIZE,
         )
+        self._pool_metrics = PoolMetricsCollector(instance_name)
+        pool_options: dict[str, Any] = {}
+        if connpool.PREWARM_ENABLED:
+            pool_options['predictor'] = connpool.DemandPredictor()
+        if connpool.AFFINITY_ENABLED:
+            pool_options['affinity'] = connpool.AffinityPolicy()
         self._pg_pool = connpool.Pool(
             connect=self._pg_connect,
             disconnect=self._pg_disconnect,
             # 1 connection is reserved for the system DB
             max_capacity=max_backend_connections - 1,
+            metrics_collector=self._pool_metrics,
+            **pool_options,
         )
         self._pg_unavailable_msg = None
+        self._result_cache = result_cache.ResultCache()
+        self._slow_query_log = auto_explain.SlowQueryLog(
+            auto_explain_settings, tenant_label=instance_name
+        )
+        self._query_stats = query_stats.QueryStatsTable(query_stats_size)
+        self._admission = admission.AdmissionController(
+            instance_name,
+            role_limits=role_admission_limits,
+            branch_limits=branch_admission_limits,
+        )
         self._block_new_connections = set()
         self._report_config_data = {}
         self._init_con_data = []
@@ -360,6 +429,18 @@ class Tenant(ha_base.ClusterProtocol):
     def suggested_client_pool_size(self) -> int:
         return self._suggested_client_pool_size
 
+    def get_admission_controller(self) -> admission.AdmissionController:
+        return self._admission
+
+    def get_result_cache(self) -> result_cache.ResultCache:
+        return self._result_cache
+
+    def get_slow_query_log(self) -> auto_explain.SlowQueryLog:
+        return self._slow_query_log
+
+    def get_query_stats(self) -> query_stats.QueryStatsTable:
+        return self._query_stats
+
     def get_pg_dbname(self, dbname: str) -> str:
         return self._cluster.get_db_name(dbname)
 
@@ -1118,22 +1199,40 @@ class Tenant(ha_base.ClusterProtocol):
     @contextlib.asynccontextmanager
     async def with_pgcon(
         self, dbname: str, *,
-        discard: bool=False
+        discard: bool=False,
+        sql_hash: Optional[bytes]=None,
     ) -> AsyncGenerator[pgcon.PGConnection, None]:
-        conn = await self.acquire_pgcon(dbname=dbname)
+        conn = await self.acquire_pgcon(dbname=dbname, sql_hash=sql_hash)
         try:
             yield conn
         finally:
             self.release_pgcon(dbname, conn, discard=discard)
 
-    async def acquire_pgcon(self, dbname: str) -> pgcon.PGConnection:
+    async def acquire_pgcon(
+        self,
+        dbname: str,
+        *,
+        sql_hash: Optional[bytes] = None,
+    ) -> pgcon.PGConnection:
+        # sql_hash is the name of the prepared statement the caller is
+        # going to run, if known: with statement affinity enabled, an idle
+        # connection that has it prepared already is preferred.
         if self._pg_unavailable_msg is not None:
             raise errors.BackendUnavailableError(
                 "Postgres is not available: " + self._pg_unavailable_msg
             )
 
+        prefer: Optional[Callable[[pgcon.PGConnection], bool]] = None
+        if sql_hash and connpool.STMT_AFFINITY_ENABLED:
+            stmt_name = sql_hash
+
+            def has_stmt(conn: pgcon.PGConnection) -> bool:
+                return conn.has_prepared_statement(stmt_name)
+
+            prefer = has_stmt
+
         for _ in range(self._pg_pool.max_capacity):
-            conn = await self._pg_pool.acquire(dbname)
+            conn = await self._pg_pool.acquire(dbname, prefer=prefer)
             if not conn.is_healthy():
                 logger.warning("acquired an unhealthy pgcon; discard now")
             elif conn.last_init_con_data is not self._init_con_data:
@@ -1920,6 +2019,7 @@ class Tenant(ha_base.ClusterProtocol):
             if self._dbindex.has_db(dbname):
                 self._dbindex.unregister_db(dbname)
             self._block_new_connections.discard(dbname)
+            self._pool_metrics.clear_branch(dbname)
         except Exception:
             metrics.background_errors.inc(
                 1.0, self._instance_name, "on_after_drop_db"
@@ -2201,6 +2301,16 @@ class Tenant(ha_base.ClusterProtocol):
         if to_add or not to_invalidate:
             self.create_task(task(), interruptable=True)
 
+    def get_pg_pool_debug_info(self) -> dict[str, Any]:
+        return dict(
+            max_capacity=self._pg_pool.max_capacity,
+            current_capacity=self._pg_pool.current_capacity,
+            active_conns=self._pg_pool.active_conns,
+            failed_connects=self._pg_pool.failed_connects,
+            failed_disconnects=self._pg_pool.failed_disconnects,
+            blocks=self._pg_pool.get_block_table(),
+        )
+
     def get_debug_info(self) -> dict[str, Any]:
         from . import smtp
 
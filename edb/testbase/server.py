@@ -37,6 +37,7 @@ import base64
 import contextlib
 import dataclasses
 import functools
+import hashlib
 import heapq
 import http
 import http.client
@@ -2222,6 +2223,7 @@ async def setup_test_cases(
     try_cached_db=False,
     skip_empty_databases=False,
     verbose=False,
+    use_templates=False,
 ):
     setup = get_test_cases_setup(cases)
 
@@ -2232,7 +2234,8 @@ async def setup_test_cases(
             if skip_empty_databases and not setup_script:
                 continue
             await _setup_database(
-                dbname, setup_script, conn, stats, try_cached_db)
+                dbname, setup_script, conn, stats, try_cached_db,
+                use_templates)
             if verbose:
                 print(f' -> {dbname}: OK', flush=True)
     else:
@@ -2255,12 +2258,33 @@ async def setup_test_cases(
 
                 g.create_task(controller(
                     _setup_database, dbname, setup_script, conn, stats,
-                    try_cached_db))
+                    try_cached_db, use_templates))
     return stats
 
 
+def get_setup_template_name(setup_script: str) -> str:
+    """Return the name of the template branch for a setup script."""
+    key = f'{edgedb_defines.EDGEDB_CATALOG_VERSION}\n{setup_script}'
+    return 'tpl_' + hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+async def _clone_setup_template(admin_conn, dbname, template) -> bool:
+    qdbname = qlquote.quote_ident(dbname)
+    clone = f'CREATE DATA BRANCH {qdbname} FROM {template};'
+    try:
+        await admin_conn.execute(clone)
+    except edgedb.UnknownDatabaseError:
+        return False
+    except edgedb.DuplicateDatabaseDefinitionError:
+        # Left over from a previous run against the same cluster.
+        await admin_conn.execute(f'DROP BRANCH {qdbname};')
+        await admin_conn.execute(clone)
+    return True
+
+
 async def _setup_database(
-        dbname, setup_script, conn_args, stats, try_cached_db):
+        dbname, setup_script, conn_args, stats, try_cached_db,
+        use_templates=False):
     start_time = time.monotonic()
     default_args = {
         'user': edgedb_defines.EDGEDB_SUPERUSER,
@@ -2280,7 +2304,20 @@ async def _setup_database(
             f'db; {type(ex).__name__}({ex})'
         ) from ex
 
+    template = None
+    if use_templates and setup_script:
+        template = get_setup_template_name(setup_script)
+
     try:
+        if template is not None and await _clone_setup_template(
+            admin_conn, dbname, template
+        ):
+            elapsed = time.monotonic() - start_time
+            stats.append(
+                ('setup::' + dbname,
+                 {'running-time': elapsed, 'cached': False,
+                  'template': True}))
+            return
         await admin_conn.execute(
             f'CREATE DATABASE {qlquote.quote_ident(dbname)};'
         )
@@ -2320,6 +2357,22 @@ async def _setup_database(
         await dbconn.aclose()
 
     elapsed = time.monotonic() - start_time
+
+    if template is not None:
+        admin_conn = await tconn.async_connect_test_client(
+            database=edgedb_defines.EDGEDB_SUPERUSER_DB,
+            **default_args)
+        try:
+            await admin_conn.execute(
+                f'CREATE DATA BRANCH {template} '
+                f'FROM {qlquote.quote_ident(dbname)};'
+            )
+        except edgedb.DuplicateDatabaseDefinitionError:
+            # Another database with the same setup script got there first.
+            pass
+        finally:
+            await admin_conn.aclose()
+
     stats.append(
         ('setup::' + dbname, {'running-time': elapsed, 'cached': False}))
 
@@ -0,0 +1,203 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+from __future__ import annotations
+from typing import Any, Optional
+
+import asyncio
+import json
+import pathlib
+import sys
+
+import click
+
+from edb.tools.edb import edbcommands
+
+from . import e2e
+from . import micro
+from . import runner
+
+
+@edbcommands.command('bench')
+@click.option('-k', 'patterns', multiple=True, metavar='PATTERN',
+              help='only run benchmarks matching the glob pattern '
+                   '(can be repeated)')
+@click.option('--e2e', 'with_e2e', is_flag=True,
+              help='also run the end-to-end benchmarks against '
+                   'a local server')
+@click.option('--backend-dsn',
+              help='use an existing Postgres for the end-to-end benchmarks '
+                   'instead of a temporary cluster')
+@click.option('--list', 'list_only', is_flag=True,
+              help='list the benchmarks and exit')
+@click.option('-r', '--repeat', type=click.IntRange(min=1), default=7,
+              show_default=True,
+              help='number of samples of each micro benchmark')
+@click.option('--min-time', type=float, default=0.1, show_default=True,
+              help='minimum duration of a micro benchmark sample, '
+                   'in seconds')
+@click.option('-n', '--count', type=click.IntRange(min=1), default=500,
+              show_default=True,
+              help='number of timed queries of each end-to-end benchmark')
+@click.option('--warmup', type=click.IntRange(min=0), default=50,
+              show_default=True,
+              help='number of untimed queries before each end-to-end '
+                   'benchmark')
+@click.option('-o', '--output', type=click.Path(path_type=pathlib.Path),
+              help='write the results as JSON to this file')
+@click.option('--json', 'as_json', is_flag=True,
+              help='print the results as JSON')
+@click.option('--compare', 'baseline_path',
+              type=click.Path(exists=True, path_type=pathlib.Path),
+              help='compare the results with a previous JSON output')
+@click.option('--threshold', type=float, default=0.1, show_default=True,
+              help='relative slowdown of the median reported as '
+                   'a regression by --compare')
+def bench(
+    *,
+    patterns: tuple[str, ...],
+    with_e2e: bool,
+    backend_dsn: Optional[str],
+    list_only: bool,
+    repeat: int,
+    min_time: float,
+    count: int,
+    warmup: int,
+    output: Optional[pathlib.Path],
+    as_json: bool,
+    baseline_path: Optional[pathlib.Path],
+    threshold: float,
+):
+    """Run the benchmarks of the server hot paths.
+
+    Micro benchmarks time the compiler and schema machinery in-process;
+    end-to-end benchmarks (--e2e) measure query latency over the binary
+    protocol and HTTP against a freshly bootstrapped local server.
+
+    Results can be saved with -o and compared with a later run of the
+    same benchmarks with --compare, which exits with a non-zero status
+    when any benchmark regressed by more than --threshold.
+    """
+    groups = ['micro', 'e2e'] if with_e2e else ['micro']
+    benchmarks = runner.select(groups=groups, patterns=patterns)
+
+    if list_only:
+        for b in benchmarks:
+            click.echo(f'{b.name:<24} {b.group:<6} {b.description}')
+        return
+
+    if not benchmarks:
+        raise click.UsageError('no benchmarks selected')
+
+    baseline = None
+    if baseline_path is not None:
+        baseline = json.loads(baseline_path.read_text())
+
+    results: dict[str, dict[str, Any]] = {}
+
+    fixture = micro.Fixture()
+    for b in benchmarks:
+        if b.group != 'micro':
+            continue
+        loops, samples = runner.measure(
+            b.setup(fixture), repeat=repeat, min_time=min_time)
+        results[b.name] = runner.make_result(b, samples, loops=loops)
+        results[b.name].update(fixture.extra.get(b.name, {}))
+        if not as_json:
+            _print_result(b.name, results[b.name])
+
+    e2e_benchmarks = [b for b in benchmarks if b.group == 'e2e']
+    if e2e_benchmarks:
+        e2e_results = asyncio.run(e2e.run(
+            e2e_benchmarks,
+            backend_dsn=backend_dsn,
+            count=count,
+            warmup=warmup,
+        ))
+        results.update(e2e_results)
+        if not as_json:
+            for name, res in e2e_results.items():
+                _print_result(name, res)
+
+    report = runner.make_results(results)
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2) + '\n')
+    if as_json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if baseline is not None:
+        try:
+            comparisons = runner.compare(baseline, report)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        # Keep stdout parseable when the results are printed as JSON.
+        regressed = _print_comparisons(
+            comparisons, threshold=threshold, err=as_json)
+        if regressed:
+            sys.exit(1)
+
+
+def _format_time(seconds: float) -> str:
+    if seconds >= 1:
+        return f'{seconds:.3f}s'
+    elif seconds >= 1e-3:
+        return f'{seconds * 1e3:.3f}ms'
+    else:
+        return f'{seconds * 1e6:.2f}us'
+
+
+def _print_result(name: str, res: dict[str, Any]) -> None:
+    dev = res['stdev'] / res['mean'] * 100 if res['mean'] else 0.0
+    line = (
+        f'{name:<24} median {_format_time(res["median"]):>10}  '
+        f'min {_format_time(res["min"]):>10}  +- {dev:4.1f}%'
+    )
+    if res['group'] == 'e2e':
+        line += f'  p95 {_format_time(res["p95"]):>10}'
+    if 'compression_ratio' in res:
+        line += f'  ratio {res["compression_ratio"]:.2f}'
+    if 'peak_rss_growth' in res:
+        line += f'  rss +{res["peak_rss_growth"] / 2**20:.1f}MiB'
+    click.echo(line)
+
+
+def _print_comparisons(
+    comparisons: list[runner.Comparison],
+    *,
+    threshold: float,
+    err: bool,
+) -> bool:
+    regressed = False
+    click.echo(err=err)
+    for c in comparisons:
+        if c.is_regression(threshold):
+            regressed = True
+            verdict = 'REGRESSION'
+        elif c.ratio < 1 - threshold:
+            verdict = 'faster'
+        else:
+            verdict = ''
+        click.echo(
+            f'{c.name:<24} {_format_time(c.baseline):>10} -> '
+            f'{_format_time(c.current):>10}  '
+            f'{(c.ratio - 1) * 100:+6.1f}%  {verdict}'.rstrip(),
+            err=err,
+        )
+    return regressed
@@ -0,0 +1,290 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""End-to-end latency benchmarks against a local server."""
+
+from __future__ import annotations
+from typing import Any, Optional
+
+import asyncio
+import base64
+import http.client
+import json
+import ssl
+
+import psutil
+
+from edb.protocol import messages
+from edb.protocol import protocol
+from edb.server import defines
+from edb.testbase import server as tb
+
+from . import micro
+from . import runner
+from .runner import benchmark
+
+
+SETUP = f'''
+    start migration to {{
+        using future simple_scoping;
+        module default {{{micro.SCHEMA}}}
+    }};
+    populate migration;
+    commit migration;
+
+    create extension edgeql_http;
+
+    for i in range_unpack(range(0, 100)) union (
+        insert User {{
+            name := 'user' ++ <str>i,
+            email := 'user' ++ <str>i ++ '@example.com',
+        }}
+    );
+    update User set {{
+        friends := (select detached User order by random() limit 5)
+    }};
+    for i in range_unpack(range(0, 1000)) union (
+        insert Issue {{
+            number := i,
+            title := 'Issue ' ++ <str>i,
+            body := 'Lorem ipsum ' ++ <str>i,
+            status := Status.Open if i % 3 = 0 else Status.Closed,
+            owner := (
+                select User filter .name = 'user' ++ <str>(i % 100)
+            ),
+            watchers := (select User order by random() limit 3),
+        }}
+    );
+'''
+
+SHAPE_QUERY = '''
+    select Issue {
+        number,
+        title,
+        status,
+        owner: { name },
+        watchers: { name, email },
+    }
+    filter .status = Status.Open
+    order by .number
+    limit 10
+'''
+
+ARGS_QUERY = '''
+    select Issue { number, title }
+    filter .number in array_unpack(<array<int64>>$numbers)
+        and .title like <str>$pattern
+        and .owner.name != <str>$name
+'''
+
+ARGS = dict(
+    numbers=list(range(0, 1000, 7)),
+    pattern='Issue %',
+    name='user0',
+)
+
+# About 20MiB of results, many times the buffers of the server.
+LARGE_RESULT_QUERY = '''
+    select str_repeat('x', 1024) ++ <str>range_unpack(range(0, 20000))
+'''
+
+# The slow consumer stops reading for SLOW_CONSUMER_PAUSE seconds after
+# every SLOW_CONSUMER_ROWS rows.
+SLOW_CONSUMER_ROWS = 1000
+SLOW_CONSUMER_PAUSE = 0.01
+
+
+class Fixture:
+
+    def __init__(
+        self,
+        server: Any,
+        conn: Any,
+        protocol_conn: protocol.Connection,
+    ) -> None:
+        self.conn = conn
+        self.protocol_conn = protocol_conn
+        self.server_process = psutil.Process(server.pid)
+        # Results besides the latency, by benchmark name.
+        self.extra: dict[str, dict[str, Any]] = {}
+        conn_args = server.get_connect_args()
+        tls_context = ssl.create_default_context(
+            ssl.Purpose.SERVER_AUTH,
+            cafile=conn_args['tls_ca_file'],
+        )
+        tls_context.check_hostname = False
+        self.http_con = http.client.HTTPSConnection(
+            conn_args['host'], conn_args['port'], context=tls_context)
+        key = f'{conn_args["user"]}:{conn_args["password"]}'.encode()
+        self.http_headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Basic {base64.b64encode(key).decode()}',
+        }
+
+    def http_query(self, query: str, variables: Optional[dict] = None):
+        body: dict[str, Any] = {'query': query}
+        if variables is not None:
+            body['variables'] = variables
+        self.http_con.request(
+            'POST',
+            f'/branch/{defines.EDGEDB_SUPERUSER_DB}/edgeql',
+            body=json.dumps(body).encode(),
+            headers=self.http_headers,
+        )
+        resp = self.http_con.getresponse()
+        data = resp.read()
+        if resp.status != http.HTTPStatus.OK:
+            raise RuntimeError(
+                f'HTTP query failed with {resp.status}: {data!r}')
+        return data
+
+    def close(self) -> None:
+        self.http_con.close()
+
+
+async def run(
+    benchmarks: list[runner.Benchmark],
+    *,
+    backend_dsn: Optional[str],
+    count: int,
+    warmup: int,
+) -> dict[str, dict[str, Any]]:
+    results = {}
+    async with tb.start_edgedb_server(
+        backend_dsn=backend_dsn,
+        compiler_pool_size=2,
+    ) as sd:
+        conn = await sd.connect()
+        protocol_conn = await protocol.new_connection(
+            **sd.get_connect_args())
+        await protocol_conn.connect()
+        fixture = Fixture(sd, conn, protocol_conn)
+        try:
+            await conn.execute(SETUP)
+            for bench in benchmarks:
+                bench_count = count
+                bench_warmup = warmup
+                if bench.max_count is not None:
+                    bench_count = min(count, bench.max_count)
+                    bench_warmup = min(warmup, bench.max_count)
+                samples = await runner.measure_latency(
+                    bench.setup(fixture),
+                    count=bench_count,
+                    warmup=bench_warmup,
+                )
+                results[bench.name] = runner.make_result(bench, samples)
+                results[bench.name].update(fixture.extra.get(bench.name, {}))
+        finally:
+            fixture.close()
+            await protocol_conn.aclose()
+            await conn.aclose()
+    return results
+
+
+@benchmark('e2e_binary_trivial', group='e2e')
+def bench_binary_trivial(fx: Fixture):
+    """Run "select 1" over the binary protocol."""
+    async def run():
+        await fx.conn.query_single('select 1')
+    return run
+
+
+@benchmark('e2e_binary_shape', group='e2e')
+def bench_binary_shape(fx: Fixture):
+    """Select a nested shape over the binary protocol."""
+    async def run():
+        await fx.conn.query(SHAPE_QUERY)
+    return run
+
+
+@benchmark('e2e_binary_args', group='e2e')
+def bench_binary_args(fx: Fixture):
+    """Run a query with arguments, which the server recodes for Postgres."""
+    async def run():
+        await fx.conn.query(ARGS_QUERY, **ARGS)
+    return run
+
+
+@benchmark('e2e_http_shape', group='e2e')
+def bench_http_shape(fx: Fixture):
+    """Select a nested shape over the EdgeQL HTTP endpoint."""
+    async def run():
+        fx.http_query(SHAPE_QUERY)
+    return run
+
+
+@benchmark('e2e_http_args', group='e2e')
+def bench_http_args(fx: Fixture):
+    """Run a query with arguments over the EdgeQL HTTP endpoint."""
+    async def run():
+        fx.http_query(ARGS_QUERY, ARGS)
+    return run
+
+
+@benchmark('e2e_binary_slow_consumer', group='e2e', max_count=5)
+def bench_binary_slow_consumer(fx: Fixture):
+    """Stream a large result to a client that keeps pausing its reads.
+
+    Also reports the peak growth of the server RSS while streaming,
+    which stays flat as long as the server applies backpressure instead
+    of buffering the results for the client.
+    """
+    con = fx.protocol_conn
+    proc = fx.server_process
+    extra = fx.extra['e2e_binary_slow_consumer'] = {'peak_rss_growth': 0}
+
+    async def run():
+        base_rss = peak_rss = proc.memory_info().rss
+        await con.send(
+            messages.Execute(
+                annotations=[],
+                command_text=LARGE_RESULT_QUERY,
+                input_language=messages.InputLanguage.EDGEQL,
+                output_format=messages.OutputFormat.BINARY,
+                expected_cardinality=messages.Cardinality.MANY,
+                allowed_capabilities=messages.Capability.ALL,
+                compilation_flags=messages.CompilationFlag(0),
+                implicit_limit=0,
+                input_typedesc_id=b'\0' * 16,
+                output_typedesc_id=b'\0' * 16,
+                state_typedesc_id=b'\0' * 16,
+                arguments=b'',
+                state_data=b'',
+            ),
+            messages.Sync(),
+        )
+        rows = 0
+        while True:
+            msg = await con.recv()
+            if isinstance(msg, messages.Data):
+                rows += 1
+                if rows % SLOW_CONSUMER_ROWS == 0:
+                    con.pause_reading()
+                    try:
+                        await asyncio.sleep(SLOW_CONSUMER_PAUSE)
+                        peak_rss = max(peak_rss, proc.memory_info().rss)
+                    finally:
+                        con.resume_reading()
+            elif isinstance(msg, messages.ErrorResponse):
+                raise RuntimeError(f'query failed: {msg.message}')
+            elif isinstance(msg, messages.ReadyForCommand):
+                break
+        extra['peak_rss_growth'] = max(
+            extra['peak_rss_growth'], peak_rss - base_rss)
+    return run
@@ -0,0 +1,625 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""In-process benchmarks of the compiler and schema hot paths."""
+
+from __future__ import annotations
+from typing import Any, Callable
+
+import functools
+import json
+import pathlib
+import pickle
+import uuid
+
+import click
+
+import edb._edgeql_parser as rust_parser
+
+from edb import graphql
+from edb import lib as stdlib_dir
+from edb.edgeql import compiler as qlcompiler
+from edb.edgeql import declarative as s_decl
+from edb.edgeql import parser as qlparser
+from edb.edgeql import tokenizer as qltokenizer
+from edb.edgeql.parser.grammar import tokens as qltokens
+from edb.ir import ast as irast
+from edb.pgsql import codegen as pgcodegen
+from edb.pgsql import compiler as pgcompiler
+from edb.schema import ddl as s_ddl
+from edb.schema import delta as sd
+from edb.schema import schema as s_schema
+from edb.server import bootstrap
+from edb.server import compression
+from edb.server import defines
+from edb.server.compiler import sertypes
+
+from .runner import benchmark
+
+
+SCHEMA = '''
+    scalar type Status extending enum<Open, Closed>;
+
+    type User {
+        required name: str {
+            constraint exclusive;
+        };
+        email: str;
+        multi friends: User;
+    }
+
+    type Issue {
+        required number: int64 {
+            constraint exclusive;
+        };
+        required title: str;
+        body: str;
+        status: Status;
+        required owner: User;
+        multi watchers: User;
+        index on (.title);
+    }
+
+    type Comment {
+        required body: str;
+        required owner: User;
+        required issue: Issue;
+        created: datetime {
+            default := datetime_current();
+        };
+    }
+'''
+
+# Declarations added by the migration measured by delta_schemas.
+MIGRATION = '''
+    type Label {
+        required name: str {
+            constraint exclusive;
+        };
+    }
+
+    type LabeledIssue extending Issue {
+        multi labels: Label;
+        priority: int16;
+    }
+'''
+
+TEST_SCHEMAS_DIR = (
+    pathlib.Path(__file__).parent.parent.parent.parent / 'tests' / 'schemas')
+
+LIB_DIR = pathlib.Path(stdlib_dir.__path__[0])
+
+# Schemas of the test suite diffed by delta_schemas_tests (the
+# ones that do not need extensions).
+TEST_SCHEMAS = [
+    'advtypes',
+    'cards',
+    'casts',
+    'constraints',
+    'enums',
+    'insert',
+    'inventory',
+    'issues',
+    'json',
+    'movies',
+    'tree',
+    'updates',
+    'volatility',
+]
+
+# A small migration applied to each of the TEST_SCHEMAS.
+TEST_SCHEMAS_MIGRATION = '''
+    type BenchmarkAdded {
+        name: str;
+    }
+'''
+
+
+def _synthetic_schema(num_types: int, *, changed: int = -1) -> str:
+    """Return the declarations of a large schema of linked types.
+
+    The value property of the *changed* type is made required.
+    """
+    return ''.join(
+        f'''
+        type Synthetic{i} {{
+            required name: str {{
+                constraint exclusive;
+            }};
+            {'required ' if i == changed else ''}value: int64;
+            link next: Synthetic{(i + 1) % num_types};
+            multi link related: Synthetic{(i * 7 + 3) % num_types};
+            next_name := .next.name;
+            index on (.value);
+        }}
+        '''
+        for i in range(num_types)
+    )
+
+
+QUERIES = [
+    'select 1 + 1',
+    '''
+        select User { name, email }
+        filter .name = <str>$name
+    ''',
+    '''
+        select Issue {
+            number,
+            title,
+            status,
+            owner: { name },
+            watchers: { name, email },
+            comments := .<issue[is Comment] { body, created },
+        }
+        filter .status = Status.Open
+        order by .number
+        limit 10
+    ''',
+    '''
+        with u := (select User filter .name = <str>$name)
+        select u {
+            friends: { name, num_friends := count(.friends) }
+        }
+    ''',
+    '''
+        insert Issue {
+            number := <int64>$number,
+            title := <str>$title,
+            owner := (select User filter .name = <str>$owner),
+        }
+    ''',
+    '''
+        update Issue
+        filter .number = <int64>$number
+        set { status := Status.Closed }
+    ''',
+    '''
+        group Issue { title } by .status
+    ''',
+]
+
+GRAPHQL_QUERIES = [
+    '''
+        query {
+            User(filter: {name: {eq: "alice"}}) {
+                name
+                email
+                friends { name }
+            }
+        }
+    ''',
+    '''
+        query {
+            Issue(order: {number: {dir: ASC}}, first: 10) {
+                number
+                title
+                owner { name }
+                watchers { name }
+            }
+        }
+    ''',
+]
+
+
+class Fixture:
+    """Schemas and precompiled inputs shared by the micro benchmarks.
+
+    Everything is built lazily, so that only the parts needed by the
+    selected benchmarks are paid for.
+    """
+
+    def __init__(self) -> None:
+        # Results besides the timings, by benchmark name.
+        self.extra: dict[str, dict[str, Any]] = {}
+
+    @functools.cached_property
+    def json_result(self) -> list[bytes]:
+        """About 1MiB of a JSON query result, in flush-sized chunks."""
+        data = json.dumps([
+            {
+                'id': f'00000000-0000-0000-0000-{i:012x}',
+                'number': i,
+                'title': f'Issue {i}',
+                'status': 'Open' if i % 3 == 0 else 'Closed',
+                'owner': {'name': f'user{i % 100}'},
+                'watchers': [
+                    {'name': f'user{j}', 'email': f'user{j}@example.com'}
+                    for j in range(i % 7, i % 7 + 3)
+                ],
+            }
+            for i in range(4000)
+        ]).encode()
+        size = 64 * 1024
+        return [data[i:i + size] for i in range(0, len(data), size)]
+
+    @functools.cached_property
+    def dump_block(self) -> bytes:
+        """About 4MiB of Issue rows in the binary COPY format of dumps."""
+        rows = []
+        for i in range(40000):
+            title = f'Issue {i}'.encode()
+            body = f'Steps to reproduce issue {i}: run it {i % 17} times'
+            fields = [
+                uuid.UUID(int=i * 0x9E3779B97F4A7C15 % 2**128).bytes,
+                i.to_bytes(8, 'big'),
+                title,
+                body.encode(),
+            ]
+            rows.append(len(fields).to_bytes(2, 'big') + b''.join(
+                len(f).to_bytes(4, 'big') + f for f in fields))
+        return b''.join(rows)
+
+    @functools.cached_property
+    def stdlib(self) -> bootstrap.StdlibBits:
+        stdlib = bootstrap.read_data_cache(
+            bootstrap.STDLIB_CACHE_FILE_NAME, pickled=True)
+        if stdlib is None:
+            raise click.ClickException(
+                'the stdlib bootstrap cache is missing or out of date, '
+                'bootstrap a server (e.g. "edb server --bootstrap-only") '
+                'to build it'
+            )
+        return stdlib
+
+    def _apply_sdl(
+        self,
+        declarations: str,
+        *,
+        future: str = 'using future simple_scoping;\n',
+        trace_cache: s_decl.SDLTraceCache | None = None,
+    ) -> s_schema.ChainedSchema:
+        base_schema = s_schema.ChainedSchema(
+            self.stdlib.stdschema,
+            s_schema.EMPTY_SCHEMA,
+            self.stdlib.global_schema,
+        )
+        schema, _ = s_ddl.apply_sdl(
+            qlparser.parse_sdl(f'{future}module default {{{declarations}}}'),
+            base_schema=base_schema,
+            trace_cache=trace_cache,
+        )
+        assert isinstance(schema, s_schema.ChainedSchema)
+        return schema
+
+    @functools.cached_property
+    def schema(self) -> s_schema.ChainedSchema:
+        return self._apply_sdl(SCHEMA)
+
+    @functools.cached_property
+    def migrated_schema(self) -> s_schema.ChainedSchema:
+        return self._apply_sdl(SCHEMA + MIGRATION)
+
+    @functools.cached_property
+    def test_schemas(
+        self,
+    ) -> list[tuple[s_schema.ChainedSchema, s_schema.ChainedSchema]]:
+        """Pairs of test suite schemas and their migrated versions."""
+        pairs = []
+        for name in TEST_SCHEMAS:
+            sdl = (TEST_SCHEMAS_DIR / f'{name}.esdl').read_text()
+            pairs.append((
+                self._apply_sdl(sdl, future=''),
+                self._apply_sdl(sdl + TEST_SCHEMAS_MIGRATION, future=''),
+            ))
+        return pairs
+
+    @functools.cached_property
+    def large_schemas(
+        self,
+    ) -> tuple[s_schema.ChainedSchema, s_schema.ChainedSchema]:
+        """A schema of 300 types and a version with one changed type."""
+        return (
+            self._apply_sdl(_synthetic_schema(300)),
+            self._apply_sdl(_synthetic_schema(300, changed=150)),
+        )
+
+    @functools.cached_property
+    def parser_corpus(self) -> list[tuple[str, str]]:
+        """The stdlib and the test schemas, with their start tokens."""
+        corpus: list[tuple[type[qltokens.Token], pathlib.Path]] = [
+            (qltokens.T_STARTBLOCK, path)
+            for path in sorted(LIB_DIR.glob('**/*.edgeql'))
+        ]
+        if TEST_SCHEMAS_DIR.is_dir():
+            corpus += [
+                (qltokens.T_STARTSDLDOCUMENT, path)
+                for path in sorted(TEST_SCHEMAS_DIR.glob('*.esdl'))
+            ]
+            corpus += [
+                (qltokens.T_STARTBLOCK, path)
+                for path in sorted(TEST_SCHEMAS_DIR.glob('*.edgeql'))
+            ]
+        return [
+            (start_token.__name__[2:], path.read_text())
+            for start_token, path in corpus
+        ]
+
+    @functools.cached_property
+    def parser_tokens(self) -> list[tuple[str, qltokenizer.Source]]:
+        return [
+            (start, qltokenizer.Source.from_string(text))
+            for start, text in self.parser_corpus
+        ]
+
+    @functools.cached_property
+    def parser_csts(self) -> list[tuple[Any, Any, qltokenizer.Source]]:
+        qlparser.preload_spec()
+        csts: list[tuple[Any, Any, qltokenizer.Source]] = []
+        for start, source in self.parser_tokens:
+            result, productions = rust_parser.parse(start, source.tokens())
+            if result.errors:
+                raise click.ClickException(
+                    f'could not parse the benchmark corpus: '
+                    f'{result.errors[0]}')
+            csts.append((result.out, productions, source))
+        return csts
+
+    @functools.cached_property
+    def asts(self) -> list[Any]:
+        return [qlparser.parse_query(q) for q in QUERIES]
+
+    @functools.cached_property
+    def irs(self) -> list[irast.Statement]:
+        return [self.compile_ir(tree) for tree in self.asts]
+
+    def compile_ir(
+        self,
+        tree: Any,
+        *,
+        share_type_refs: bool = False,
+    ) -> irast.Statement:
+        return qlcompiler.compile_ast_to_ir(
+            tree,
+            self.schema,
+            options=qlcompiler.CompilerOptions(
+                modaliases={None: 'default'},
+                share_type_refs=share_type_refs,
+            ),
+        )
+
+
+def _run_all(func: Callable[[Any], Any], inputs: list[Any]):
+    def run() -> None:
+        for item in inputs:
+            func(item)
+    return run
+
+
+@benchmark('edgeql_parse', group='micro')
+def bench_edgeql_parse(fx: Fixture):
+    """Parse the benchmark queries into EdgeQL ASTs."""
+    return _run_all(qlparser.parse_query, QUERIES)
+
+
+def _add_corpus_size(fx: Fixture, name: str) -> None:
+    fx.extra[name] = {
+        'files': len(fx.parser_corpus),
+        'bytes': sum(len(text.encode()) for _, text in fx.parser_corpus),
+    }
+
+
+@benchmark('edgeql_tokenize_corpus', group='micro')
+def bench_edgeql_tokenize_corpus(fx: Fixture):
+    """Tokenize the stdlib and the test schemas."""
+    _add_corpus_size(fx, 'edgeql_tokenize_corpus')
+
+    def tokenize(item: tuple[str, str]) -> Any:
+        return qltokenizer.Source.from_string(item[1]).tokens()
+    return _run_all(tokenize, fx.parser_corpus)
+
+
+@benchmark('edgeql_parse_corpus', group='micro')
+def bench_edgeql_parse_corpus(fx: Fixture):
+    """Parse the tokens of the stdlib and the test schemas into CSTs."""
+    _add_corpus_size(fx, 'edgeql_parse_corpus')
+    qlparser.preload_spec()
+
+    def parse(item: tuple[str, qltokenizer.Source]) -> Any:
+        start, source = item
+        return rust_parser.parse(start, source.tokens())
+    return _run_all(parse, fx.parser_tokens)
+
+
+@benchmark('edgeql_cst_to_ast_corpus', group='micro')
+def bench_edgeql_cst_to_ast_corpus(fx: Fixture):
+    """Convert the CSTs of the stdlib and the test schemas into ASTs."""
+    _add_corpus_size(fx, 'edgeql_cst_to_ast_corpus')
+
+    def convert(item: tuple[Any, Any, qltokenizer.Source]) -> Any:
+        cst, productions, source = item
+        return qlparser._cst_to_ast(cst, productions, source, '')
+    return _run_all(convert, fx.parser_csts)
+
+
+@benchmark('ir_compile', group='micro')
+def bench_ir_compile(fx: Fixture):
+    """Compile parsed queries into IR."""
+    return _run_all(fx.compile_ir, fx.asts)
+
+
+@benchmark('ir_compile_shared_refs', group='micro')
+def bench_ir_compile_shared_refs(fx: Fixture):
+    """Compile parsed queries into IR, reusing TypeRefs across queries.
+
+    This is how the server compiles queries, compare with ir_compile
+    to see what the shared TypeRef cache saves.
+    """
+    return _run_all(
+        functools.partial(fx.compile_ir, share_type_refs=True), fx.asts)
+
+
+@benchmark('sql_codegen', group='micro')
+def bench_sql_codegen(fx: Fixture):
+    """Compile IR into SQL ASTs and generate the SQL text."""
+    def compile_sql(ir: irast.Statement) -> str:
+        res = pgcompiler.compile_ir_to_sql_tree(
+            ir,
+            output_format=pgcompiler.OutputFormat.NATIVE,
+        )
+        return pgcodegen.generate_source(res.ast)
+    return _run_all(compile_sql, fx.irs)
+
+
+@benchmark('sertypes_describe', group='micro')
+def bench_sertypes_describe(fx: Fixture):
+    """Build the output type descriptors of the compiled queries."""
+    def describe(ir: irast.Statement) -> Any:
+        return sertypes.describe(
+            ir.schema,
+            ir.stype,
+            ir.view_shapes,
+            ir.view_shapes_metadata,
+            protocol_version=defines.CURRENT_PROTOCOL,
+        )
+    return _run_all(describe, fx.irs)
+
+
+@benchmark('schema_unpickle_std', group='micro')
+def bench_schema_unpickle_std(fx: Fixture):
+    """Unpickle the standard library schema."""
+    data = pickle.dumps(fx.stdlib.stdschema, protocol=pickle.HIGHEST_PROTOCOL)
+    return functools.partial(pickle.loads, data)
+
+
+@benchmark('schema_unpickle_user', group='micro')
+def bench_schema_unpickle_user(fx: Fixture):
+    """Unpickle a user schema, as compiler workers do on every update."""
+    data = pickle.dumps(
+        fx.schema.get_top_schema(), protocol=pickle.HIGHEST_PROTOCOL)
+    return functools.partial(pickle.loads, data)
+
+
+@benchmark('delta_schemas', group='micro')
+def bench_delta_schemas(fx: Fixture):
+    """Diff a user schema against its migrated version."""
+    return functools.partial(
+        s_ddl.delta_schemas, fx.schema, fx.migrated_schema)
+
+
+def _delta_cold(
+    pair: tuple[s_schema.ChainedSchema, s_schema.ChainedSchema],
+) -> None:
+    # Fingerprints are cached per schema, but a migration diffs a freshly
+    # built target schema, so the benchmark runs without the cache.
+    sd._fingerprint_caches.clear()
+    s_ddl.delta_schemas(*pair)
+
+
+@benchmark('delta_schemas_tests', group='micro')
+def bench_delta_schemas_tests(fx: Fixture):
+    """Diff the schemas of the test suite against a small migration."""
+    return _run_all(_delta_cold, fx.test_schemas)
+
+
+@benchmark('delta_schemas_large', group='micro')
+def bench_delta_schemas_large(fx: Fixture):
+    """Diff a synthetic 300-type schema where one type changed."""
+    return functools.partial(_delta_cold, fx.large_schemas)
+
+
+def _apply_sdl_versions(
+    fx: Fixture,
+    trace_cache: s_decl.SDLTraceCache | None,
+):
+    versions = [
+        _synthetic_schema(300),
+        _synthetic_schema(300, changed=150),
+    ]
+
+    def run() -> None:
+        for sdl in versions:
+            fx._apply_sdl(sdl, trace_cache=trace_cache)
+    return run
+
+
+@benchmark('apply_sdl_large', group='micro')
+def bench_apply_sdl_large(fx: Fixture):
+    """Apply two versions of the SDL of a synthetic 300-type schema."""
+    return _apply_sdl_versions(fx, None)
+
+
+@benchmark('apply_sdl_large_cached', group='micro')
+def bench_apply_sdl_large_cached(fx: Fixture):
+    """Apply two versions of a synthetic SDL, reusing the SDL traces.
+
+    This is how the server compiles repeated migrations, compare with
+    apply_sdl_large to see what the trace cache saves.
+    """
+    return _apply_sdl_versions(fx, s_decl.SDLTraceCache())
+
+
+@benchmark('graphql_compile', group='micro')
+def bench_graphql_compile(fx: Fixture):
+    """Translate GraphQL queries into EdgeQL ASTs."""
+    def compile_graphql(gql: str) -> graphql.TranspiledOperation:
+        return graphql.compile_graphql(
+            fx.stdlib.stdschema,
+            fx.schema.get_top_schema(),
+            fx.stdlib.global_schema,
+            {},
+            {},
+            gql,
+            tokens=None,
+            substitutions=None,
+        )
+    return _run_all(compile_graphql, GRAPHQL_QUERIES)
+
+
+def _bench_compression(algorithm: str):
+    def setup(fx: Fixture):
+        chunks = fx.json_result
+        raw = sum(len(chunk) for chunk in chunks)
+        algo = compression.ALGORITHMS[algorithm]
+        wire = sum(
+            len(c) for c in map(algo.new_compressor().compress, chunks))
+        fx.extra[f'compress_{algorithm}'] = {'compression_ratio': raw / wire}
+
+        def run() -> None:
+            compressor = algo.new_compressor()
+            for chunk in chunks:
+                compressor.compress(chunk)
+        return run
+
+    setup.__doc__ = (
+        f'Compress a JSON query result with {algorithm}, '
+        f'as sent to a compressed client connection.'
+    )
+    return setup
+
+
+def _bench_dump_block(algorithm: str):
+    def setup(fx: Fixture):
+        block = fx.dump_block
+        data, _ = compression.compress_block(algorithm, block)
+        fx.extra[f'dump_block_{algorithm}'] = {
+            'compression_ratio': len(block) / len(data),
+        }
+        return functools.partial(
+            compression.compress_block, algorithm, block)
+
+    setup.__doc__ = (
+        f'Compress and checksum a dump data block with {algorithm}.'
+    )
+    return setup
+
+
+for _name in compression.get_available():
+    benchmark(f'compress_{_name}', group='micro')(_bench_compression(_name))
+    benchmark(f'dump_block_{_name}', group='micro')(_bench_dump_block(_name))
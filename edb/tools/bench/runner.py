@@ -0,0 +1,228 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Benchmark registry, measurement and the results format."""
+
+from __future__ import annotations
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    NamedTuple,
+    Optional,
+)
+
+import dataclasses
+import datetime
+import fnmatch
+import gc
+import os
+import platform
+import statistics
+import time
+
+from edb import buildmeta
+
+
+# Bump when the layout of the results changes incompatibly.
+RESULTS_FORMAT = 1
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Benchmark:
+
+    name: str
+    #: "micro" benchmarks run in-process, "e2e" ones against a server.
+    group: str
+    #: Called once with the group fixture; returns the function to time.
+    setup: Callable[[Any], Callable[[], Any]]
+    description: str
+    #: Upper bound of the number of timed calls, for slow benchmarks.
+    max_count: Optional[int] = None
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(
+    name: str,
+    *,
+    group: str,
+    max_count: Optional[int] = None,
+):
+    """Register a benchmark setup function."""
+
+    def decorator(setup: Callable[[Any], Callable[[], Any]]):
+        if name in BENCHMARKS:
+            raise RuntimeError(f'duplicate benchmark {name!r}')
+        BENCHMARKS[name] = Benchmark(
+            name=name,
+            group=group,
+            setup=setup,
+            description=(setup.__doc__ or '').strip(),
+            max_count=max_count,
+        )
+        return setup
+
+    return decorator
+
+
+def select(
+    *,
+    groups: Iterable[str],
+    patterns: Iterable[str] = (),
+) -> list[Benchmark]:
+    groups = frozenset(groups)
+    patterns = list(patterns)
+    return [
+        bench for bench in BENCHMARKS.values()
+        if bench.group in groups
+        and (
+            not patterns
+            or any(fnmatch.fnmatchcase(bench.name, p) for p in patterns)
+        )
+    ]
+
+
+def measure(
+    func: Callable[[], Any],
+    *,
+    repeat: int,
+    min_time: float,
+) -> tuple[int, list[float]]:
+    """Time *func*, returning the loop count and per-call samples.
+
+    The number of calls per sample is calibrated so that a sample takes
+    at least *min_time* seconds, which keeps the timer resolution and
+    the loop overhead out of the results of fast benchmarks.
+    """
+    # The first call pays for lazy imports and for filling caches.
+    func()
+    loops = 1
+    while True:
+        elapsed = _time_loops(func, loops)
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed * 2 >= min_time else 10
+    samples = [_time_loops(func, loops) / loops for _ in range(repeat)]
+    return loops, samples
+
+
+def _time_loops(func: Callable[[], Any], loops: int) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return time.perf_counter() - start
+
+
+async def measure_latency(
+    func: Callable[[], Awaitable[Any]],
+    *,
+    count: int,
+    warmup: int,
+) -> list[float]:
+    """Time *count* individual calls of *func*."""
+    for _ in range(warmup):
+        await func()
+    gc.collect()
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return dict(
+        min=ordered[0],
+        median=statistics.median(ordered),
+        mean=statistics.fmean(ordered),
+        stdev=statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        p95=ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        max=ordered[-1],
+    )
+
+
+def make_result(
+    bench: Benchmark,
+    samples: list[float],
+    *,
+    loops: int = 1,
+) -> dict[str, Any]:
+    return dict(
+        group=bench.group,
+        loops=loops,
+        samples=samples,
+        **summarize(samples),
+    )
+
+
+def get_metadata() -> dict[str, Any]:
+    return dict(
+        version=buildmeta.get_version_string(short=False),
+        catalog_version=buildmeta.EDGEDB_CATALOG_VERSION,
+        python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        date=datetime.datetime.now(datetime.timezone.utc).isoformat(
+            timespec='seconds'),
+    )
+
+
+def make_results(benchmarks: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    return dict(
+        format=RESULTS_FORMAT,
+        metadata=get_metadata(),
+        benchmarks=benchmarks,
+    )
+
+
+class Comparison(NamedTuple):
+
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+    def is_regression(self, threshold: float) -> bool:
+        return self.ratio > 1 + threshold
+
+
+def compare(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+) -> list[Comparison]:
+    """Compare the medians of benchmarks present in both results."""
+    if baseline.get('format') != RESULTS_FORMAT:
+        raise ValueError(
+            f'unsupported results format: {baseline.get("format")!r}')
+    old = baseline['benchmarks']
+    return [
+        Comparison(name, old[name]['median'], res['median'])
+        for name, res in current['benchmarks'].items()
+        if name in old
+    ]
@@ -94,4 +94,5 @@ from . import redo_metaschema  # noqa
 from . import ls  # noqa
 from . import railroad_diagram  # noqa
 from .profiling import cli as prof_cli  # noqa
+from .bench import cli as bench_cli  # noqa
 from .experimental_interpreter import edb_entry # noqa
@@ -29,6 +29,7 @@ from typing import (
     TypeVar,
     AbstractSet,
     Iterator,
+    Mapping,
     Sequence,
     Counter,
     NamedTuple,
@@ -868,6 +869,75 @@ def build_svg_blocks_by_memory(
         x += caller.size
 
 
+@dataclasses.dataclass
+class SampleFrame:
+    """A node of a tree of sampled stacks."""
+    samples: int = 0
+    callees: dict[str, SampleFrame] = dataclasses.field(default_factory=dict)
+
+
+def build_sample_tree(samples: Mapping[tuple[str, ...], int]) -> SampleFrame:
+    root = SampleFrame()
+    for stack, count in samples.items():
+        root.samples += count
+        frame = root
+        for label in stack:
+            frame = frame.callees.setdefault(label, SampleFrame())
+            frame.samples += count
+    return root
+
+
+def build_svg_blocks_by_samples(
+    root: SampleFrame,
+    *,
+    maxw: int,
+    level: int = 0,
+    x: int = 0,
+) -> Iterator[Block]:
+    for label, callee in sorted(root.callees.items()):
+        yield Block(
+            func=("", 0, label),
+            call_stack=(),
+            color=0 if callee.callees else 1,
+            level=level,
+            tooltip=f"{callee.samples / maxw:.2%} ({callee.samples} samples)",
+            w=callee.samples,
+            x=x,
+        )
+        yield from build_svg_blocks_by_samples(
+            callee, maxw=maxw, level=level + 1, x=x,
+        )
+        x += callee.samples
+
+
+def render_samples_svg(
+    samples: Mapping[tuple[str, ...], int],
+    *,
+    width: int = 1920,  # in pixels
+    block_height: int = 24,  # in pixels
+    font_size: int = 12,
+) -> str:
+    """Render stacks collected by the sampling profiler as a flame graph.
+
+    Raises ValueError if there are no samples.
+    """
+    root = build_sample_tree(samples)
+    if not root.samples:
+        raise ValueError("no samples to render")
+    with PROFILING_JS.open() as js_file:
+        javascript = js_file.read()
+    blocks = list(build_svg_blocks_by_samples(root, maxw=root.samples))
+    return render_svg_section(
+        blocks,
+        root.samples,
+        [COLORS, CCOLORS],
+        block_height=block_height,
+        font_size=font_size,
+        width=width,
+        javascript=javascript,
+    )
+
+
 def render_svg_section(
     blocks: list[Block],
     maxw: float,
@@ -109,6 +109,11 @@ __all__ = ('async_timeout', 'not_implemented', 'xerror', 'xfail', '_xfail',
                    'temporary local one.')
 @click.option('--use-db-cache', is_flag=True,
               help='attempt to use a cache of the test databases (unsound!)')
+@click.option('--use-db-templates', is_flag=True,
+              help='keep set up test databases as template branches keyed '
+                   'by the hash of their setup script and clone them in '
+                   'later runs against the same --data-dir or --backend-dsn '
+                   '(unsound!)')
 @click.option('--data-dir', type=str,
               help='use a specified data dir')
 @click.option('--use-data-dir-dbs', is_flag=True,
@@ -133,6 +138,7 @@ def test(
     list_tests: bool,
     backend_dsn: typing.Optional[str],
     use_db_cache: bool,
+    use_db_templates: bool,
     data_dir: typing.Optional[str],
     use_data_dir_dbs: bool,
     result_log: str,
@@ -213,6 +219,7 @@ def test(
         list_tests=list_tests,
         backend_dsn=backend_dsn,
         try_cached_db=use_db_cache,
+        use_db_templates=use_db_templates,
         data_dir=data_dir,
         use_data_dir_dbs=use_data_dir_dbs,
         result_log=result_log,
@@ -308,6 +315,7 @@ def _run(
     list_tests: bool,
     backend_dsn: typing.Optional[str],
     try_cached_db: bool,
+    use_db_templates: bool,
     data_dir: typing.Optional[str],
     use_data_dir_dbs: bool,
     result_log: str,
@@ -382,6 +390,7 @@ def _run(
             warnings=warnings, num_workers=jobs,
             failfast=failfast, shuffle=shuffle, backend_dsn=backend_dsn,
             try_cached_db=try_cached_db,
+            use_db_templates=use_db_templates,
             data_dir=data_dir,
             use_data_dir_dbs=use_data_dir_dbs,
         )
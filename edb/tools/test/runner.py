@@ -925,7 +925,8 @@ class ParallelTextTestRunner:
     def __init__(self, *, stream=None, num_workers=1, verbosity=1,
                  output_format=OutputFormat.auto, warnings=True,
                  failfast=False, shuffle=False, backend_dsn=None,
-                 data_dir=None, try_cached_db=False, use_data_dir_dbs=False):
+                 data_dir=None, try_cached_db=False, use_data_dir_dbs=False,
+                 use_db_templates=False):
         self.stream = stream if stream is not None else sys.stderr
         self.num_workers = num_workers
         self.verbosity = verbosity
@@ -937,6 +938,7 @@ class ParallelTextTestRunner:
         self.data_dir = data_dir
         self.use_data_dir_dbs = use_data_dir_dbs
         self.try_cached_db = try_cached_db
+        self.use_db_templates = use_db_templates
 
     def run(
         self,
@@ -1073,6 +1075,7 @@ class ParallelTextTestRunner:
                         try_cached_db=(
                             self.try_cached_db or self.use_data_dir_dbs
                         ),
+                        use_templates=self.use_db_templates,
                     )
                     if self.try_cached_db and any(
                         not x[1]['cached'] for x in stats
@@ -1129,7 +1132,7 @@ class ParallelTextTestRunner:
             suite: unittest.TestSuite
             if self.num_workers > 1:
                 suite = ParallelTestSuite(
-                    self._sort_tests(cases),
+                    self._sort_tests(cases, stats),
                     conn,
                     self.num_workers,
                     self.backend_dsn,
@@ -1137,7 +1140,7 @@ class ParallelTextTestRunner:
                 )
             else:
                 suite = SequentialTestSuite(
-                    self._sort_tests(cases),
+                    self._sort_tests(cases, stats),
                     conn,
                     self.backend_dsn,
                     worker_init,
@@ -1193,7 +1196,7 @@ class ParallelTextTestRunner:
         if self.verbosity > 0:
             click.secho(s, file=self.stream, **kwargs)
 
-    def _sort_tests(self, cases):
+    def _sort_tests(self, cases, stats):
         serialized_suites = {}
         exclusive_suites = set()
         exclusive_tests = []
@@ -1208,15 +1211,31 @@ class ParallelTextTestRunner:
                 exclusive_tests.extend(tests)
                 exclusive_suites.add(casecls)
 
+        # Schedule the test classes with the longest estimated running
+        # time first, so that the workers don't end up waiting for a
+        # long serialized suite that was picked up last.  The estimates
+        # come from the running times log and default to the same value
+        # as in tb.get_cases_by_shard().
+        def estimate(tests):
+            return sum(
+                stats.get(str(test), (0.1, 0))[0] for test in tests
+            )
+
+        groups = [
+            (estimate(suite), [suite])
+            for suite in serialized_suites.values()
+        ] + [
+            (estimate(tests), tests)
+            for casecls, tests in cases.items()
+            if (
+                casecls not in serialized_suites
+                and casecls not in exclusive_suites
+            )
+        ]
+        groups.sort(key=lambda g: g[0], reverse=True)
+
         tests = itertools.chain(
-            serialized_suites.values(),
-            itertools.chain.from_iterable(
-                tests for casecls, tests in cases.items()
-                if (
-                    casecls not in serialized_suites
-                    and casecls not in exclusive_suites
-                )
-            ),
+            itertools.chain.from_iterable(tests for _, tests in groups),
             [unittest.TestSuite(exclusive_tests)],
         )
 
@@ -84,6 +84,7 @@ pub enum EdbError {
     ServerOfflineError = 0x_08_00_00_02,
     UnknownTenantError = 0x_08_00_00_03,
     ServerBlockedError = 0x_08_00_00_04,
+    RateLimitExceededError = 0x_08_00_00_05,
     BackendError = 0x_09_00_00_00,
     UnsupportedBackendFeatureError = 0x_09_00_01_00,
     LogMessage = 0x_F0_00_00_00_u32 as i32,
@@ -320,3 +320,88 @@ class TestExclusiveTask(unittest.TestCase):
             g.create_task(
                 self._test(obj2.task, lambda: counter)
             )
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    @with_fake_event_loop
+    async def test_single_flight_01(self):
+        flights = asyncutil.SingleFlight()
+        computed = []
+
+        async def get(key):
+            async def compute():
+                computed.append(key)
+                await asyncio.sleep(10)
+                return key * 2
+            return await flights.run(key, compute)
+
+        results = await asyncio.gather(
+            *(get(key) for key in [1, 1, 2, 1, 2])
+        )
+        self.assertEqual(results, [
+            (2, False), (2, True), (4, False), (2, True), (4, True),
+        ])
+        self.assertEqual(computed, [1, 2])
+        self.assertEqual(len(flights), 0)
+
+        # Calls after the flight has landed compute again.
+        self.assertEqual(await get(1), (2, False))
+        self.assertEqual(computed, [1, 2, 1])
+
+    @with_fake_event_loop
+    async def test_single_flight_02(self):
+        # Errors are not shared: the waiters all try themselves, in
+        # parallel.
+        flights = asyncutil.SingleFlight()
+        attempts = 0
+
+        async def compute():
+            nonlocal attempts
+            attempts += 1
+            first = attempts == 1
+            await asyncio.sleep(1)
+            if first:
+                raise ValueError('failed')
+            return 'ok'
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(
+            *(flights.run('key', compute) for _ in range(3)),
+            return_exceptions=True,
+        )
+        self.assertIsInstance(results[0], ValueError)
+        self.assertEqual(results[1:], [('ok', False), ('ok', False)])
+        self.assertEqual(attempts, 3)
+        self.assertEqual(loop.time() - started, 2)
+        self.assertEqual(len(flights), 0)
+
+    @with_fake_event_loop
+    async def test_single_flight_03(self):
+        # Results that are not shareable and cancellations of the first
+        # call release the waiters as well.
+        flights = asyncutil.SingleFlight()
+        attempts = 0
+
+        async def compute():
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(1)
+            return attempts
+
+        results = await asyncio.gather(
+            flights.run('key', compute, shareable=lambda r: r > 1),
+            flights.run('key', compute, shareable=lambda r: r > 1),
+        )
+        self.assertEqual(results, [(1, False), (2, False)])
+
+        attempts = 0
+        first = asyncio.create_task(flights.run('key', compute))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flights.run('key', compute))
+        await asyncio.sleep(0.5)
+        first.cancel()
+        self.assertEqual(await second, (2, False))
+        self.assertTrue(first.cancelled())
+        self.assertEqual(len(flights), 0)
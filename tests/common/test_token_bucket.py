@@ -46,3 +46,21 @@ class WindowedSumTests(unittest.TestCase):
             self.assertEqual(tb.consume(2), 0)
             self.assertEqual(tb.consume(1), 0)
             self.assertGreater(tb.consume(1), 0)
+
+    def test_common_token_bucket_get_delay(self) -> None:
+        monotonic = ManualClock(0)
+        with unittest.mock.patch("time.monotonic", monotonic):
+            tb = TokenBucket(2, 1)
+            self.assertTrue(tb.is_full())
+            self.assertEqual(tb.get_delay(2), 0)
+            self.assertEqual(tb.get_delay(2), 0)
+            self.assertEqual(tb.consume(2), 0)
+            self.assertFalse(tb.is_full())
+
+            # Peeking doesn't consume anything.
+            self.assertEqual(tb.get_delay(1), 1)
+            self.assertEqual(tb.get_delay(1), 1)
+            monotonic.value += 0.5
+            self.assertEqual(tb.get_delay(1), 0.5)
+            monotonic.value += 1.5
+            self.assertTrue(tb.is_full())
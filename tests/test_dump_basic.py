@@ -17,13 +17,28 @@
 #
 
 import hashlib
+import io
 import os
 import random
 import tempfile
 
+from edb import protocol
+from edb.common import binwrapper
 from edb.testbase import server as tb
 
 
+# The SNAPSHOT header of DumpHeader.
+DUMP_HEADER_SNAPSHOT = 106
+
+
+def _message_data(msg: protocol.ServerMessage) -> bytes:
+    # A dump message without its type and length, as stored in dump
+    # files and sent back on restore.
+    iobuf = io.BytesIO()
+    type(msg).dump(msg, binwrapper.BinWrapper(iobuf))
+    return iobuf.getvalue()
+
+
 class TestDumpBasics(tb.DatabaseTestCase, tb.CLITestCaseMixin):
     DEFAULT_MODULE = 'test'
 
@@ -118,3 +133,139 @@ class TestDumpBasics(tb.DatabaseTestCase, tb.CLITestCaseMixin):
         finally:
             await con2.aclose()
             await tb.drop_db(self.con, restored_dbname)
+
+    async def _proto_dump(self, dbname, annotations=()):
+        con = await protocol.new_connection(
+            **self.get_connect_args(database=dbname))
+        try:
+            await con.connect()
+            await con.send(
+                protocol.Dump(
+                    annotations=[
+                        protocol.Annotation(name=name, value=value)
+                        for name, value in annotations
+                    ],
+                    flags=0,
+                ),
+                protocol.Sync(),
+            )
+            header = await con.recv_match(protocol.DumpHeader)
+            blocks = []
+            while True:
+                msg = await con.recv()
+                if not isinstance(msg, protocol.DumpBlock):
+                    break
+                blocks.append(_message_data(msg))
+            self.assertIsInstance(msg, protocol.CommandComplete)
+            await con.recv_match(protocol.ReadyForCommand)
+        finally:
+            await con.aclose()
+
+        snapshot = next(
+            attr.value for attr in header.attributes
+            if attr.code == DUMP_HEADER_SNAPSHOT
+        )
+        return _message_data(header), blocks, snapshot.decode()
+
+    async def _proto_restore(self, dbname, dump, *, error=None):
+        header, blocks, _ = dump
+        con = await protocol.new_connection(
+            **self.get_connect_args(database=dbname))
+        try:
+            await con.connect()
+            await con.send(protocol.Restore(
+                attributes=[], jobs=1, header_data=header))
+            if error is not None:
+                await con.recv_match(protocol.ErrorResponse, message=error)
+                await con.send(protocol.Sync())
+                await con.recv_match(protocol.ReadyForCommand)
+                return
+            await con.recv_match(protocol.RestoreReady)
+            await con.send(*[
+                protocol.RestoreBlock(block_data=block) for block in blocks
+            ])
+            await con.send(protocol.RestoreEof())
+            await con.recv_match(
+                protocol.CommandComplete,
+                _ignore_msg=protocol.StateDataDescription,
+            )
+        finally:
+            await con.aclose()
+
+    async def _fetch_tmp(self, con):
+        return [
+            (r.idx, r.data)
+            for r in await con.query(
+                'SELECT test::Tmp { idx, data } ORDER BY .idx')
+        ]
+
+    async def test_dump_incremental_01(self):
+        if not self.has_create_database:
+            self.skipTest('create database is not supported by the backend')
+
+        dbname = self.get_database_name()
+        restored_dbname = f'{dbname}_merged'
+
+        for idx in range(3):
+            await self.con.query(
+                'INSERT test::Tmp { idx := <int64>$idx, data := <bytes>$d }',
+                idx=idx, d=self.some_bytes(1000 + idx),
+            )
+
+        await self.con.execute(f'CREATE DATABASE {restored_dbname}')
+        try:
+            full = await self._proto_dump(dbname)
+            await self._proto_restore(restored_dbname, full)
+
+            await self.con.execute('''
+                UPDATE test::Tmp FILTER .idx = 1 SET { data := b'changed' };
+                DELETE test::Tmp FILTER .idx = 2;
+                INSERT test::Tmp { idx := 3, data := b'new' };
+            ''')
+
+            incr = await self._proto_dump(dbname, [
+                ('incremental-since', full[2]),
+                ('compression', 'deflate'),
+            ])
+            await self._proto_restore(restored_dbname, incr)
+
+            con2 = await self.connect(database=restored_dbname)
+            try:
+                self.assertEqual(
+                    await self._fetch_tmp(con2),
+                    await self._fetch_tmp(self.con),
+                )
+            finally:
+                await con2.aclose()
+
+            # The branch now holds the data of the incremental dump, so
+            # neither of the dumps can be merged into it again.
+            await self._proto_restore(
+                restored_dbname, incr,
+                error='cannot merge an incremental dump: it is not '
+                      'incremental to the last dump restored')
+
+            # Incremental dumps are bound to the branch they were taken
+            # from.
+            con2 = await protocol.new_connection(
+                **self.get_connect_args(database=restored_dbname))
+            try:
+                await con2.connect()
+                await con2.send(
+                    protocol.Dump(
+                        annotations=[protocol.Annotation(
+                            name='incremental-since', value=full[2])],
+                        flags=0,
+                    ),
+                    protocol.Sync(),
+                )
+                await con2.recv_match(
+                    protocol.ErrorResponse,
+                    message='cannot take an incremental dump: the previous '
+                            'dump was not taken from this branch',
+                )
+                await con2.recv_match(protocol.ReadyForCommand)
+            finally:
+                await con2.aclose()
+        finally:
+            await tb.drop_db(self.con, restored_dbname)
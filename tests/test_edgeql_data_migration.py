@@ -12190,6 +12190,38 @@ class TestEdgeQLDataMigration(EdgeQLDataMigrationTestCase):
             }
         ''')
 
+    async def test_edgeql_migration_max_rename_candidates(self):
+        # Renaming 40 types at once is detected by comparing the blocked
+        # pairs of candidates, unless there are too many of them.
+        types = ''.join(
+            f'type A{i} {{ foo: str; bar: str; }}\n' for i in range(40)
+        )
+        await self.migrate(types)
+
+        async def populate() -> list[str]:
+            await self.start_migration(
+                types.replace('type A', 'type B'), populate=True)
+            res = json.loads(await self.con.query_single(
+                'DESCRIBE CURRENT MIGRATION AS JSON;'))
+            await self.con.execute('ABORT MIGRATION;')
+            return res['confirmed']
+
+        confirmed = await populate()
+        self.assertEqual(
+            len([s for s in confirmed if 'RENAME TO' in s]), 40, confirmed)
+
+        await self.con.execute('''
+            CONFIGURE SESSION SET migration_max_rename_candidates := 0;
+        ''')
+        confirmed = await populate()
+        self.assertFalse(
+            [s for s in confirmed if 'RENAME TO' in s], confirmed)
+        self.assertEqual(
+            len([s for s in confirmed if s.startswith('CREATE TYPE')]), 40)
+        await self.con.execute('''
+            CONFIGURE SESSION RESET migration_max_rename_candidates;
+        ''')
+
 
 class TestEdgeQLDataMigrationNonisolated(EdgeQLDataMigrationTestCase):
     TRANSACTION_ISOLATION = False
@@ -23,6 +23,7 @@ import textwrap
 from edb.testbase import lang as tb
 
 from edb.edgeql import compiler
+from edb.edgeql.compiler import context
 from edb.edgeql import parser as qlparser
 
 
@@ -120,3 +121,29 @@ class TestEdgeQLTypeInference(tb.BaseEdgeQLCompilerTest):
 % OK %
         __derived__::(default:Card | default:User)
         """
+
+    def _compile_shared(self, source):
+        return compiler.compile_ast_to_ir(
+            qlparser.parse_query(source),
+            self.schema,
+            options=compiler.CompilerOptions(
+                modaliases={None: 'default'},
+                share_type_refs=True,
+            ),
+        )
+
+    def test_edgeql_ir_type_inference_shared_typerefs_01(self):
+        ir1 = self._compile_shared('SELECT User')
+        ir2 = self._compile_shared('SELECT User FILTER .name = "x"')
+        self.assertIs(ir1.expr.typeref, ir2.expr.typeref)
+
+        # Views are derived by each compilation and are never shared.
+        ir3 = self._compile_shared('SELECT User { name }')
+        ir4 = self._compile_shared('SELECT User { name }')
+        self.assertTrue(ir3.expr.typeref.is_view)
+        self.assertIsNot(ir3.expr.typeref, ir4.expr.typeref)
+        self.assertFalse(any(
+            ref is ir3.expr.typeref
+            for ref in context.get_shared_type_ref_cache(
+                self.schema).values()
+        ))
@@ -21,9 +21,11 @@ from typing import Callable
 
 import pathlib
 import tempfile
+import time
 import unittest
 import unittest.mock
 
+from edb.common import sampler
 from edb.tools import profiling
 
 
@@ -87,3 +89,28 @@ class ProfilingTestCase(unittest.TestCase):
             out_contents = out.read()
             self.assertIn("profiled_function", out_contents)
             self.assertIn("regular_function", out_contents)
+
+    def test_tools_profiling_sampler(self) -> None:
+        profiler = sampler.SamplingProfiler(interval=0.001)
+        profiler.start(10)
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            regular_function(deadline)
+        samples = profiler.stop()
+        self.assertFalse(profiler.is_running())
+
+        self.assertTrue(samples)
+        self.assertTrue(any(
+            'ProfilingTestCase.test_tools_profiling_sampler' in frame
+            for stack in samples
+            for frame in stack
+        ))
+
+        merged = sampler.merge_samples({'a': samples, 'b': samples})
+        self.assertEqual(
+            sum(merged.values()), 2 * sum(samples.values()))
+        collapsed = sampler.format_collapsed(merged)
+        self.assertTrue(collapsed.startswith('a;'))
+
+        svg = profiling.profiler.render_samples_svg(merged)
+        self.assertIn('test_tools_profiling_sampler', svg)
@@ -28,10 +28,13 @@ from edb import errors
 from edb.common import markup
 
 from edb.edgeql import compiler as qlcompiler
+from edb.edgeql import declarative as s_decl
 from edb.edgeql import parser as qlparser
 from edb.edgeql import qltypes
 
 from edb.schema import ddl as s_ddl
+from edb.schema import delta as sd
+from edb.schema import expr as s_expr
 from edb.schema import links as s_links
 from edb.schema import name as s_name
 from edb.schema import objtypes as s_objtypes
@@ -4063,6 +4066,215 @@ class TestGetMigration(tb.BaseSchemaLoadTest):
 
         return schemas
 
+    def test_schema_delta_fingerprints_01(self):
+        # delta_objects() skips the objects with equal structural
+        # fingerprints, which must not depend on the schema (e.g. the
+        # ids) the objects come from.
+        types = '\n'.join(
+            f'''
+            type T{i} {{
+                property p{i} -> str;
+                link l{i} -> T{(i + 1) % 50};
+            }}
+            '''
+            for i in range(50)
+        )
+        schema1 = self.load_schema(types)
+        schema2 = self.load_schema(
+            types.replace('property p7 ', 'required property p7 '))
+
+        def fp(schema, name):
+            obj = schema.get(name)
+            fp = sd.get_fingerprint(obj, schema)
+            assert fp is not None
+            return fp
+
+        self.assertEqual(
+            fp(schema1, 'test::T1').structure,
+            fp(schema2, 'test::T1').structure,
+        )
+        self.assertNotEqual(
+            fp(schema1, 'test::T7').structure,
+            fp(schema2, 'test::T7').structure,
+        )
+        self.assertIn(
+            (s_objtypes.ObjectType, s_name.QualName('test', 'T2')),
+            fp(schema1, 'test::T1').refs,
+        )
+
+        diff = s_ddl.delta_schemas(schema1, schema2)
+        self.assertEqual(
+            {cmd.classname for cmd in diff.get_subcommands()},
+            {s_name.QualName('test', 'T7')},
+        )
+
+    def test_schema_delta_rename_candidates_01(self):
+        # Renaming many objects at once makes delta_objects() compare
+        # only the plausible rename pairs, or none at all above
+        # the configured limit.
+        types = '\n'.join(
+            f'''
+            type A{i} {{
+                property foo -> str;
+                property bar -> str;
+            }}
+            '''
+            for i in range(40)
+        )
+        schema1 = self.load_schema(types)
+        schema2 = self.load_schema(types.replace('type A', 'type B'))
+
+        diff = s_ddl.delta_schemas(schema1, schema2)
+        self.assertFalse(
+            diff.get_subcommands(type=s_objtypes.CreateObjectType))
+        self.assertFalse(
+            diff.get_subcommands(type=s_objtypes.DeleteObjectType))
+
+        diff = s_ddl.delta_schemas(
+            schema1, schema2, max_rename_candidates=0)
+        self.assertFalse(
+            diff.get_subcommands(type=s_objtypes.AlterObjectType))
+        self.assertEqual(
+            len(diff.get_subcommands(type=s_objtypes.CreateObjectType)), 40)
+        self.assertEqual(
+            len(diff.get_subcommands(type=s_objtypes.DeleteObjectType)), 40)
+
+    def test_schema_sdl_trace_cache_01(self):
+        # Reusing the traces of unchanged declarations must produce
+        # the same schema as tracing everything from scratch, also
+        # when a changed declaration affects an unchanged one.
+        versions = [
+            r'''
+                type A {
+                    property x -> str;
+                }
+                type B {
+                    link a -> A;
+                    property ax := .a.x;
+                }
+                alias AX := B.ax;
+            ''',
+            r'''
+                type A {
+                    property x -> int64;
+                }
+                type B {
+                    link a -> A;
+                    property ax := .a.x;
+                }
+                alias AX := B.ax;
+            ''',
+            r'''
+                type A {
+                    property x -> int64;
+                }
+                type C {
+                    property x -> str;
+                }
+                type B {
+                    link a -> C;
+                    property ax := .a.x;
+                }
+                alias AX := B.ax;
+            ''',
+        ]
+
+        cache = s_decl.SDLTraceCache()
+        std_schema = tb._load_std_schema()
+        for version in versions:
+            sdl = f'module default {{ {version} }}'
+            cached = s_ddl.apply_sdl(
+                qlparser.parse_sdl(sdl),
+                base_schema=std_schema,
+                trace_cache=cache,
+            )
+            expected = s_ddl.apply_sdl(
+                qlparser.parse_sdl(sdl),
+                base_schema=std_schema,
+            )
+            diff = s_ddl.delta_schemas(expected, cached)
+            self.assertFalse(diff.get_subcommands())
+
+    def test_schema_sdl_trace_cache_02(self):
+        # A cached trace that doesn't match its declaration any more is
+        # dropped instead of failing the migration.
+        sdl = r'''
+            module default {
+                type A {
+                    property x -> str;
+                }
+                type B {
+                    link a -> A;
+                    property ax := .a.x;
+                    property ay := .a.x ++ '!';
+                }
+            }
+        '''
+
+        cache = s_decl.SDLTraceCache()
+        std_schema = tb._load_std_schema()
+        s_ddl.apply_sdl(
+            qlparser.parse_sdl(sdl),
+            base_schema=std_schema,
+            trace_cache=cache,
+        )
+        key, trace = next(
+            (key, trace) for key, trace in cache._traces.items()
+            if len(trace.refs) > 1
+        )
+
+        expected = s_ddl.apply_sdl(
+            qlparser.parse_sdl(sdl),
+            base_schema=std_schema,
+        )
+        for refs in (trace.refs[:-1], trace.refs + trace.refs[-1:]):
+            cache._traces[key] = trace._replace(refs=refs)
+            cached = s_ddl.apply_sdl(
+                qlparser.parse_sdl(sdl),
+                base_schema=std_schema,
+                trace_cache=cache,
+            )
+            diff = s_ddl.delta_schemas(expected, cached)
+            self.assertFalse(diff.get_subcommands())
+            self.assertNotIn(key, cache._traces)
+
+    def test_schema_expr_parse_cache_01(self):
+        cache = s_expr.ParseCache(max_entries=2)
+        tree = cache.parse('.a + 1')
+        self.assertIs(cache.parse('.a + 1'), tree)
+        # Spans record the file name, so it is a part of the key.
+        self.assertIsNot(cache.parse('.a + 1', filename='<x>'), tree)
+
+        cache.parse('.b')
+        self.assertIsNot(cache.parse('.a + 1'), tree)
+
+        cache.preload({('.c', None): tree})
+        self.assertIs(cache.parse('.c'), tree)
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 4)
+        self.assertEqual(stats['preloaded'], 1)
+
+    def test_schema_expr_parse_cache_02(self):
+        # Expressions of the std schema are keyed as they are after
+        # unpickling, when they lose their origin.
+        entries = s_expr.get_parse_cache_entries(tb._load_std_schema())
+        self.assertTrue(entries)
+        for _, filename in entries:
+            self.assertEqual(filename, '')
+
+        cache = s_expr.ParseCache()
+        cache.preload(entries)
+        text, filename = next(iter(entries))
+        self.assertIs(cache.parse(text, filename), entries[text, filename])
+        self.assertEqual(cache.get_stats()['misses'], 0)
+
+        # So are the expressions of shells.
+        s_expr.parse_cache.preload(entries)
+        shell = s_expr.ExpressionShell(text=text, refs=None)
+        self.assertIs(shell.parse(), entries[text, filename])
+
     def test_schema_get_migration_01(self):
         schema = r'''
             abstract inheritable annotation my_anno;
@@ -0,0 +1,166 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import unittest
+import unittest.mock
+
+from edb import errors
+from edb.server import admission
+
+
+class ManualClock:
+    def __init__(self, value: float) -> None:
+        self.value = value
+
+    def __call__(self) -> float:
+        return self.value
+
+
+class TestAdmissionController(unittest.TestCase):
+
+    def test_admission_unlimited(self):
+        ac = admission.AdmissionController('test')
+        self.assertFalse(ac.is_enabled())
+        for _ in range(1000):
+            ac.acquire('admin', 'main')
+        ac.release('admin', 'main')
+
+    def test_admission_max_in_flight(self):
+        ac = admission.AdmissionController(
+            'test',
+            role_limits=admission.AdmissionLimits(max_in_flight=2),
+        )
+        ac.acquire('admin', 'main')
+        ac.acquire('admin', 'other')
+        with self.assertRaisesRegex(
+            errors.RateLimitExceededError, "concurrent requests for role"
+        ):
+            ac.acquire('admin', 'main')
+
+        # Other roles are not affected.
+        with ac.admit('user', 'main'):
+            pass
+
+        ac.release('admin', 'other')
+        with ac.admit('admin', 'main'):
+            pass
+
+    def test_admission_branch_rate(self):
+        clock = ManualClock(0)
+        with unittest.mock.patch("time.monotonic", clock):
+            ac = admission.AdmissionController(
+                'test',
+                branch_limits=admission.AdmissionLimits(rate=2),
+            )
+            with ac.admit('admin', 'main'):
+                pass
+            with ac.admit('user', 'main'):
+                pass
+            with self.assertRaisesRegex(
+                errors.RateLimitExceededError, "rate limit exceeded for branch"
+            ):
+                ac.acquire('admin', 'main')
+
+            # Rejected requests are not counted as in flight.
+            self.assertEqual(
+                ac.get_debug_info()['branches']['in_flight'], {}
+            )
+
+            with ac.admit('admin', 'other'):
+                pass
+
+            clock.value += 1
+            with ac.admit('admin', 'main'):
+                pass
+
+    def test_admission_rate_check_both(self):
+        clock = ManualClock(0)
+        with unittest.mock.patch("time.monotonic", clock):
+            ac = admission.AdmissionController(
+                'test',
+                role_limits=admission.AdmissionLimits(rate=2),
+                branch_limits=admission.AdmissionLimits(rate=1),
+            )
+            with ac.admit('admin', 'main'):
+                pass
+            rejection = ac.try_acquire('admin', 'main')
+            self.assertEqual(rejection.scope, 'branch')
+            self.assertEqual(rejection.delay, 1)
+            self.assertEqual(rejection.get_retry_after(), 1)
+
+            # The rejected request didn't use up the rate of the role.
+            with ac.admit('admin', 'other'):
+                pass
+            rejection = ac.try_acquire('admin', 'third')
+            self.assertEqual(rejection.scope, 'role')
+            self.assertEqual(rejection.delay, 0.5)
+
+    def test_admission_count_rate(self):
+        clock = ManualClock(0)
+        with unittest.mock.patch("time.monotonic", clock):
+            ac = admission.AdmissionController(
+                'test',
+                role_limits=admission.AdmissionLimits(
+                    rate=0.25, max_in_flight=1
+                ),
+            )
+            with ac.admit('admin', 'main', count_rate=False):
+                pass
+            with ac.admit('admin', 'main'):
+                with self.assertRaisesRegex(
+                    errors.RateLimitExceededError, "concurrent requests"
+                ):
+                    ac.acquire('admin', 'main', count_rate=False)
+
+            rejection = ac.try_acquire('admin', 'main')
+            self.assertEqual(rejection.reason, 'rate')
+            self.assertEqual(rejection.get_retry_after(), 4)
+
+    def test_admission_forget_idle(self):
+        clock = ManualClock(0)
+        with unittest.mock.patch("time.monotonic", clock):
+            ac = admission.AdmissionController(
+                'test',
+                role_limits=admission.AdmissionLimits(rate=1),
+                branch_limits=admission.AdmissionLimits(max_in_flight=1),
+            )
+            # Roles are forgotten once their buckets are full again.
+            for i in range(5000):
+                clock.value += 1
+                with ac.admit(f'role{i}', f'branch{i}'):
+                    pass
+            self.assertEqual(len(ac._branches._quotas), 0)
+            self.assertLessEqual(
+                len(ac._roles._quotas), admission._MIN_SWEEP_SIZE
+            )
+
+            # But not before.
+            with ac.admit('admin', 'main'):
+                pass
+            ac._roles._sweep()
+            with self.assertRaisesRegex(
+                errors.RateLimitExceededError, "rate limit exceeded for role"
+            ):
+                ac.acquire('admin', 'main')
+
+    def test_admission_retryable(self):
+        self.assertTrue(
+            issubclass(
+                errors.RateLimitExceededError, errors.AvailabilityError
+            )
+        )
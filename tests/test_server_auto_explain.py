@@ -0,0 +1,102 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import unittest
+
+from edb.server import auto_explain
+
+
+class TestSlowQueryLog(unittest.TestCase):
+
+    def test_auto_explain_disabled(self):
+        log = auto_explain.SlowQueryLog()
+        self.assertFalse(log.is_enabled())
+        self.assertFalse(log.should_capture(1000.0))
+
+    def test_auto_explain_should_capture(self):
+        samples = iter([0.1, 0.9, 0.4])
+        log = auto_explain.SlowQueryLog(
+            auto_explain.AutoExplainSettings(threshold=1.0, sample_rate=0.5),
+            max_in_flight=1,
+            sample=lambda: next(samples),
+        )
+        self.assertFalse(log.should_capture(0.5))
+        self.assertTrue(log.should_capture(1.0))
+        # Too many plans are being captured already.
+        self.assertFalse(log.should_capture(2.0))
+        log.capture_done()
+        self.assertFalse(log.should_capture(2.0))
+        self.assertTrue(log.should_capture(2.0))
+
+    def test_auto_explain_log_bounded(self):
+        log = auto_explain.SlowQueryLog(
+            auto_explain.AutoExplainSettings(threshold=1.0),
+            max_size=2,
+            clock=lambda: 42.0,
+        )
+        plan = json.dumps({
+            'fine_grained': {'pipeline': []},
+            'debug_info': {'full_plan': {}},
+        }).encode()
+        log.add(branch='main', role='admin', query='select 1',
+                duration=1.5, plan=plan)
+        log.add(branch='main', role='admin', query='select 2',
+                duration=2.5, error='QueryError: oops')
+        log.add(branch='other', role='admin', query='select 3',
+                duration=3.5, plan=plan)
+
+        entries = log.get_entries()
+        self.assertEqual([e['query'] for e in entries],
+                         ['select 3', 'select 2'])
+        self.assertEqual(entries[0], {
+            'captured_at': 42.0,
+            'branch': 'other',
+            'role': 'admin',
+            'query': 'select 3',
+            'duration': 3.5,
+            'plan': {'fine_grained': {'pipeline': []}},
+            'error': None,
+        })
+        self.assertIsNone(entries[1]['plan'])
+        self.assertEqual(entries[1]['error'], 'QueryError: oops')
+        json.dumps(entries)
+
+        log.clear()
+        self.assertEqual(log.get_entries(), [])
+
+    def test_auto_explain_plan_from_data(self):
+        self.assertEqual(
+            auto_explain.explain_query('select 1'),
+            'analyze (execute := false) select 1',
+        )
+
+        plan = b'{"fine_grained": {}}'
+        data = (
+            b'D'
+            + (len(plan) + 10).to_bytes(4, 'big')
+            + (1).to_bytes(2, 'big')
+            + len(plan).to_bytes(4, 'big')
+            + plan
+        )
+        self.assertEqual(auto_explain.plan_from_data(data), plan)
+
+        with self.assertRaises(ValueError):
+            auto_explain.plan_from_data(data[:-1])
+        with self.assertRaises(ValueError):
+            auto_explain.plan_from_data(b'C' + data[1:])
@@ -38,12 +38,15 @@ from edb.ir import statypes
 from edb.testbase import lang as tb
 from edb.testbase import server as tbs
 from edb.pgsql import params as pg_params
+from edb.schema import schema as s_schema
 from edb.server import args as edbargs
 from edb.server import compiler as edbcompiler
 from edb.server.compiler import rpc
 from edb.server import config
+from edb.server import metrics
 from edb.server.compiler_pool import amsg
 from edb.server.compiler_pool import pool
+from edb.server.compiler_pool import worker_proc
 from edb.server.dbview import dbview
 
 
@@ -84,6 +87,25 @@ class TestServerCompiler(tb.BaseSchemaLoadTest):
             ''',
         )
 
+    def test_server_compiler_sdl_trace_cache(self):
+        state = self.compiler.state
+        # Global schemas stand for the tenants.
+        tenant1 = s_schema.FlatSchema()
+        tenant2 = s_schema.FlatSchema()
+
+        cache = state.get_sdl_trace_cache(tenant1, 'main')
+        self.assertIs(state.get_sdl_trace_cache(tenant1, 'main'), cache)
+        self.assertIsNot(state.get_sdl_trace_cache(tenant1, 'other'), cache)
+        self.assertIsNot(state.get_sdl_trace_cache(tenant2, 'main'), cache)
+
+        for i in range(edbcompiler.compiler.SDL_TRACE_CACHE_BRANCHES):
+            state.get_sdl_trace_cache(tenant1, f'branch{i}')
+        self.assertIsNot(state.get_sdl_trace_cache(tenant1, 'main'), cache)
+
+        # The caches of a tenant go away with its global schema.
+        del tenant2
+        self.assertEqual(len(state._sdl_trace_caches), 1)
+
     def _test_compile_structured_config(
         self,
         values: dict[str, Any],
@@ -220,6 +242,47 @@ class TestServerCompiler(tb.BaseSchemaLoadTest):
                 {"sysobj": [{"name": "same"}, {"name": "same"}]}
             )
 
+    def test_server_compiler_check_incremental_dump_since(self):
+        def check(since, snapshot, *, sysid='1', branch='main'):
+            edbcompiler.check_incremental_dump_since(
+                edbcompiler.make_dump_snapshot(sysid, branch, since),
+                edbcompiler.make_dump_snapshot('1', 'main', snapshot),
+            )
+
+        check('100:105:101,103', '110:112:')
+        check('100:100:', '100:100:')
+
+        with self.assertRaisesRegex(errors.InputDataError, 'invalid'):
+            check('100:105', '110:112:')
+        with self.assertRaisesRegex(errors.InputDataError, 'invalid'):
+            check('100:105:1;', '110:112:')
+        with self.assertRaisesRegex(errors.InputDataError, 'invalid'):
+            edbcompiler.check_incremental_dump_since(
+                '100:105:',
+                edbcompiler.make_dump_snapshot('1', 'main', '110:112:'),
+            )
+        with self.assertRaisesRegex(errors.InputDataError, 'this branch'):
+            check('100:120:', '110:112:')
+        with self.assertRaisesRegex(errors.InputDataError, 'this branch'):
+            check('100:105:', '110:112:', sysid='2')
+        with self.assertRaisesRegex(errors.InputDataError, 'this branch'):
+            check('100:105:', '110:112:', branch='other')
+        with self.assertRaisesRegex(errors.InputDataError, 'too old'):
+            check('100:105:', f'{2 ** 31 + 100}:{2 ** 31 + 100}:')
+
+    def test_server_compiler_check_incremental_restore_since(self):
+        check = edbcompiler.check_incremental_restore_since
+        snapshot = edbcompiler.make_dump_snapshot('1', 'main', '100:105:')
+        check(snapshot, snapshot)
+
+        with self.assertRaisesRegex(errors.InputDataError, 'no dump'):
+            check(snapshot, None)
+        with self.assertRaisesRegex(errors.InputDataError, 'not incremental'):
+            check(
+                snapshot,
+                edbcompiler.make_dump_snapshot('1', 'main', '110:112:'),
+            )
+
 
 class ServerProtocol(amsg.ServerProtocol):
     def __init__(self):
@@ -617,6 +680,62 @@ class TestCompilerPool(tbs.TestCase):
     async def test_server_compiler_pool_disconnect_queue_adaptive(self):
         await self._test_pool_disconnect_queue(pool.SimpleAdaptivePool)
 
+    def test_server_compiler_pool_worker_metrics(self):
+        wm = worker_proc.WorkerMetrics()
+
+        @wm.phase('sync')
+        def handler(x):
+            time.sleep(0.01)
+            return x + 1
+
+        self.assertEqual(wm.call('compile', handler, (1,)), 2)
+        with wm.phase('pickle'):
+            pass
+
+        deltas = wm.collect()
+        self.assertEqual(deltas['requests'], {'compile': 1})
+        phases = deltas['phase_seconds']
+        self.assertGreaterEqual(phases['sync'], 0.01)
+        # The sync phase is not counted as compile time.
+        self.assertLess(phases['compile'], phases['sync'])
+        self.assertIn('pickle', phases)
+
+        # Collections only return what changed since the previous one.
+        deltas = wm.collect()
+        self.assertEqual(deltas['requests'], {})
+        self.assertEqual(deltas['parse_cache'], {'hit': 0, 'miss': 0})
+
+        pool._merge_worker_metrics('12345', dict(
+            requests={'compile': 2},
+            phase_seconds={'compile': 0.5, 'sync': 0.0},
+            gc_collections={'2': 1},
+            gc_seconds={'2': 0.25},
+            parse_cache={'hit': 3, 'miss': 0},
+        ))
+        try:
+            text = metrics.registry.generate(pid='12345')
+            self.assertIn(
+                'edgedb_server_compiler_process_requests_total'
+                '{pid="12345",method="compile"} 2.0',
+                text,
+            )
+            self.assertIn(
+                'edgedb_server_compiler_process_gc_duration_seconds_total'
+                '{pid="12345",generation="2"} 0.25',
+                text,
+            )
+            self.assertNotIn('phase="sync"', text)
+            self.assertNotIn('result="miss"', text)
+        finally:
+            for metric in (
+                metrics.compiler_process_requests,
+                metrics.compiler_process_phase_duration,
+                metrics.compiler_process_gc_collections,
+                metrics.compiler_process_gc_duration,
+                metrics.compiler_process_parse_cache_lookups,
+            ):
+                metric.clear(lambda pid, *_: pid == '12345')
+
     def test_server_compiler_rpc_hash_eq(self):
         compiler = edbcompiler.new_compiler(
             std_schema=self._std_schema,
@@ -0,0 +1,136 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import unittest
+
+from edb.server import compression
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_compression_negotiate(self):
+        self.assertEqual(
+            compression.negotiate('zstd, deflate', ['deflate']),
+            'deflate',
+        )
+        self.assertEqual(
+            compression.negotiate('DEFLATE', ['deflate', 'zstd']),
+            'deflate',
+        )
+        self.assertIsNone(compression.negotiate('deflate', []))
+        self.assertIsNone(compression.negotiate('', ['deflate']))
+        self.assertIsNone(compression.negotiate('brotli', ['deflate']))
+
+        for name, algo in compression.ALGORITHMS.items():
+            if not algo.available:
+                self.assertIsNone(compression.negotiate(name, [name]))
+                self.assertNotIn(name, compression.get_available())
+
+    def test_compression_round_trip(self):
+        messages = [
+            json.dumps({'number': i, 'title': f'Issue {i}'}).encode() * 10
+            for i in range(100)
+        ]
+        for name in compression.get_available():
+            with self.subTest(algorithm=name):
+                algo = compression.ALGORITHMS[name]
+                compressor = algo.new_compressor()
+                decompressor = algo.new_decompressor()
+                received = []
+                for msg in messages:
+                    # Each chunk must be readable on its own, as the
+                    # peer waits for the message before sending more.
+                    received.append(decompressor.decompress(
+                        compressor.compress(msg), 1024 * 1024))
+                    self.assertFalse(decompressor.pending)
+                self.assertEqual(received, messages)
+
+    def test_compression_bounded_output(self):
+        data = b'\0' * (8 * compression.MAX_BLOCK_SIZE)
+        max_length = 1024 * 1024
+        for name in compression.get_available():
+            with self.subTest(algorithm=name):
+                algo = compression.ALGORITHMS[name]
+                compressed = algo.new_compressor().compress(data)
+                self.assertLess(len(compressed), len(data) // 100)
+
+                # zstd and lz4 blocks are decompressed as a whole.
+                limit = max(max_length, compression.MAX_BLOCK_SIZE)
+                decompressor = algo.new_decompressor()
+                chunk = decompressor.decompress(compressed, max_length)
+                total = 0
+                while True:
+                    self.assertLessEqual(len(chunk), limit)
+                    total += len(chunk)
+                    if not decompressor.pending:
+                        break
+                    chunk = decompressor.decompress(b'', max_length)
+                self.assertEqual(total, len(data))
+
+    def test_compression_block_too_large(self):
+        too_large = compression.MAX_COMPRESSED_BLOCK_SIZE + 1
+        for name in compression.get_available():
+            if name == 'deflate':
+                continue
+            with self.subTest(algorithm=name):
+                decompressor = compression.ALGORITHMS[name].new_decompressor()
+                # Rejected before waiting for the data of the block.
+                with self.assertRaisesRegex(ValueError, 'too large'):
+                    decompressor.decompress(too_large.to_bytes(4, 'big'), 1)
+
+        if 'lz4' in compression.get_available():
+            decompressor = compression.ALGORITHMS['lz4'].new_decompressor()
+            block = (8).to_bytes(4, 'big') + (2 ** 31).to_bytes(4, 'little')
+            with self.assertRaisesRegex(ValueError, 'too large'):
+                decompressor.decompress(block + b'\0' * 4, 1)
+
+    def test_compression_stream(self):
+        client = compression.ALGORITHMS['deflate'].new_compressor()
+        server = compression.CompressedStream(
+            'deflate', tenant_label='test')
+
+        data = b'x' * 10000
+        self.assertEqual(
+            server.decompress(client.compress(data), 1024 * 1024), data)
+        self.assertFalse(server.pending)
+        self.assertEqual(server.raw_bytes_received, 10000)
+        self.assertLess(server.wire_bytes_received, 1000)
+
+        self.assertEqual(server.get_ratio(), 1.0)
+        server.compress(data)
+        self.assertEqual(server.raw_bytes_sent, 10000)
+        self.assertGreater(server.get_ratio(), 10)
+
+    def test_compression_dump_block(self):
+        data = b'd' + b'some row data\n' * 1000
+        for name in compression.get_available():
+            with self.subTest(algorithm=name):
+                block, checksum = compression.compress_block(name, data)
+                self.assertLess(len(block), len(data))
+                self.assertEqual(
+                    compression.decompress_block(name, block, checksum),
+                    data,
+                )
+                with self.assertRaisesRegex(ValueError, 'checksum'):
+                    compression.decompress_block(name, block, checksum ^ 1)
+
+        with self.assertRaisesRegex(ValueError, 'not available'):
+            compression.decompress_block('brotli', b'', 0)
+        with self.assertRaisesRegex(ValueError, 'cannot decompress'):
+            compression.decompress_block('deflate', b'\xff' * 10, 0)
@@ -21,6 +21,7 @@ from __future__ import annotations
 from typing import Any, Mapping, NamedTuple, Callable
 
 import asyncio
+import base64
 import http
 import http.client
 import json
@@ -39,6 +40,7 @@ import unittest
 import urllib.error
 import urllib.request
 import uuid
+import zlib
 
 import edgedb
 
@@ -47,7 +49,7 @@ from edb import buildmeta
 from edb import protocol
 from edb.common import devmode
 from edb.protocol import protocol as edb_protocol  # type: ignore
-from edb.server import args, pgcluster
+from edb.server import args, defines, pgcluster
 from edb.testbase import cluster as edbcluster
 from edb.testbase import server as tb
 
@@ -1118,6 +1120,235 @@ class TestServerOps(tb.TestCaseWithHttpClient, tb.CLITestCaseMixin):
             finally:
                 await con.aclose()
 
+    async def test_server_ops_compression_bomb(self):
+        async with tb.start_edgedb_server(
+            binary_endpoint_security=args.ServerEndpointSecurityMode.Optional,
+            default_auth_method=args.ServerAuthMethod.Scram,
+            bootstrap_command='ALTER ROLE admin SET password := "test";',
+            extra_args=['--binary-compression', 'deflate'],
+        ) as sd:
+            reader, writer = await asyncio.open_connection(sd.host, sd.port)
+            try:
+                writer.write(protocol.ClientHandshake(
+                    major_ver=defines.CURRENT_PROTOCOL[0],
+                    minor_ver=defines.CURRENT_PROTOCOL[1],
+                    params=[
+                        protocol.ConnectionParam(name='user', value='admin'),
+                        protocol.ConnectionParam(
+                            name='database', value='main'),
+                    ],
+                    extensions=[
+                        protocol.ProtocolExtension(
+                            name='compression',
+                            annotations=[
+                                protocol.Annotation(
+                                    name='algorithms', value='deflate'),
+                            ],
+                        ),
+                    ],
+                ).dump())
+                await writer.drain()
+
+                header = await reader.readexactly(5)
+                self.assertEqual(header[:1], b'v')
+                body = await reader.readexactly(
+                    int.from_bytes(header[1:], 'big') - 4)
+                handshake = protocol.ServerMessage.parse(header[0], body)
+                self.assertEqual(
+                    [(ext.name, [(a.name, a.value) for a in ext.annotations])
+                     for ext in handshake.extensions],
+                    [('compression', [('algorithm', 'deflate')])],
+                )
+
+                # A SASLInitialResponse that claims to be 2 GiB long,
+                # followed by zeros that inflate ~1000x.  The server must
+                # drop the unauthenticated connection long before
+                # inflating all of it.
+                deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+                writer.write(deflate.compress(
+                    b'p' + (0x7FFFFFFF).to_bytes(4, 'big')))
+                chunk = bytes(1024 * 1024)
+                closed = False
+                for _ in range(1024):
+                    writer.write(deflate.compress(chunk))
+                    writer.write(deflate.flush(zlib.Z_SYNC_FLUSH))
+                    try:
+                        await writer.drain()
+                    except ConnectionError:
+                        closed = True
+                        break
+
+                if not closed:
+                    async def _wait_eof():
+                        try:
+                            while await reader.read(65536):
+                                pass
+                        except ConnectionError:
+                            pass
+
+                    await asyncio.wait_for(_wait_eof(), timeout=30)
+            finally:
+                writer.close()
+
+            con = await sd.connect(password='test')
+            try:
+                self.assertEqual(await con.query_single('SELECT 1'), 1)
+            finally:
+                await con.aclose()
+
+    async def test_server_ops_slow_queries(self):
+        async with tb.start_edgedb_server(
+            default_auth_method=args.ServerAuthMethod.Scram,
+            bootstrap_command='ALTER ROLE admin SET password := "test";',
+            extra_args=['--auto-explain-threshold', '0.000001'],
+        ) as sd:
+            query = 'select count(schema::ObjectType)'
+            con = await sd.connect(password='test')
+            try:
+                await con.query(query)
+            finally:
+                await con.aclose()
+
+            key = base64.b64encode(b'admin:test').decode()
+            with self.http_con(sd) as http_con:
+                _, _, status = self.http_con_request(
+                    http_con, path='/server/slow-queries')
+                self.assertEqual(status, http.HTTPStatus.UNAUTHORIZED)
+
+            # The plan is captured in the background.
+            async for tr in self.try_until_succeeds(ignore=AssertionError):
+                async with tr:
+                    with self.http_con(sd) as http_con:
+                        body, _, status = self.http_con_request(
+                            http_con,
+                            path='/server/slow-queries',
+                            headers={'Authorization': f'Basic {key}'},
+                        )
+                    self.assertEqual(status, http.HTTPStatus.OK)
+                    entries = [
+                        e for e in json.loads(body) if e['query'] == query
+                    ]
+                    self.assertEqual(len(entries), 1)
+
+            self.assertIsNone(entries[0]['error'])
+            self.assertEqual(entries[0]['role'], 'admin')
+            self.assertIn('fine_grained', entries[0]['plan'])
+
+    async def test_server_ops_rate_limit_in_transaction(self):
+        async with tb.start_edgedb_server(
+            extra_args=['--role-rate-limit', '1'],
+        ) as sd:
+            con = await sd.connect()
+            con = con.with_retry_options(edgedb.RetryOptions(attempts=1))
+            try:
+                await con.execute('start transaction;')
+                with self.assertRaisesRegex(
+                    edgedb.AvailabilityError, 'rate limit exceeded'
+                ):
+                    for _ in range(10):
+                        await con.execute('select 1;')
+
+                # The rejected statement didn't abort the transaction.
+                async for tr in self.try_until_succeeds(
+                    ignore=edgedb.AvailabilityError
+                ):
+                    async with tr:
+                        await con.execute('select 1;')
+                await con.execute('commit;')
+            finally:
+                await con.aclose()
+
+    async def test_server_ops_query_stats_auth(self):
+        async with tb.start_edgedb_server(
+            default_auth_method=args.ServerAuthMethod.Scram,
+            bootstrap_command='ALTER ROLE admin SET password := "test";',
+            extra_args=['--query-stats-size', '10'],
+        ) as sd:
+            for method in ('GET', 'DELETE'):
+                with self.http_con(sd) as http_con:
+                    _, _, status = self.http_con_request(
+                        http_con, method=method, path='/server/query-stats')
+                self.assertEqual(status, http.HTTPStatus.UNAUTHORIZED)
+
+            key = base64.b64encode(b'admin:test').decode()
+            with self.http_con(sd) as http_con:
+                body, _, status = self.http_con_request(
+                    http_con,
+                    path='/server/query-stats',
+                    headers={'Authorization': f'Basic {key}'},
+                )
+            self.assertEqual(status, http.HTTPStatus.OK)
+            self.assertIn('statements', json.loads(body))
+
+    async def test_server_ops_coalesce_compilations(self):
+        # Concurrent identical SQL and GraphQL queries are compiled once,
+        # and all of them get the result.
+        def measure(sd: tb._EdgeDBServerData, metric: str):
+            return lambda: tb.parse_metrics(sd.fetch_metrics()).get(
+                f'edgedb_server_{metric}'
+            ) or 0
+
+        def gql_request(sd: tb._EdgeDBServerData):
+            with self.http_con(sd, keep_alive=False) as con:
+                return self.http_con_request(
+                    con,
+                    path='/db/main/graphql',
+                    params=dict(query='{ Item(order: {name: {dir: ASC}}) '
+                                      '{ name } }'),
+                    headers={'X-EdgeDB-User': 'admin'},
+                )
+
+        async with tb.start_edgedb_server(
+            default_auth_method=args.ServerAuthMethod.Trust,
+            net_worker_mode='disabled',
+        ) as sd:
+            con = await sd.connect()
+            try:
+                await con.execute('''
+                    CREATE EXTENSION graphql;
+                    CREATE TYPE Item { CREATE PROPERTY name: str };
+                    INSERT Item { name := 'a' };
+                    INSERT Item { name := 'b' };
+                ''')
+            finally:
+                await con.aclose()
+
+            pg_cons = await asyncio.gather(
+                *(sd.connect_pg() for _ in range(10)))
+            try:
+                with self.assertChange(
+                    measure(sd, 'sql_compilations_total{tenant="localtest"}'),
+                    1,
+                ):
+                    results = await asyncio.gather(*(
+                        pg_con.fetch(
+                            'SELECT name FROM "Item" ORDER BY name')
+                        for pg_con in pg_cons
+                    ))
+                for res in results:
+                    self.assertEqual([r['name'] for r in res], ['a', 'b'])
+            finally:
+                await asyncio.gather(
+                    *(pg_con.close() for pg_con in pg_cons))
+
+            with self.assertChange(
+                measure(
+                    sd,
+                    'graphql_query_compilations_total'
+                    '{tenant="localtest",path="compiler"}',
+                ),
+                1,
+            ):
+                results = await asyncio.gather(*(
+                    asyncio.to_thread(gql_request, sd) for _ in range(10)
+                ))
+            for body, _, status in results:
+                self.assertEqual(status, http.HTTPStatus.OK, body)
+                self.assertEqual(
+                    json.loads(body)['data'],
+                    {'Item': [{'name': 'a'}, {'name': 'b'}]},
+                )
+
     async def test_server_ops_no_cleartext(self):
         async with tb.start_edgedb_server(
             binary_endpoint_security=args.ServerEndpointSecurityMode.Tls,
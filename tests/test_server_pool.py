@@ -284,6 +284,12 @@ class Spec:
     disconn_cost_base: float = 0.006
     disconn_cost_var: float = 0.0015
     score: list[ScoreMethod] = dataclasses.field(default_factory=list)
+    # If set, also simulate the pool with predictive pre-warming, using
+    # these options for the DemandPredictor.
+    prewarm: typing.Optional[dict[str, typing.Any]] = None
+    # If set, also simulate the pool with branch affinity, using these
+    # options for the AffinityPolicy.
+    affinity: typing.Optional[dict[str, typing.Any]] = None
 
     def __post_init__(self):
         self.timeout *= TIME_SCALE
@@ -291,6 +297,11 @@ class Spec:
         for db in self.dbs:
             db.start_at *= TIME_SCALE
             db.end_at *= TIME_SCALE
+        if self.prewarm:
+            self.prewarm = {
+                k: v * TIME_SCALE if k in PREWARM_TIME_OPTIONS else v
+                for k, v in self.prewarm.items()
+            }
 
     def asdict(self):
         rv = dataclasses.asdict(self)
@@ -366,11 +377,20 @@ class FakeConnection:
                 "that's currently in use")
 
 
+def custom_simulation(meth):
+    # Marks a SimulatedCase test that runs its simulations itself instead of
+    # returning a Spec. Such tests also run without EDGEDB_TEST_DEBUG_POOL.
+    meth.__custom_simulation__ = True
+    return meth
+
+
 class SimulatedCaseMeta(type):
     def __new__(mcls, name, bases, dct):
         for methname, meth in tuple(dct.items()):
             if not methname.startswith('test_'):
                 continue
+            if getattr(meth, '__custom_simulation__', False):
+                continue
 
             @functools.wraps(meth)
             def wrapper(self, meth=meth, testname=methname):
@@ -427,11 +447,28 @@ class SingleBlockPool(pool_impl.BasePool[C]):
         return len(self._queue._getters)
 
 
+class PrewarmedPool(pool_impl.Pool[C]):
+    # The regular pool with a DemandPredictor, see Spec.prewarm
+    pass
+
+
+PREWARM_TIME_OPTIONS = ('slot_size', 'period', 'lead_time', 'interval')
+
+
+class AffinePool(pool_impl.Pool[C]):
+    # The regular pool with an AffinityPolicy, see Spec.affinity
+    pass
+
+
 class SimulatedCase(unittest.TestCase, metaclass=SimulatedCaseMeta):
     full_qps: typing.Optional[int] = None  # set by the base test
 
     def setUp(self) -> None:
-        if not os.environ.get('EDGEDB_TEST_DEBUG_POOL'):
+        meth = getattr(self, self._testMethodName)
+        if (
+            not os.environ.get('EDGEDB_TEST_DEBUG_POOL')
+            and not getattr(meth, '__custom_simulation__', False)
+        ):
             raise unittest.SkipTest(
                 "Skipped because EDGEDB_TEST_DEBUG_POOL is not set"
             )
@@ -526,6 +563,16 @@ class SimulatedCase(unittest.TestCase, metaclass=SimulatedCaseMeta):
             stat = dataclasses.asdict(stat)
             sim.stats.append(stat)
 
+        extra_options = {}
+        if pool_cls is PrewarmedPool:
+            extra_options['predictor'] = connpool.DemandPredictor(
+                clock=time.monotonic, **spec.prewarm
+            )
+        elif pool_cls is AffinePool:
+            extra_options['affinity'] = pool_impl.AffinityPolicy(
+                **spec.affinity
+            )
+
         pool = pool_cls(
             connect=self.make_fake_connect(
                 sim, spec.conn_cost_base, spec.conn_cost_var),
@@ -534,6 +581,7 @@ class SimulatedCase(unittest.TestCase, metaclass=SimulatedCaseMeta):
             stats_collector=on_stats if collect_stats else None,
             max_capacity=spec.capacity,
             min_idle_time_before_gc=0.1 * TIME_SCALE,
+            **extra_options,
         )
         print(f"Simulating {pool.__class__}")
 
@@ -594,8 +642,23 @@ class SimulatedCase(unittest.TestCase, metaclass=SimulatedCaseMeta):
                 spec.timeout
             )
 
+    async def compare_with_regular_pool(self, spec, pool_cls):
+        # Simulates the spec with the regular pool and with pool_cls,
+        # returning the collected stats of both runs.
+        results = []
+        for cls in (connpool.Pool, pool_cls):
+            results.append(await asyncio.wait_for(
+                self.simulate_once(spec, cls, collect_stats=True),
+                spec.timeout
+            ))
+        return results
+
     async def simulate_and_collect_stats(self, testname, spec):
         pools = [connpool.Pool, connpool.Pool2, connpool._NaivePool]
+        if spec.prewarm:
+            pools.insert(1, PrewarmedPool)
+        if spec.affinity is not None:
+            pools.insert(1, AffinePool)
 
         js_data = []
         for pool_cls in pools:
@@ -1292,6 +1355,148 @@ class TestServerConnpoolSimulation(SimulatedCase):
             ]
         )
 
+    def test_server_connpool_11(self):
+        return Spec(
+            desc='''
+            This test spec is to check the predictive pre-warming of
+            connections.  t0 is a constantly-running reference block, while
+            t1-t3 are "cron jobs" waking up every 0.5s for a short burst.
+            Their connections are garbage-collected between the bursts, so
+            without pre-warming every burst pays for the connection cost.
+            With pre-warming, the bursts after the first one should find
+            their connections already established.
+            ''',
+            timeout=10,
+            duration=1.6,
+            capacity=10,
+            conn_cost_base=0.05,
+            conn_cost_var=0.01,
+            # The lead time has to cover the slot size, the prewarm interval
+            # and the connection cost.
+            prewarm=dict(
+                slot_size=0.05,
+                period=0.5,
+                lead_time=0.15,
+                interval=0.025,
+            ),
+            score=[
+                AbsoluteLatency(
+                    weight=0.8, group=range(1, 4), percentile='P75',
+                    v100=0.005, v90=0.02, v60=0.05, v0=0.15,
+                ),
+                AbsoluteLatency(
+                    weight=0.2, group=range(1), percentile='P75',
+                    v100=0.001, v90=0.01, v60=0.03, v0=0.06,
+                ),
+            ],
+            dbs=[
+                DBSpec(
+                    db='t0',
+                    start_at=0,
+                    end_at=1.5,
+                    qps=200,
+                    query_cost_base=0.01,
+                    query_cost_var=0.002,
+                ),
+            ] + [
+                DBSpec(
+                    db=f't{i}',
+                    start_at=start,
+                    end_at=start + 0.1,
+                    qps=100,
+                    query_cost_base=0.01,
+                    query_cost_var=0.002,
+                )
+                for i in range(1, 4)
+                for start in (0.1, 0.6, 1.1)
+            ]
+        )
+
+    def test_server_connpool_12(self):
+        # Zipfian distribution of the load over 200 branches: the qps of
+        # a branch is inversely proportional to its rank.
+        nbranches = 200
+        weights = [1 / rank for rank in range(1, nbranches + 1)]
+        total_qps = 2000
+        return Spec(
+            desc='''
+            This test spec is to check the connection churn with many
+            lightly-used branches. The load is spread over 200 branches with
+            a Zipfian distribution, the pool capacity is much lower than the
+            number of branches, so the pool is starving (Mode D) most of the
+            time. The hot branches should keep their connections, while the
+            long tail should share the rest without reconnecting for every
+            single query.
+            ''',
+            timeout=20,
+            duration=1.1,
+            capacity=30,
+            conn_cost_base=0.02,
+            conn_cost_var=0.005,
+            affinity={},
+            score=[
+                ConnectionOverhead(
+                    weight=0.6, v100=0, v90=0.05, v60=0.2, v0=0.5
+                ),
+                AbsoluteLatency(
+                    weight=0.2, group=range(3), percentile='P75',
+                    v100=0.005, v90=0.02, v60=0.1, v0=0.3,
+                ),
+                AbsoluteLatency(
+                    weight=0.2, group=range(3, nbranches), percentile='P75',
+                    v100=0.05, v90=0.1, v60=0.3, v0=0.6,
+                ),
+            ],
+            dbs=[
+                DBSpec(
+                    db=f't{i}',
+                    start_at=0,
+                    end_at=1.0,
+                    qps=max(int(total_qps * w / sum(weights)), 1),
+                    query_cost_base=0.003,
+                    query_cost_var=0.001,
+                )
+                for i, w in enumerate(weights)
+            ]
+        )
+
+    @custom_simulation
+    def test_server_connpool_prewarm(self):
+        spec = self.test_server_connpool_11.__wrapped__(self)
+        regular, prewarmed = asyncio.run(
+            self.compare_with_regular_pool(spec, PrewarmedPool))
+
+        def median_latency(result):
+            return statistics.fmean(
+                result['lats'][f't{i}'][2] for i in range(1, 4)
+            )
+
+        # The first burst of every cron job has to wait for connections
+        # either way, but the later ones should find them pre-warmed.
+        self.assertLess(
+            median_latency(prewarmed), median_latency(regular) / 2
+        )
+
+    @custom_simulation
+    def test_server_connpool_affinity(self):
+        spec = self.test_server_connpool_12.__wrapped__(self)
+        regular, affine = asyncio.run(
+            self.compare_with_regular_pool(spec, AffinePool))
+
+        def reconnects(result):
+            return result['stats'][-1]['successful_disconnects']
+
+        def hot_latency(result):
+            return statistics.fmean(
+                result['lats'][f't{i}'][3] for i in range(3)
+            )
+
+        # With the default policy the reconnects go down by about 30%, far
+        # from an order of magnitude, but the hot branches keep their
+        # connections.
+        self.assertLess(reconnects(affine), reconnects(regular) * 0.8)
+        self.assertLess(hot_latency(affine), hot_latency(regular) / 2)
+
 
 class TestServerConnectionPool(unittest.TestCase):
 
@@ -1631,6 +1836,195 @@ class TestServerConnectionPool(unittest.TestCase):
 
         asyncio.run(main())
 
+    def test_connpool_metrics_collector(self):
+        class Collector:
+            def __init__(self):
+                self.events = collections.defaultdict(list)
+
+            def on_acquire(self, dbname, wait_time):
+                self.events['acquire'].append((dbname, wait_time))
+
+            def on_connect(self, dbname, duration):
+                self.events['connect'].append((dbname, duration))
+
+            def on_transfer(self, dbname, duration):
+                self.events['transfer'].append((dbname, duration))
+
+            def on_steal(self, dbname):
+                self.events['steal'].append(dbname)
+
+        @async_timeout(timeout=5)
+        async def test():
+            collector = Collector()
+            pool = connpool.Pool(
+                connect=self.make_fake_connect(),
+                disconnect=self.make_fake_disconnect(),
+                max_capacity=2,
+                metrics_collector=collector,
+            )
+
+            async def job(dbname):
+                conn = await pool.acquire(dbname)
+                await asyncio.sleep(0.02)
+                pool.release(dbname, conn)
+
+            async with asyncio.TaskGroup() as g:
+                for n in range(4):
+                    g.create_task(job(f"block_{n}"))
+
+            self.assertEqual(
+                sorted(dbname for dbname, _ in collector.events['acquire']),
+                ['block_0', 'block_1', 'block_2', 'block_3'],
+            )
+            for _, wait_time in collector.events['acquire']:
+                self.assertGreaterEqual(wait_time, 0)
+
+            if not hasattr(pool, '_pool'):
+                self.assertEqual(len(collector.events['connect']), 2)
+                # Only two connections are allowed, so the other two blocks
+                # have to be served by transferring connections.
+                self.assertEqual(
+                    sorted(
+                        dbname for dbname, _ in collector.events['transfer']
+                    ),
+                    ['block_2', 'block_3'],
+                )
+                # The pool may still be transferring the released
+                # connections to other blocks.
+                table = pool.get_block_table()
+                self.assertEqual(
+                    sum(b['nconns'] + b['npending'] for b in table), 2
+                )
+                for b in table:
+                    self.assertEqual(b['nacquired'], 0)
+
+                # Steals are reported for the branch that lost the
+                # connection.
+                while any(b['npending'] for b in pool.get_block_table()):
+                    await asyncio.sleep(0.01)
+                victim = next(
+                    b['dbname'] for b in pool.get_block_table()
+                    if b['nconns']
+                )
+                self.assertTrue(pool._steal_conn_from(
+                    pool._blocks[victim], pool._get_block('block_4')))
+                self.assertEqual(collector.events['steal'], [victim])
+                await job('block_4')
+
+            await pool.close()
+
+        asyncio.run(test())
+
+    def test_connpool_prefer(self):
+        async def fake_connect(dbname):
+            return FakeConnection(dbname)
+
+        @async_timeout(timeout=5)
+        async def test():
+            pool = pool_impl.Pool(
+                connect=fake_connect,
+                disconnect=self.make_fake_disconnect(),
+                max_capacity=5,
+            )
+
+            conns = [await pool.acquire('aaa') for _ in range(3)]
+            for conn in conns:
+                pool.release('aaa', conn)
+
+            # The preferred connection is handed out even though it's not
+            # the most recently used one.
+            conn = await pool.acquire('aaa', prefer=lambda c: c is conns[0])
+            self.assertIs(conn, conns[0])
+            pool.release('aaa', conn)
+
+            # Otherwise the pool falls back to the most recently used one.
+            conn = await pool.acquire('aaa', prefer=lambda c: False)
+            self.assertIs(conn, conns[0])
+            pool.release('aaa', conn)
+
+            await pool.close()
+
+        asyncio.run(test())
+
+    def test_connpool_predictor_slots(self):
+        now = 0.0
+        predictor = connpool.DemandPredictor(
+            slot_size=10, period=100, lead_time=0, clock=lambda: now
+        )
+
+        now = 1
+        for _ in range(20):
+            predictor.on_acquire('aaa')
+        self.assertEqual(predictor.predict_rate('aaa'), 0)
+        self.assertEqual(predictor.predict_rate('bbb'), 0)
+
+        # The rate of a slot is only known once it's over.
+        now = 10
+        self.assertEqual(predictor.predict_rate('aaa'), 2)
+        self.assertEqual(list(predictor.iter_predictions()), [('aaa', 2)])
+
+        # The slots without acquisitions count as well.
+        now = 30
+        self.assertAlmostEqual(predictor.predict_rate('aaa'), 2 / 3)
+
+        # Nothing recently, but the same slot of the previous period was
+        # busy.
+        now = 100
+        self.assertEqual(predictor.predict_rate('aaa'), 2)
+        now = 110
+        self.assertEqual(predictor.predict_rate('aaa'), 0)
+
+    def test_connpool_predictor_seasonal(self):
+        now = 0.0
+        predictor = connpool.DemandPredictor(
+            slot_size=10, period=100, lead_time=5, decay=0.5,
+            clock=lambda: now,
+        )
+
+        now = 1
+        for _ in range(10):
+            predictor.on_acquire('aaa')
+        now = 101
+        for _ in range(30):
+            predictor.on_acquire('aaa')
+
+        # The seasonal average of slot 0 is (1 + 3) / 2, and it's predicted
+        # lead_time ahead.
+        now = 194
+        self.assertEqual(predictor.predict_rate('aaa'), 0)
+        now = 195
+        self.assertEqual(predictor.predict_rate('aaa'), 2)
+
+        # A quiet period decays it, skipped periods only count once.
+        now = 1095
+        self.assertEqual(predictor.predict_rate('aaa'), 1)
+
+        # Until it drops below min_rate and is forgotten.
+        for _ in range(7):
+            now += 100
+            predictor.predict_rate('aaa')
+        self.assertEqual(predictor.predict_rate('aaa'), 0)
+        self.assertEqual(list(predictor.iter_predictions()), [])
+
+    def test_connpool_predictor_forget(self):
+        now = 0.0
+        predictor = connpool.DemandPredictor(
+            slot_size=10, period=100, lead_time=0, clock=lambda: now
+        )
+
+        for _ in range(10):
+            predictor.on_acquire('aaa')
+            predictor.on_acquire('bbb')
+
+        now = 10
+        predictor.forget('aaa')
+        predictor.forget('ccc')
+        self.assertEqual(predictor.predict_rate('aaa'), 0)
+        self.assertEqual(list(predictor.iter_predictions()), [('bbb', 1)])
+
+        now = 100
+        self.assertEqual(list(predictor.iter_predictions()), [('bbb', 1)])
+
 
 HTML_TPL = R'''<!DOCTYPE html>
 <html>
@@ -0,0 +1,133 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import unittest
+
+from edb.server import query_stats
+
+
+class TestQueryStats(unittest.TestCase):
+
+    def test_query_stats_disabled(self):
+        stats = query_stats.QueryStatsTable(0)
+        self.assertFalse(stats.is_enabled())
+        stats.record('main', 'a', 'select 1', 1.0)
+        self.assertEqual(stats.get_stats()['statements'], [])
+
+    def test_query_stats_record(self):
+        stats = query_stats.QueryStatsTable(10)
+        stats.record('main', 'a', 'select 1', 0.5,
+                     tag='gel/cli', response_bytes=10, cache_hit=False)
+        stats.record('main', 'a', 'select 1', 1.5, response_bytes=20)
+        stats.record('other', 'a', 'select 1', 0.25)
+
+        res = stats.get_stats()
+        self.assertEqual(
+            [(s['branch'], s['id']) for s in res['statements']],
+            [('main', 'a'), ('other', 'a')],
+        )
+        main = res['statements'][0]
+        self.assertEqual(main['calls'], 2)
+        self.assertEqual(main['total_time'], 2.0)
+        self.assertEqual(main['mean_time'], 1.0)
+        self.assertEqual(main['min_time'], 0.5)
+        self.assertEqual(main['max_time'], 1.5)
+        self.assertEqual(main['estimated_time'], 0.0)
+        self.assertEqual(main['response_bytes'], 30)
+        self.assertEqual(main['cache_hits'], 1)
+        self.assertEqual(main['cache_misses'], 1)
+        self.assertEqual(main['tag'], 'gel/cli')
+
+        res = stats.get_stats(branch='other')
+        self.assertEqual(len(res['statements']), 1)
+        json.dumps(res)
+
+    def test_query_stats_top_k(self):
+        stats = query_stats.QueryStatsTable(2)
+        stats.record('main', 'a', 'a', 3.0)
+        stats.record('main', 'b', 'b', 2.0)
+        # Colder than everything tracked
+        stats.record('main', 'c', 'c', 1.0)
+        self.assertEqual(
+            [s['id'] for s in stats.get_stats()['statements']],
+            ['a', 'b'],
+        )
+        self.assertEqual(stats.get_stats()['other'],
+                         {'calls': 1, 'total_time': 1.0})
+
+        # c becomes hotter than b, with an estimate of its earlier calls.
+        stats.record('main', 'c', 'c', 1.5)
+        res = stats.get_stats()
+        self.assertEqual([s['id'] for s in res['statements']], ['a', 'c'])
+        c = res['statements'][1]
+        self.assertEqual(c['calls'], 1)
+        self.assertEqual(c['total_time'], 2.5)
+        self.assertEqual(c['estimated_time'], 1.0)
+        self.assertEqual(res['other'], {'calls': 2, 'total_time': 3.0})
+
+    def test_query_stats_evict_coldest(self):
+        stats = query_stats.QueryStatsTable(2)
+        stats.record('main', 'a', 'a', 1.0)
+        stats.record('main', 'b', 'b', 0.5)
+        # b is no longer the coldest one once it runs again.
+        stats.record('main', 'b', 'b', 2.0)
+        stats.record('main', 'c', 'c', 1.5)
+        self.assertEqual(
+            [s['id'] for s in stats.get_stats()['statements']],
+            ['b', 'c'],
+        )
+        self.assertEqual(stats.get_stats()['other'],
+                         {'calls': 1, 'total_time': 1.0})
+
+        # d is colder than c, whose total time is refreshed on the way.
+        stats.record('main', 'd', 'd', 1.25)
+        self.assertEqual(
+            [s['id'] for s in stats.get_stats()['statements']],
+            ['b', 'c'],
+        )
+
+    def test_query_stats_merge(self):
+        s1 = query_stats.QueryStatsTable(2)
+        s1.record('main', 'a', 'a', 1.0)
+        s1.record('main', 'b', 'b', 2.0)
+        s2 = query_stats.QueryStatsTable(2)
+        s2.record('main', 'a', 'a', 2.0)
+        s2.record('main', 'c', 'c', 0.5)
+
+        s1.merge(s2)
+        res = s1.get_stats()
+        self.assertEqual(
+            [(s['id'], s['calls'], s['total_time'])
+             for s in res['statements']],
+            [('a', 2, 3.0), ('b', 1, 2.0)],
+        )
+        self.assertEqual(res['other'], {'calls': 1, 'total_time': 0.5})
+
+        # The sketches are merged as well.
+        s1.record('main', 'c', 'c', 2.0)
+        self.assertEqual(
+            [s['id'] for s in s1.get_stats()['statements']],
+            ['a', 'c'],
+        )
+
+        s1.reset()
+        self.assertEqual(s1.get_stats(), {
+            'statements': [],
+            'other': {'calls': 0, 'total_time': 0.0},
+        })
@@ -0,0 +1,97 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import unittest
+
+from edb import errors
+from edb.edgeql import qltypes
+from edb.server import result_cache
+from edb.server.compiler import dbstate
+from edb.server.compiler import enums
+
+
+class ManualClock:
+    def __init__(self, value: float) -> None:
+        self.value = value
+
+    def __call__(self) -> float:
+        return self.value
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_result_cache_stamp(self):
+        cache = result_cache.ResultCache(clock=ManualClock(0))
+        cache.put('q', (1, 0), b'data', created_at=0)
+        self.assertEqual(cache.get('q', (1, 0), 10), b'data')
+
+        # Any DML or schema change invalidates the entry.
+        self.assertIsNone(cache.get('q', (1, 1), 10))
+        self.assertIsNone(cache.get('q', (1, 0), 10))
+
+    def test_result_cache_max_age(self):
+        clock = ManualClock(0)
+        cache = result_cache.ResultCache(clock=clock)
+        cache.put('q', 1, b'data', created_at=0)
+        clock.value = 5
+        self.assertIsNone(cache.get('q', 1, 1))
+        self.assertIsNone(cache.get('q', 1, 10))
+
+        cache.put('q', 1, b'data', created_at=5)
+        clock.value = 10
+        self.assertEqual(cache.get('q', 1, 10), b'data')
+
+    def test_result_cache_size(self):
+        cache = result_cache.ResultCache(max_size=10, max_entry_size=6)
+        cache.put('a', 1, b'aaaa', created_at=cache.now())
+        cache.put('b', 1, b'bbbb', created_at=cache.now())
+        cache.put('big', 1, b'x' * 7, created_at=cache.now())
+        self.assertIsNone(cache.get('big', 1, 10))
+
+        # The least recently used entry is evicted first.
+        self.assertEqual(cache.get('a', 1, 10), b'aaaa')
+        cache.put('c', 1, b'cccc', created_at=cache.now())
+        self.assertIsNone(cache.get('b', 1, 10))
+        self.assertEqual(cache.get('a', 1, 10), b'aaaa')
+        self.assertEqual(cache.get('c', 1, 10), b'cccc')
+        self.assertEqual(cache.get_debug_info()['size'], 8)
+
+    def test_result_cache_is_cacheable(self):
+        unit = dbstate.QueryUnit(
+            sql=b'SELECT 1',
+            status=b'SELECT',
+            volatility=qltypes.Volatility.Stable,
+        )
+        self.assertTrue(result_cache.is_cacheable(unit))
+
+        unit.volatility = qltypes.Volatility.Volatile
+        self.assertFalse(result_cache.is_cacheable(unit))
+
+        unit.volatility = qltypes.Volatility.Immutable
+        unit.capabilities = enums.Capability.MODIFICATIONS
+        self.assertFalse(result_cache.is_cacheable(unit))
+
+        unit.capabilities = enums.Capability(0)
+        self.assertTrue(result_cache.is_cacheable(unit))
+        unit.warnings = (errors.QueryError('deprecated'),)
+        self.assertFalse(result_cache.is_cacheable(unit))
+
+    def test_result_cache_parse_max_age(self):
+        self.assertEqual(result_cache.parse_max_age('2.5'), 2.5)
+        for value in ('0', '-1', 'nan', 'inf', 'soon', '100000'):
+            with self.assertRaises(errors.BinaryProtocolError):
+                result_cache.parse_max_age(value)